@@ -0,0 +1,153 @@
+"""Store for intermediate results of solution stages"""
+
+import os
+import json
+import asyncio
+import hashlib
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+from typing import Any, Awaitable, Callable
+from common import metrics
+from common.file_processor import save_file_atomic
+from conf.logger import LOG
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+STORE_DIR = os.environ.get(
+    "ARTIFACT_STORE_DIR", os.fspath(f"{os.environ["PROJECT_DIR"]}/cache/artifacts")
+)
+CODECS = {
+    "text": (".txt", lambda value: value, lambda content: content),
+    "json": (".json", json.dumps, json.loads),
+}
+
+STATS = defaultdict(lambda: {"hits": 0, "misses": 0})
+# Artifacts share a fixed set of locks, so lock count stays bounded
+LOCK_STRIPES = 64
+LOCK_DIR = ".locks"
+
+_thread_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+def digest(content: str | bytes) -> str:
+    """SHA-256 of text or binary content"""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of file content"""
+    with open(file_path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def _artifact_path(stage: str, inputs: Any, version: str, codec: str) -> str:
+    key_source = json.dumps(
+        {"stage": stage, "version": version, "inputs": inputs},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    extension, _, _ = CODECS[codec]
+    return os.fspath(f"{STORE_DIR}/{stage}/{digest(key_source)}{extension}")
+
+
+def _read(stage: str, path: str, codec: str) -> Any:
+    _, _, decode = CODECS[codec]
+    try:
+        with open(path, "r", encoding="UTF-8") as file:
+            value = decode(file.read())
+    except FileNotFoundError:
+        return None
+    except json.decoder.JSONDecodeError:
+        LOG.warning("Artifact %s cannot be decoded, recreating.", path)
+        return None
+    STATS[stage]["hits"] += 1
+    metrics.record_cache(stage, True)
+    LOG.debug("Artifact for stage %s read from store.", stage)
+    return value
+
+
+def _write(stage: str, path: str, codec: str, value: Any) -> None:
+    _, encode, _ = CODECS[codec]
+    save_file_atomic(path, encode(value))
+    LOG.debug("Artifact for stage %s saved: %s.", stage, path)
+
+
+# Stripe derived from path digest so every process picks the same lock file
+def _stripe(path: str) -> int:
+    return int(digest(path)[:8], 16) % LOCK_STRIPES
+
+
+@contextmanager
+def _locked(path: str):
+    stripe = _stripe(path)
+    with _thread_locks[stripe]:
+        if fcntl is None:
+            yield
+            return
+        lock_dir = os.fspath(f"{STORE_DIR}/{LOCK_DIR}")
+        os.makedirs(lock_dir, exist_ok=True)
+        with open(f"{lock_dir}/{stripe}.lock", "w", encoding="UTF-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_or_create(
+    stage: str,
+    inputs: Any,
+    create: Callable[[], Any],
+    version: str = "1",
+    codec: str = "text",
+) -> Any:
+    """
+    Return stored artifact for stage and inputs or create and store it.
+    Results equal to None are not stored.
+    """
+    path = _artifact_path(stage, inputs, version, codec)
+    value = _read(stage, path, codec)
+    if value is not None:
+        return value
+    with _locked(path):
+        value = _read(stage, path, codec)
+        if value is not None:
+            return value
+        STATS[stage]["misses"] += 1
+        metrics.record_cache(stage, False)
+        LOG.debug("Artifact for stage %s not found, creating.", stage)
+        value = create()
+        if value is not None:
+            _write(stage, path, codec, value)
+    return value
+
+
+async def get_or_create_async(
+    stage: str,
+    inputs: Any,
+    create: Callable[[], Awaitable[Any]],
+    version: str = "1",
+    codec: str = "text",
+) -> Any:
+    """
+    Async variant of get_or_create, store is read and written in worker threads,
+    concurrent misses may create the artifact twice but writes stay atomic
+    """
+    path = _artifact_path(stage, inputs, version, codec)
+    value = await asyncio.to_thread(_read, stage, path, codec)
+    if value is not None:
+        return value
+    STATS[stage]["misses"] += 1
+    metrics.record_cache(stage, False)
+    LOG.debug("Artifact for stage %s not found, creating.", stage)
+    value = await create()
+    if value is not None:
+        await asyncio.to_thread(_write, stage, path, codec, value)
+    return value
@@ -0,0 +1,163 @@
+"""Audio preprocessing: downmix, resample, trim silence and split long recordings"""
+
+import os
+import re
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from conf.logger import LOG
+
+ENABLED = os.environ.get("AUDIO_PREPROCESSING", "1") != "0"
+CHUNK_SECONDS = float(os.environ.get("AUDIO_CHUNK_SECONDS", "600"))
+SILENCE_DB = int(os.environ.get("AUDIO_SILENCE_DB", "-35"))
+SILENCE_SECONDS = float(os.environ.get("AUDIO_SILENCE_SECONDS", "0.5"))
+WORKERS = int(os.environ.get("AUDIO_CHUNK_WORKERS", "4"))
+# Seconds a single ffmpeg run may take before the original file is used
+TIMEOUT = float(os.environ.get("AUDIO_FFMPEG_TIMEOUT", "300"))
+SAMPLE_RATE = 16000
+CHUNK_BITRATE = 32000
+CHUNK_EXTENSION = ".ogg"
+EDGE_TOLERANCE = 0.05
+
+FFMPEG = shutil.which("ffmpeg")
+
+_DURATION = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_SILENCE_START = re.compile(r"silence_start: (-?\d+(?:\.\d+)?)")
+_SILENCE_END = re.compile(r"silence_end: (\d+(?:\.\d+)?)")
+
+
+def _run(arguments: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [FFMPEG, "-hide_banner", "-nostats", *arguments],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=TIMEOUT,
+    )
+
+
+def _analyse(audio_path: str) -> tuple[float, list[tuple[float, float]]]:
+    output = _run(
+        [
+            "-i",
+            audio_path,
+            "-af",
+            f"silencedetect=noise={SILENCE_DB}dB:d={SILENCE_SECONDS}",
+            "-f",
+            "null",
+            "-",
+        ]
+    ).stderr
+    hours, minutes, seconds = _DURATION.search(output).groups()
+    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    starts = [max(0, float(value)) for value in _SILENCE_START.findall(output)]
+    ends = [float(value) for value in _SILENCE_END.findall(output)]
+    ends += [duration] * (len(starts) - len(ends))
+    return duration, list(zip(starts, ends))
+
+
+def split_points(
+    duration: float, silences: list[tuple[float, float]], chunk_seconds: float
+) -> list[tuple[float, float]]:
+    """Speech segments without edge silence, cut in the middle of silences"""
+    start, end = 0, duration
+    if silences and silences[0][0] <= EDGE_TOLERANCE:
+        start = silences[0][1]
+    if silences and silences[-1][1] >= duration - EDGE_TOLERANCE:
+        end = silences[-1][0]
+    if end <= start:
+        return []
+    cuts = [
+        (silence_start + silence_end) / 2 for silence_start, silence_end in silences
+    ]
+    cuts = [cut for cut in cuts if start < cut < end]
+    segments = []
+    while end - start > chunk_seconds:
+        candidates = [cut for cut in cuts if start < cut <= start + chunk_seconds]
+        cut = candidates[-1] if candidates else start + chunk_seconds
+        segments.append((start, cut))
+        start = cut
+    segments.append((start, end))
+    return segments
+
+
+def _encode_chunks(
+    audio_path: str, segments: list[tuple[float, float]], directory: str
+) -> list[str]:
+    chunks = []
+    for idx, (start, end) in enumerate(segments):
+        chunk_path = os.fspath(f"{directory}/chunk-{idx:03d}{CHUNK_EXTENSION}")
+        _run(
+            [
+                "-ss",
+                f"{start:.3f}",
+                "-to",
+                f"{end:.3f}",
+                "-i",
+                audio_path,
+                "-ac",
+                "1",
+                "-ar",
+                str(SAMPLE_RATE),
+                "-c:a",
+                "libopus",
+                "-b:a",
+                str(CHUNK_BITRATE),
+                chunk_path,
+            ]
+        )
+        chunks.append(chunk_path)
+    return chunks
+
+
+def prepare_chunks(audio_path: str, directory: str) -> list[str]:
+    """
+    Mono 16kHz chunks of speech stored in directory,
+    original file when preprocessing is not available
+    """
+    if not ENABLED or FFMPEG is None:
+        return [audio_path]
+    try:
+        duration, silences = _analyse(audio_path)
+        segments = split_points(duration, silences, CHUNK_SECONDS)
+        LOG.debug(
+            "Audio %s: %.1fs, %d silences, %d chunks.",
+            audio_path,
+            duration,
+            len(silences),
+            len(segments),
+        )
+        return _encode_chunks(audio_path, segments, directory)
+    except (
+        OSError,
+        subprocess.CalledProcessError,
+        subprocess.TimeoutExpired,
+        AttributeError,
+    ) as exception:
+        LOG.warning("Audio %s cannot be preprocessed: %s", audio_path, exception)
+        return [audio_path]
+
+
+def transcribe_in_chunks(audio_path: str, transcribe: Callable[[str], str]) -> str:
+    """Transcribe chunks concurrently and join texts in order"""
+    with tempfile.TemporaryDirectory(prefix="audio-") as directory:
+        chunks = prepare_chunks(audio_path, directory)
+        if not chunks:
+            return ""
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            parts = list(pool.map(transcribe, chunks))
+    if any(part is None for part in parts):
+        return None
+    return " ".join(part.strip() for part in parts)
+
+
+def transcribe_content_in_chunks(
+    content: bytes, suffix: str, transcribe: Callable[[str], str]
+) -> str:
+    """Same as transcribe_in_chunks for audio held in memory"""
+    with tempfile.NamedTemporaryFile(suffix=suffix) as file:
+        file.write(content)
+        file.flush()
+        return transcribe_in_chunks(file.name, transcribe)
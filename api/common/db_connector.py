@@ -3,7 +3,9 @@
 import os
 import json
 from http import HTTPStatus
+import httpx
 import requests
+from common import http_client
 from models import DBRequest
 from conf.logger import LOG
 
@@ -17,7 +19,22 @@ def send_request(url: str, request: DBRequest) -> requests.Response:
     request_body = json.dumps(
         {"task": request.task_id, "apikey": API_KEY, "query": request.query}
     )
-    response = requests.get(url=url, data=request_body, timeout=30)
+    response = http_client.get(url=url, data=request_body, timeout=30)
+    if response.status_code != HTTPStatus.OK:
+        LOG.error("[db-connector] Request failed: %s.", response)
+        return None
+    return response
+
+
+async def send_request_async(url: str, request: DBRequest) -> httpx.Response:
+    """Send query to DB API without blocking the event loop"""
+    LOG.debug("Send query: %s to url: %s.", request.query, url)
+    request_body = json.dumps(
+        {"task": request.task_id, "apikey": API_KEY, "query": request.query}
+    )
+    response = await http_client.async_client.request(
+        "GET", url, content=request_body, timeout=30
+    )
     if response.status_code != HTTPStatus.OK:
         LOG.error("[db-connector] Request failed: %s.", response)
         return None
@@ -1,8 +1,9 @@
 """Common file functions"""
 
 import os
-import requests
+import tempfile
 from http import HTTPStatus
+from common import remote_cache
 from conf.logger import LOG
 
 
@@ -41,7 +42,25 @@ def read_remote_file(url: str) -> str:
         LOG.warning("Url is empty.")
         return None
     LOG.debug("Read file from remote url=%s.", url)
-    response = requests.get(url, timeout=TIMEOUT)
+    response = remote_cache.get(url, timeout=TIMEOUT)
+    if response.status_code != HTTPStatus.OK:
+        LOG.warning(
+            "Could not get resource: %d %s",
+            response.status_code,
+            response.text,
+        )
+        return None
+    LOG.debug("File read successfully.")
+    return response.text
+
+
+async def read_remote_file_async(url: str) -> str:
+    """Read file from specific url without blocking the event loop"""
+    if not url:
+        LOG.warning("Url is empty.")
+        return None
+    LOG.debug("Read file from remote url=%s.", url)
+    response = await remote_cache.get_async(url, timeout=TIMEOUT)
     if response.status_code != HTTPStatus.OK:
         LOG.warning(
             "Could not get resource: %d %s",
@@ -68,3 +87,19 @@ def save_file(filename: str, dirname: str, content: str) -> None:
     with open(file_path, "w", encoding="UTF-8") as file:
         file.write(content)
     LOG.debug("File %s saved successfully.", filename)
+
+
+def save_file_atomic(file_path: str, content: str | bytes) -> None:
+    """Save data to file, readers never see partially written content"""
+    dirname = os.path.dirname(file_path)
+    os.makedirs(dirname, exist_ok=True)
+    mode = "wb" if isinstance(content, bytes) else "w"
+    encoding = None if isinstance(content, bytes) else "UTF-8"
+    descriptor, temp_path = tempfile.mkstemp(dir=dirname, prefix=".tmp-")
+    try:
+        with open(descriptor, mode, encoding=encoding) as file:
+            file.write(content)
+        os.replace(temp_path, file_path)
+    except OSError:
+        os.remove(temp_path)
+        raise
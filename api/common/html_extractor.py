@@ -0,0 +1,125 @@
+"""Local extraction of article text with placeholders for figures and audio"""
+
+import os
+import re
+from html.parser import HTMLParser
+
+SKIPPED_TAGS = {"head", "script", "style", "noscript", "template", "svg"}
+BLOCK_TAGS = {
+    "address",
+    "article",
+    "aside",
+    "blockquote",
+    "br",
+    "dd",
+    "div",
+    "dl",
+    "dt",
+    "figcaption",
+    "figure",
+    "footer",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "header",
+    "hr",
+    "li",
+    "main",
+    "nav",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "tr",
+    "ul",
+}
+MEDIA_TAGS = {"img", "audio", "video", "source"}
+WHITESPACE = re.compile(r"\s+")
+
+
+def placeholder_name(resource_url: str) -> str:
+    """Placeholder of resource in format placeholder_<filename>_<extension>"""
+    filename = os.path.basename(resource_url.split("?", maxsplit=1)[0])
+    name, extension = os.path.splitext(filename)
+    return f"placeholder_{name}_{extension.lstrip('.')}"
+
+
+class _ArticleParser(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self.placeholders = {}
+        self._names = {}
+        self._line = []
+        self._skipped = 0
+
+    def _break(self) -> None:
+        line = WHITESPACE.sub(" ", "".join(self._line)).strip()
+        if line:
+            self.blocks.append(line)
+        self._line = []
+
+    # Resources with the same file name in different directories get numbered names
+    def _add_resource(self, resource_url: str) -> None:
+        name = self._names.get(resource_url)
+        if name is None:
+            base_name = name = placeholder_name(resource_url)
+            idx = 1
+            while name in self.placeholders:
+                idx += 1
+                name = f"{base_name}_{idx}"
+            self._names[resource_url] = name
+            self.placeholders[name] = resource_url
+        self._line.append(f" {name} ")
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skipped += 1
+        if self._skipped:
+            return
+        if tag in BLOCK_TAGS:
+            self._break()
+        resource_url = dict(attrs).get("src")
+        if tag in MEDIA_TAGS and resource_url:
+            self._add_resource(resource_url)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in SKIPPED_TAGS:
+            self._skipped -= 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skipped = max(0, self._skipped - 1)
+        elif not self._skipped and tag in BLOCK_TAGS:
+            self._break()
+
+    def handle_data(self, data):
+        if not self._skipped:
+            self._line.append(data)
+
+    def close(self):
+        super().close()
+        self._break()
+
+
+def extract(article: str) -> dict:
+    """
+    Article text without tags, figures and audio replaced by placeholders,
+    in the same structure as the model conversion
+    """
+    parser = _ArticleParser()
+    parser.feed(article)
+    parser.close()
+    return {
+        "content": "\n".join(parser.blocks),
+        "placeholders": [
+            {"placeholder-name": name, "resource-url": resource_url}
+            for name, resource_url in parser.placeholders.items()
+        ],
+    }
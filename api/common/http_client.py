@@ -0,0 +1,97 @@
+"""Shared pooled HTTP clients for outbound calls"""
+
+import os
+from urllib.parse import urlparse
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from common import metrics
+from conf.logger import LOG
+
+TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "30"))
+POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", "10"))
+POOL_PER_HOST = int(os.environ.get("HTTP_POOL_PER_HOST", "20"))
+MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "20"))
+
+
+class _PooledAdapter(HTTPAdapter):
+    """Keep-alive adapter with per-host pool size and default timeout"""
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = TIMEOUT
+        with _track(request.url, request.method):
+            return super().send(request, **kwargs)
+
+
+class _InstrumentedTransport(httpx.HTTPTransport):
+    """Transport recording latency of SDK calls"""
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with _track(str(request.url), request.method):
+            return super().handle_request(request)
+
+
+class _InstrumentedAsyncTransport(httpx.AsyncHTTPTransport):
+    """Async transport recording latency of outbound calls"""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with _track(str(request.url), request.method):
+            return await super().handle_async_request(request)
+
+
+def _track(url: str, method: str):
+    parsed_url = urlparse(url)
+    dependency = metrics.dependency_name(parsed_url.hostname)
+    return metrics.track(
+        dependency, metrics.operation_name(dependency, method, parsed_url.path)
+    )
+
+
+def _create_session() -> requests.Session:
+    adapter = _PooledAdapter(
+        pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST, pool_block=False
+    )
+    pooled_session = requests.Session()
+    pooled_session.mount("http://", adapter)
+    pooled_session.mount("https://", adapter)
+    LOG.debug(
+        "HTTP session created, hosts=%d, connections per host=%d.",
+        POOL_HOSTS,
+        POOL_PER_HOST,
+    )
+    return pooled_session
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE
+    )
+
+
+session = _create_session()
+sdk_client = httpx.Client(
+    transport=_InstrumentedTransport(limits=_limits()), timeout=TIMEOUT
+)
+async_client = httpx.AsyncClient(
+    transport=_InstrumentedAsyncTransport(limits=_limits()), timeout=TIMEOUT
+)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Send GET request using pooled session"""
+    return session.get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """Send POST request using pooled session"""
+    return session.post(url, **kwargs)
+
+
+async def aclose() -> None:
+    """Close all pooled connections"""
+    LOG.debug("Closing pooled HTTP clients.")
+    session.close()
+    sdk_client.close()
+    await async_client.aclose()
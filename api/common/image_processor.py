@@ -0,0 +1,146 @@
+"""Image preprocessing for vision models: downsize, re-encode and deduplicate"""
+
+import io
+import os
+import base64
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from PIL import Image, UnidentifiedImageError
+from conf.logger import LOG
+
+MAX_SIDE = int(os.environ.get("VISION_MAX_SIDE", "1120"))
+JPEG_QUALITY = int(os.environ.get("VISION_JPEG_QUALITY", "85"))
+# Reuse description of an image with the same perceptual hash and size, off by default
+SKIP_DUPLICATES = os.environ.get("VISION_SKIP_DUPLICATES", "0") == "1"
+DUPLICATE_INDEX_SIZE = int(os.environ.get("VISION_DUPLICATE_INDEX_SIZE", "1024"))
+HASH_SIZE = 8
+REDUCING_GAP = 2.0
+DOCUMENT_LEVELS = 8
+DOCUMENT_SHARE = 0.9
+PNG_COMPRESSION = 6
+BACKGROUND = (255, 255, 255)
+
+_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"\xff\xd8\xff": "image/jpeg",
+    b"GIF8": "image/gif",
+    b"RIFF": "image/webp",
+}
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """Image ready to be sent to vision model"""
+
+    content: bytes
+    mime_type: str
+    perceptual_hash: int | None = None
+
+    def data_url(self) -> str:
+        """Base64 encoded data url"""
+        encoded = base64.b64encode(self.content).decode("utf-8")
+        return f"data:{self.mime_type};base64,{encoded}"
+
+
+def mime_type(content: bytes) -> str:
+    """MIME type detected from file signature, PNG when unknown"""
+    for signature, detected in _SIGNATURES.items():
+        if content.startswith(signature):
+            return detected
+    return "image/png"
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """64 bit difference hash, similar images have close hashes"""
+    pixels = list(
+        image.convert("L")
+        .resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX)
+        .getdata()
+    )
+    value = 0
+    for row in range(HASH_SIZE):
+        for column in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + column]
+            right = pixels[row * (HASH_SIZE + 1) + column + 1]
+            value = value << 1 | (left > right)
+    return value
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        rgba = image.convert("RGBA")
+        flattened = Image.new("RGB", rgba.size, BACKGROUND)
+        flattened.paste(rgba, mask=rgba.getchannel("A"))
+        return flattened
+    if image.mode in ("1", "L"):
+        return image.convert("L")
+    return image.convert("RGB")
+
+
+def _is_document(image: Image.Image) -> bool:
+    histogram = sorted(image.convert("L").histogram(), reverse=True)
+    return sum(histogram[:DOCUMENT_LEVELS]) >= DOCUMENT_SHARE * sum(histogram)
+
+
+def _encode(image: Image.Image) -> tuple[bytes, str]:
+    buffer = io.BytesIO()
+    if _is_document(image):
+        image.save(buffer, "PNG", compress_level=PNG_COMPRESSION)
+        return buffer.getvalue(), "image/png"
+    image.save(buffer, "JPEG", quality=JPEG_QUALITY)
+    return buffer.getvalue(), "image/jpeg"
+
+
+def prepare(content: bytes) -> PreparedImage:
+    """
+    Image downsized to MAX_SIDE, encoded as PNG when a few gray levels
+    dominate like in scanned text and as JPEG otherwise, original bytes when they are
+    already smaller or cannot be decoded
+    """
+    original_type = mime_type(content)
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            resized = max(image.size) > MAX_SIDE
+            image.draft("RGB", (MAX_SIDE, MAX_SIDE))
+            image.thumbnail((MAX_SIDE, MAX_SIDE), reducing_gap=REDUCING_GAP)
+            converted = _flatten(image)
+    except (UnidentifiedImageError, OSError) as exception:
+        LOG.warning("Image cannot be preprocessed: %s", exception)
+        return PreparedImage(content, original_type)
+    image_hash = perceptual_hash(converted)
+    encoded, encoded_type = _encode(converted)
+    if not resized and len(encoded) >= len(content):
+        return PreparedImage(content, original_type, image_hash)
+    LOG.debug("Image preprocessed: %d -> %d bytes.", len(content), len(encoded))
+    return PreparedImage(encoded, encoded_type, image_hash)
+
+
+class DuplicateIndex:  # pylint: disable=too-few-public-methods
+    """Recently processed images looked up by perceptual hash and size"""
+
+    def __init__(self, enabled: bool, size: int):
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._size = size
+        self._lock = threading.Lock()
+
+    def canonical(self, image: PreparedImage, key: str) -> str:
+        """
+        Key of an image seen before with identical perceptual hash and byte size
+        when enabled, given content key otherwise
+        """
+        if not self.enabled or image.perceptual_hash is None:
+            return key
+        signature = (image.perceptual_hash, len(image.content))
+        with self._lock:
+            seen_key = self._entries.setdefault(signature, key)
+            self._entries.move_to_end(signature)
+            if len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+        if seen_key != key:
+            LOG.debug("Image %s is a duplicate of %s.", key, seen_key)
+        return seen_key
+
+
+DUPLICATES = DuplicateIndex(SKIP_DUPLICATES, DUPLICATE_INDEX_SIZE)
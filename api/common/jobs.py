@@ -0,0 +1,141 @@
+"""Background jobs for long running solutions"""
+
+import os
+import uuid
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from common.file_processor import save_file_atomic
+from conf.logger import LOG
+from models import Job, JobStatus
+
+JOBS_DIR = os.environ.get("JOBS_DIR", os.fspath(f"{os.environ["PROJECT_DIR"]}/jobs"))
+MAX_WORKERS = int(os.environ.get("JOBS_MAX_WORKERS", "2"))
+# Finished jobs above this number are removed, oldest first
+MAX_JOBS = int(os.environ.get("JOBS_MAX_JOBS", "100"))
+JOB_FILE_EXTENSION = ".json"
+FINISHED = (JobStatus.DONE, JobStatus.FAILED)
+
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="job")
+
+_jobs: dict[str, Job] = {}
+_lock = threading.Lock()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _job_path(job_id: str) -> str:
+    return os.fspath(f"{JOBS_DIR}/{job_id}{JOB_FILE_EXTENSION}")
+
+
+def _save(job: Job) -> None:
+    with _lock:
+        _jobs[job.job_id] = job
+    save_file_atomic(_job_path(job.job_id), job.model_dump_json())
+
+
+def _run(job: Job, target: Callable[[], Any]) -> None:
+    job = job.model_copy(update={"status": JobStatus.RUNNING, "started_at": _now()})
+    _save(job)
+    LOG.info("Job %s (%s) started.", job.job_id, job.name)
+    try:
+        result = target()
+        _save(
+            job.model_copy(
+                update={
+                    "status": JobStatus.DONE,
+                    "result": result,
+                    "finished_at": _now(),
+                }
+            )
+        )
+        LOG.info("Job %s (%s) finished.", job.job_id, job.name)
+    except Exception as exception:  # pylint: disable=broad-exception-caught
+        LOG.exception("Job %s (%s) failed.", job.job_id, job.name)
+        _save(
+            job.model_copy(
+                update={
+                    "status": JobStatus.FAILED,
+                    "error": repr(exception),
+                    "finished_at": _now(),
+                }
+            )
+        )
+
+
+def _prune() -> None:
+    if not os.path.isdir(JOBS_DIR):
+        return
+    entries = []
+    for file in os.listdir(JOBS_DIR):
+        if file.endswith(JOB_FILE_EXTENSION):
+            path = os.fspath(f"{JOBS_DIR}/{file}")
+            try:
+                entries.append((os.path.getmtime(path), file))
+            except FileNotFoundError:
+                continue
+    for _, file in sorted(entries)[: max(0, len(entries) - MAX_JOBS)]:
+        job_id = file.removesuffix(JOB_FILE_EXTENSION)
+        job = get_job(job_id)
+        if job is not None and job.status not in FINISHED:
+            continue
+        with _lock:
+            _jobs.pop(job_id, None)
+        try:
+            os.remove(_job_path(job_id))
+        except FileNotFoundError:
+            pass
+        LOG.debug("Job %s removed by retention.", job_id)
+
+
+def submit(name: str, target: Callable[[], Any]) -> Job:
+    """Queue target to run in worker pool"""
+    _prune()
+    job = Job(job_id=uuid.uuid4().hex, name=name, created_at=_now())
+    _save(job)
+    executor.submit(_run, job, target)
+    LOG.info("Job %s (%s) queued.", job.job_id, name)
+    return job
+
+
+def get_job(job_id: str) -> Job:
+    """Return job state, also for jobs created by previous process"""
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job
+    try:
+        with open(_job_path(job_id), "r", encoding="UTF-8") as file:
+            return Job.model_validate_json(file.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def recover() -> None:
+    """Mark jobs interrupted by previous shutdown as failed"""
+    if not os.path.isdir(JOBS_DIR):
+        return
+    for file in os.listdir(JOBS_DIR):
+        if not file.endswith(JOB_FILE_EXTENSION):
+            continue
+        job = get_job(file.removesuffix(JOB_FILE_EXTENSION))
+        if job is None or job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+            continue
+        LOG.warning("Job %s (%s) was interrupted.", job.job_id, job.name)
+        _save(
+            job.model_copy(
+                update={
+                    "status": JobStatus.FAILED,
+                    "error": "Interrupted by service restart.",
+                    "finished_at": _now(),
+                }
+            )
+        )
+
+
+def shutdown() -> None:
+    """Stop accepting jobs, queued jobs are cancelled"""
+    executor.shutdown(wait=False, cancel_futures=True)
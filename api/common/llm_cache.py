@@ -0,0 +1,176 @@
+"""Persistent cache for LLM chat completions"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+import contextvars
+from openai.types.chat import ChatCompletion
+from common import metrics
+from common.file_processor import save_file_atomic
+from conf.logger import LOG
+
+CACHE_DIR = os.environ.get(
+    "LLM_CACHE_DIR", os.fspath(f"{os.environ["PROJECT_DIR"]}/cache/llm")
+)
+ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") != "0"
+MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+TTL = int(os.environ.get("LLM_CACHE_TTL", str(7 * 24 * 60 * 60)))
+CACHE_FILE_EXTENSION = ".json"
+
+STATS = {"hits": 0, "misses": 0}
+# Whether the last completion looked up in current context was served from cache
+HIT = contextvars.ContextVar("llm_cache_hit", default=False)
+
+# Running size of cache directory, listed once and updated on writes
+_SIZE = {"total": None}
+_size_lock = threading.Lock()
+
+
+def cache_key(provider: str, params: dict) -> str:
+    """Hash of provider, model, messages and remaining parameters"""
+    key_source = json.dumps(
+        {"provider": provider, **params},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.fspath(f"{CACHE_DIR}/{key}{CACHE_FILE_EXTENSION}")
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _remove(path: str) -> None:
+    size = _file_size(path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    with _size_lock:
+        if _SIZE["total"] is not None:
+            _SIZE["total"] -= size
+
+
+def _read(key: str) -> dict:
+    path = _cache_path(key)
+    try:
+        with open(path, "r", encoding="UTF-8") as file:
+            entry = json.load(file)
+    except FileNotFoundError:
+        return None
+    except json.decoder.JSONDecodeError:
+        LOG.warning("Cached completion %s is corrupted.", key)
+        return None
+    # Expiry uses creation time, mtime is refreshed on hits for LRU eviction
+    created_at = entry.get("created_at") if "completion" in entry else None
+    if created_at is None or (TTL and time.time() - created_at > TTL):
+        LOG.debug("Cached completion %s expired.", key)
+        _remove(path)
+        return None
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    return entry["completion"]
+
+
+def _entries() -> list[tuple[int, int, str]]:
+    entries = []
+    for file in os.listdir(CACHE_DIR):
+        if not file.endswith(CACHE_FILE_EXTENSION):
+            continue
+        try:
+            stat = os.stat(os.fspath(f"{CACHE_DIR}/{file}"))
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, file))
+    return entries
+
+
+def _evict() -> int:
+    entries = _entries()
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, file in sorted(entries):
+        if total_size <= MAX_BYTES:
+            break
+        try:
+            os.remove(os.fspath(f"{CACHE_DIR}/{file}"))
+        except FileNotFoundError:
+            pass
+        total_size -= size
+        LOG.debug("Evicted cached completion: %s.", file)
+    return total_size
+
+
+def _write(key: str, completion: ChatCompletion) -> None:
+    path = _cache_path(key)
+    previous_size = _file_size(path)
+    entry = {
+        "created_at": time.time(),
+        "completion": completion.model_dump(mode="json"),
+    }
+    save_file_atomic(path, json.dumps(entry))
+    with _size_lock:
+        if _SIZE["total"] is None:
+            _SIZE["total"] = sum(size for _, size, _ in _entries())
+        else:
+            _SIZE["total"] += _file_size(path) - previous_size
+        if _SIZE["total"] > MAX_BYTES:
+            _SIZE["total"] = _evict()
+
+
+def _lookup(client, params: dict, cache: bool) -> tuple[str, ChatCompletion]:
+    if not (ENABLED and cache) or params.get("stream"):
+        return None, None
+    key = cache_key(str(client.base_url), params)
+    entry = _read(key)
+    HIT.set(entry is not None)
+    metrics.record_cache("llm", entry is not None)
+    if entry is None:
+        STATS["misses"] += 1
+        return key, None
+    STATS["hits"] += 1
+    LOG.debug("Completion for model %s read from cache.", params.get("model"))
+    return key, ChatCompletion.model_validate(entry)
+
+
+def create_completion(client, cache: bool = True, **params) -> ChatCompletion:
+    """Create chat completion or return identical previous one"""
+    key, completion = _lookup(client, params, cache)
+    if completion is not None:
+        return completion
+    completion = client.chat.completions.create(**params)
+    metrics.record_usage(completion)
+    if key is not None:
+        _write(key, completion)
+    return completion
+
+
+async def create_completion_async(
+    client, cache: bool = True, **params
+) -> ChatCompletion:
+    """
+    Create chat completion with async client or return cached one,
+    cache files are read and written in worker threads
+    """
+    key, completion = await asyncio.to_thread(_lookup, client, params, cache)
+    # Worker thread runs in a copy of the context, hit is flagged here again
+    HIT.set(completion is not None)
+    if completion is not None:
+        return completion
+    completion = await client.chat.completions.create(**params)
+    metrics.record_usage(completion)
+    if key is not None:
+        await asyncio.to_thread(_write, key, completion)
+    return completion
@@ -0,0 +1,398 @@
+"""
+LLM gateway: calls models by capability using configurable routing tables,
+fails over between providers and hedges slow requests
+"""
+
+import os
+import time
+import asyncio
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+import groq
+import openai
+from openai.types.chat import ChatCompletion
+from common import http_client, llm_cache, metrics, tokens
+from common.llm_cache import create_completion, create_completion_async
+from conf.logger import LOG
+
+DEFAULT_ROUTES = {
+    "chat": "openai:gpt-4o-mini",
+    "local-chat": "ollama:llama3.2:3b",
+    "vision": "groq:llama-3.2-11b-vision-preview",
+    "transcribe": "groq:whisper-large-v3-turbo",
+    "embed": "ollama:bge-m3",
+}
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+# Percentile of route latency after which duplicate request is sent, 0 disables
+HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "0"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WORKERS = int(os.environ.get("LLM_HEDGE_WORKERS", "16"))
+LATENCY_WINDOW = 200
+# Action for prompts above model budget: reject before sending or truncate
+PROMPT_OVERFLOW = os.environ.get("LLM_PROMPT_OVERFLOW", "reject")
+
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    groq.APIConnectionError,
+    groq.RateLimitError,
+    groq.InternalServerError,
+)
+RATE_LIMIT_ERRORS = (openai.RateLimitError, groq.RateLimitError)
+SERVER_ERRORS = (
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    groq.APIConnectionError,
+    groq.InternalServerError,
+)
+BAD_REQUEST_ERRORS = (openai.BadRequestError, groq.BadRequestError)
+
+
+class PromptTooLargeError(ValueError):
+    """Prompt does not fit into model context"""
+
+
+@dataclass(frozen=True)
+class Route:
+    """Model served by provider"""
+
+    provider: str
+    model: str
+
+
+def parse_routes(routes: str) -> list[Route]:
+    """Routes from comma separated provider:model list"""
+    parsed = []
+    for route in routes.split(","):
+        provider, model = route.strip().split(":", maxsplit=1)
+        parsed.append(Route(provider, model))
+    return parsed
+
+
+def _env_key(capability: str) -> str:
+    return f"LLM_ROUTES_{capability.upper().replace('-', '_')}"
+
+
+ROUTES = {
+    capability: parse_routes(os.environ.get(_env_key(capability), routes))
+    for capability, routes in DEFAULT_ROUTES.items()
+}
+
+
+def primary_model(capability: str) -> str:
+    """Model of the primary route of capability"""
+    return ROUTES[capability][0].model
+
+
+class LatencyWindow:
+    """Recent latencies of a route"""
+
+    def __init__(self, size: int):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        """Record latency of successful call"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percentile: float) -> float:
+        """Latency percentile, None until enough samples are recorded"""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            samples = sorted(self._samples)
+        idx = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[idx]
+
+
+_LATENCIES: dict[Route, LatencyWindow] = {}
+_LATENCIES_LOCK = threading.Lock()
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+
+
+def _latency(route: Route) -> LatencyWindow:
+    with _LATENCIES_LOCK:
+        return _LATENCIES.setdefault(route, LatencyWindow(LATENCY_WINDOW))
+
+
+def _hedge_after(route: Route) -> float:
+    if not HEDGE_PERCENTILE:
+        return None
+    return _latency(route).percentile(HEDGE_PERCENTILE)
+
+
+@functools.cache
+def _client(provider: str):
+    if provider == "groq":
+        return groq.Groq(
+            api_key=os.environ.get("GROQ_API_KEY"),
+            http_client=http_client.sdk_client,
+            max_retries=MAX_RETRIES,
+        )
+    return openai.OpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        base_url=os.environ.get("OLLAMA_URL") if provider == "ollama" else None,
+        http_client=http_client.sdk_client,
+        max_retries=MAX_RETRIES,
+    )
+
+
+@functools.cache
+def _async_client(provider: str):
+    if provider == "groq":
+        return groq.AsyncGroq(
+            api_key=os.environ.get("GROQ_API_KEY"),
+            http_client=http_client.async_client,
+            max_retries=MAX_RETRIES,
+        )
+    return openai.AsyncOpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        base_url=os.environ.get("OLLAMA_URL") if provider == "ollama" else None,
+        http_client=http_client.async_client,
+        max_retries=MAX_RETRIES,
+    )
+
+
+def _timed(capability: str, route: Route, operation: Callable[[Route], Any]) -> Any:
+    llm_cache.HIT.set(False)
+    start = time.perf_counter()
+    try:
+        result = operation(route)
+    except Exception:
+        metrics.record_route(capability, route.provider, "error")
+        raise
+    # Cache hits would drag hedge threshold down to disk read time
+    if not llm_cache.HIT.get():
+        _latency(route).add(time.perf_counter() - start)
+    metrics.record_route(capability, route.provider, "ok")
+    return result
+
+
+async def _timed_async(
+    capability: str, route: Route, operation: Callable[[Route], Awaitable[Any]]
+) -> Any:
+    llm_cache.HIT.set(False)
+    start = time.perf_counter()
+    try:
+        result = await operation(route)
+    except Exception:
+        metrics.record_route(capability, route.provider, "error")
+        raise
+    # Cache hits would drag hedge threshold down to disk read time
+    if not llm_cache.HIT.get():
+        _latency(route).add(time.perf_counter() - start)
+    metrics.record_route(capability, route.provider, "ok")
+    return result
+
+
+def _hedged(capability: str, routes: list[Route], operation, hedge: bool) -> Any:
+    route, hedge_route = routes[0], routes[min(1, len(routes) - 1)]
+    threshold = _hedge_after(route) if hedge else None
+    if threshold is None:
+        return _timed(capability, route, operation)
+    primary = _HEDGE_POOL.submit(_timed, capability, route, operation)
+    done, _ = wait([primary], timeout=threshold)
+    if done:
+        return primary.result()
+    LOG.info("Hedging %s call after %.2fs on %s.", capability, threshold, hedge_route)
+    metrics.record_route(capability, hedge_route.provider, "hedge")
+    hedge = _HEDGE_POOL.submit(_timed, capability, hedge_route, operation)
+    error = None
+    for future in as_completed([primary, hedge]):
+        try:
+            return future.result()
+        except RETRYABLE_ERRORS as exception:
+            error = exception
+    raise error
+
+
+async def _hedged_async(
+    capability: str, routes: list[Route], operation, hedge: bool
+) -> Any:
+    route, hedge_route = routes[0], routes[min(1, len(routes) - 1)]
+    threshold = _hedge_after(route) if hedge else None
+    primary = asyncio.ensure_future(_timed_async(capability, route, operation))
+    if threshold is None:
+        return await primary
+    done, _ = await asyncio.wait({primary}, timeout=threshold)
+    if done:
+        return primary.result()
+    LOG.info("Hedging %s call after %.2fs on %s.", capability, threshold, hedge_route)
+    metrics.record_route(capability, hedge_route.provider, "hedge")
+    pending = {
+        primary,
+        asyncio.ensure_future(_timed_async(capability, hedge_route, operation)),
+    }
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return task.result()
+            error = task.exception()
+    raise error
+
+
+def call(capability: str, operation: Callable[[Route], Any], hedge: bool = True) -> Any:
+    """
+    Run operation on routes of capability, failing over on provider errors,
+    hedge=False for operations which must not be sent twice
+    """
+    routes = ROUTES[capability]
+    for idx, route in enumerate(routes):
+        try:
+            return _hedged(capability, routes[idx:], operation, hedge)
+        except RETRYABLE_ERRORS as exception:
+            if idx == len(routes) - 1:
+                raise
+            LOG.warning(
+                "%s failed on %s, failing over: %s", capability, route, exception
+            )
+    raise ValueError(f"No routes for capability: {capability}")
+
+
+async def call_async(
+    capability: str, operation: Callable[[Route], Awaitable[Any]], hedge: bool = True
+) -> Any:
+    """Async version of call"""
+    routes = ROUTES[capability]
+    for idx, route in enumerate(routes):
+        try:
+            return await _hedged_async(capability, routes[idx:], operation, hedge)
+        except RETRYABLE_ERRORS as exception:
+            if idx == len(routes) - 1:
+                raise
+            LOG.warning(
+                "%s failed on %s, failing over: %s", capability, route, exception
+            )
+    raise ValueError(f"No routes for capability: {capability}")
+
+
+def _largest_message(messages: list[dict]) -> int:
+    return max(
+        range(len(messages)),
+        key=lambda idx: len(str(messages[idx].get("content") or "")),
+    )
+
+
+def guard(messages: list[dict], model: str, stage: str, **params) -> list[dict]:
+    """
+    Measure prompt before sending, reject or truncate its largest message
+    when prompt is above model budget
+    """
+    prompt_tokens = tokens.count_messages(messages, model)
+    metrics.record_prompt(stage, model, prompt_tokens)
+    limit = tokens.budget(model, params.get("max_tokens"))
+    if limit is None or prompt_tokens <= limit:
+        return messages
+    metrics.record_overflow(stage, model, PROMPT_OVERFLOW)
+    idx = _largest_message(messages)
+    content = messages[idx].get("content")
+    error = PromptTooLargeError(
+        f"Prompt of stage {stage} has {prompt_tokens} tokens, "
+        f"budget of {model} is {limit} tokens"
+    )
+    if PROMPT_OVERFLOW != "truncate" or not isinstance(content, str):
+        raise error
+    content_tokens = tokens.count(content, model) - (prompt_tokens - limit)
+    if content_tokens <= 0:
+        raise error
+    LOG.warning("Prompt of stage %s truncated to %d tokens.", stage, limit)
+    fitted = {**messages[idx], "content": tokens.fit(content, content_tokens, model)}
+    return messages[:idx] + [fitted] + messages[idx + 1 :]
+
+
+def chat(
+    messages: list[dict],
+    capability: str = "chat",
+    cache: bool = True,
+    stage: str = None,
+    **params,
+) -> ChatCompletion:
+    """Chat completion from the first available route of capability"""
+    return call(
+        capability,
+        lambda route: create_completion(
+            _client(route.provider),
+            cache=cache,
+            model=route.model,
+            messages=guard(messages, route.model, stage or capability, **params),
+            **params,
+        ),
+    )
+
+
+async def chat_async(
+    messages: list[dict],
+    capability: str = "chat",
+    cache: bool = True,
+    stage: str = None,
+    **params,
+) -> ChatCompletion:
+    """Async chat completion from the first available route of capability"""
+    return await call_async(
+        capability,
+        lambda route: create_completion_async(
+            _async_client(route.provider),
+            cache=cache,
+            model=route.model,
+            messages=guard(messages, route.model, stage or capability, **params),
+            **params,
+        ),
+    )
+
+
+def vision(messages: list[dict], stage: str = None, **params) -> ChatCompletion:
+    """Chat completion with images, results are cached by media cache"""
+    return chat(messages, capability="vision", cache=False, stage=stage, **params)
+
+
+def transcribe(audio_filename: str, max_retries: int = None, **params) -> str:
+    """
+    Transcription of audio file, file is reopened for every attempt,
+    max_retries=0 is meant for callers retrying under their own rate limits
+    so such calls are not hedged
+    """
+
+    def _transcribe(route: Route) -> str:
+        client = _client(route.provider)
+        if max_retries is not None:
+            client = client.with_options(max_retries=max_retries)
+        with open(audio_filename, "rb") as file:
+            return client.audio.transcriptions.create(
+                file=(os.path.basename(audio_filename), file),
+                model=route.model,
+                **params,
+            )
+
+    return call("transcribe", _transcribe, hedge=max_retries != 0)
+
+
+def embed(texts: list[str]) -> list[list[float]]:
+    """Embeddings of texts in input order"""
+    response = call(
+        "embed",
+        lambda route: _client(route.provider).embeddings.create(
+            input=texts, model=route.model
+        ),
+    )
+    return [item.embedding for item in response.data]
+
+
+async def embed_async(texts: list[str]) -> list[list[float]]:
+    """Async embeddings of texts in input order"""
+    response = await call_async(
+        "embed",
+        lambda route: _async_client(route.provider).embeddings.create(
+            input=texts, model=route.model
+        ),
+    )
+    return [item.embedding for item in response.data]
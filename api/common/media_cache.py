@@ -0,0 +1,29 @@
+"""Content addressed cache of audio transcriptions and image descriptions"""
+
+from typing import Callable
+from common.artifact_store import get_or_create, digest
+
+TRANSCRIPTION_STAGE = "media-transcription"
+DESCRIPTION_STAGE = "media-description"
+
+
+def transcription(
+    media_digest: str, model: str, language: str, create: Callable[[], str]
+) -> str:
+    """Transcription of audio identified by SHA-256 of its bytes"""
+    return get_or_create(
+        TRANSCRIPTION_STAGE,
+        {"media": media_digest, "model": model, "language": language},
+        create,
+    )
+
+
+def description(
+    media_digest: str, model: str, prompt: str, create: Callable[[], str]
+) -> str:
+    """Description of image identified by SHA-256 of its bytes"""
+    return get_or_create(
+        DESCRIPTION_STAGE,
+        {"media": media_digest, "model": model, "prompt": digest(prompt)},
+        create,
+    )
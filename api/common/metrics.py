@@ -0,0 +1,120 @@
+"""Prometheus metrics for api requests and outbound dependencies"""
+
+import os
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from prometheus_client import Counter, Gauge, Histogram
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Latency of api requests",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge("api_requests_in_flight", "Api requests in progress")
+DEPENDENCY_LATENCY = Histogram(
+    "dependency_request_duration_seconds",
+    "Latency of calls to outbound dependencies",
+    ["dependency", "operation", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160),
+)
+DEPENDENCY_IN_FLIGHT = Gauge(
+    "dependency_requests_in_flight",
+    "Calls to outbound dependencies in progress",
+    ["dependency"],
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens used by model", ["model", "kind"])
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by result", ["cache", "result"]
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Prompt tokens counted locally before sending",
+    ["stage", "model"],
+    buckets=(256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072),
+)
+LLM_PROMPT_OVERFLOWS = Counter(
+    "llm_prompt_overflows_total",
+    "Prompts above model budget by action taken",
+    ["stage", "model", "action"],
+)
+LLM_ROUTE_REQUESTS = Counter(
+    "llm_route_requests_total",
+    "LLM gateway calls by capability, provider and outcome",
+    ["capability", "provider", "outcome"],
+)
+
+LLM_PROVIDERS = ("openai", "groq", "ollama")
+
+
+def _host(env_key: str) -> str:
+    return urlparse(os.environ.get(env_key, "")).hostname
+
+
+DEPENDENCIES = {
+    "api.openai.com": "openai",
+    "api.groq.com": "groq",
+    _host("OLLAMA_URL"): "ollama",
+    _host("QDRANT_URL"): "qdrant",
+    _host("VERIFY_URL"): "aidevs",
+}
+
+
+OTHER_DEPENDENCY = "other"
+
+
+def dependency_name(host: str) -> str:
+    """Name of dependency served by host, unknown hosts share one label"""
+    return DEPENDENCIES.get(host, OTHER_DEPENDENCY)
+
+
+def operation_name(dependency: str, method: str, path: str) -> str:
+    """Endpoint name for LLM providers, http method for other hosts"""
+    if dependency in LLM_PROVIDERS:
+        return path.rstrip("/").rsplit("/", maxsplit=1)[-1]
+    return method
+
+
+@contextmanager
+def track(dependency: str, operation: str):
+    """Measure latency and in-flight calls of outbound dependency"""
+    DEPENDENCY_IN_FLIGHT.labels(dependency).inc()
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        DEPENDENCY_LATENCY.labels(dependency, operation, outcome).observe(
+            time.perf_counter() - start
+        )
+        DEPENDENCY_IN_FLIGHT.labels(dependency).dec()
+
+
+def record_usage(completion) -> None:
+    """Count tokens reported by chat completion"""
+    usage = getattr(completion, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.labels(completion.model, "prompt").inc(usage.prompt_tokens or 0)
+    LLM_TOKENS.labels(completion.model, "completion").inc(usage.completion_tokens or 0)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count cache hit or miss"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_route(capability: str, provider: str, outcome: str) -> None:
+    """Count LLM gateway call outcome"""
+    LLM_ROUTE_REQUESTS.labels(capability, provider, outcome).inc()
+
+
+def record_prompt(stage: str, model: str, prompt_tokens: int) -> None:
+    """Observe prompt size of stage"""
+    LLM_PROMPT_TOKENS.labels(stage, model).observe(prompt_tokens)
+
+
+def record_overflow(stage: str, model: str, action: str) -> None:
+    """Count prompt above model budget"""
+    LLM_PROMPT_OVERFLOWS.labels(stage, model, action).inc()
@@ -0,0 +1,61 @@
+"""Local text recognition with Tesseract, used before remote vision models"""
+
+import os
+import csv
+import shutil
+import subprocess
+from conf.logger import LOG
+
+ENABLED = os.environ.get("OCR_ENABLED", "1") != "0"
+LANGUAGE = os.environ.get("OCR_LANGUAGE", "pol")
+MIN_CONFIDENCE = float(os.environ.get("OCR_MIN_CONFIDENCE", "80"))
+MIN_WORDS = int(os.environ.get("OCR_MIN_WORDS", "5"))
+TIMEOUT = float(os.environ.get("OCR_TIMEOUT", "30"))
+
+TESSERACT = shutil.which("tesseract")
+
+
+def parse_tsv(output: str) -> tuple[str, float, int]:
+    """Text, mean word confidence and number of words from Tesseract TSV output"""
+    lines = {}
+    confidences = []
+    for row in csv.DictReader(
+        output.splitlines(), delimiter="\t", quoting=csv.QUOTE_NONE
+    ):
+        word = (row.get("text") or "").strip()
+        confidence = float(row["conf"])
+        if not word or confidence < 0:
+            continue
+        confidences.append(confidence)
+        line = (row["block_num"], row["par_num"], row["line_num"])
+        lines.setdefault(line, []).append(word)
+    if not confidences:
+        return "", 0, 0
+    text = "\n".join(" ".join(words) for words in lines.values())
+    return text, sum(confidences) / len(confidences), len(confidences)
+
+
+def extract_text(content: bytes) -> str:
+    """Text of an image when recognised with high confidence, None otherwise"""
+    if not ENABLED or TESSERACT is None:
+        return None
+    try:
+        output = subprocess.run(
+            [TESSERACT, "stdin", "stdout", "-l", LANGUAGE, "tsv"],
+            input=content,
+            capture_output=True,
+            timeout=TIMEOUT,
+            check=True,
+        ).stdout.decode("utf-8")
+    except (
+        OSError,
+        subprocess.CalledProcessError,
+        subprocess.TimeoutExpired,
+    ) as exception:
+        LOG.warning("Image cannot be recognised by OCR: %s", exception)
+        return None
+    text, confidence, words = parse_tsv(output)
+    LOG.debug("OCR recognised %d words, confidence %.1f.", words, confidence)
+    if words < MIN_WORDS or confidence < MIN_CONFIDENCE:
+        return None
+    return text
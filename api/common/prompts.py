@@ -156,6 +156,26 @@ task_6_placeholder
 </rules>
 """
 
+EXTRACT_TRANSCRIPTION_FACTS = """
+Extract facts from a fragment of witness statement transcriptions.
+
+<objective>
+List every detail that may help to find the institute or department where Andrzej Maj teaches: city, university, faculty, institute, department, street, buildings and his relations with other people.
+</objective>
+
+<context>
+task_6_placeholder
+</context>
+
+<rules>
+- Write each fact as a short sentence in a separate line.
+- Keep names and places exactly as they are written in the fragment.
+- Keep contradictory statements, do not resolve them.
+- If the fragment contains no relevant facts return only NONE.
+- Do not add any information not present in the fragment.
+</rules>
+"""
+
 # Solution to task 7
 _FIND_CITY = """
 <objective>
@@ -240,6 +260,40 @@ task_9_context
 </rules>
 """
 
+ANALYSE_REPORTS = """
+Given a list of reports, analyze each of them to determine if its content relates to captured humans, repaired machines, or neither.
+
+<objective>
+Assign the appropriate label to every report based on its content.
+</objective>
+
+<context>
+task_9_context
+</context>
+
+<response_format>
+{
+    "_thinking": "For every report identify key elements: capture humans or sing of their presents, or repaired machines. Conclusion: [Summary of findings and reasoning for label assignment]",
+    "labels": {
+        "report-filename": "label-value"
+    }
+}
+</response_format>
+
+<rules>
+- Every report is placed in <report filename="report-filename"> tag, use exactly the same filename as key in "labels".
+- Return label for every report from context.
+- Information about captured humans or signs of their presence qualify for "people" label.
+- Information about staff, routine activities, morale, working conditions or human interactions DO NOT qualify for "people" label.
+- Information about fixed hardware faults qualify for "hardware" label.
+- Information related to software, machine operations, system operations, hardware improvements DO NOT qualify for "hardware" label.
+- If neither is present, assign "other".
+- Use only "hardware", "people" and "other" labels if cannot decide use "other".
+- Ensure the response is in valid JSON format (not markdown).
+- Make sure _thinking value is correct string.
+</rules>
+"""
+
 CONVERT_ARTICLE = """
 Read article that contains text, figures and audio recordings. Remove HTML tags and prepare one continous text. Audio and figures replace with placeholders.
 
@@ -343,6 +397,29 @@ task_10_article
 </rules>
 """
 
+ANSWER_ARTICLE_QUESTION = """
+Given fragments of an article with images descriptions and audio files transcriptions answer the question.
+
+<objective>
+Answer the question using only the article fragments.
+</objective>
+
+<context>
+task_10_article
+</context>
+
+<rules>
+- Fragments are separated by empty lines and kept in article order.
+- Audio transcription is inserted into AUDIO_TRANSCRIPTION tag.
+- Image description is inserted into IMAGE_DESCRIPTION tag.
+- After each image there is a figure caption that adds context to image description.
+- Answer must be short.
+- Answer must be in one sentence.
+- Answer as detailed as possible.
+- Respond with the answer only.
+</rules>
+"""
+
 EXTRACT_KEYWORDS_FROM_FACT = """
 Read the provided text and generate a comprehensive list of metadata/keywords.
 
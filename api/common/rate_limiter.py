@@ -0,0 +1,45 @@
+"""Token buckets for provider rate limits"""
+
+import os
+import time
+import threading
+
+
+class TokenBucket:  # pylint: disable=too-few-public-methods
+    """Thread safe token bucket refilled continuously up to its capacity"""
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """Block until amount of tokens is taken, returns waiting time"""
+        amount = min(amount, self.capacity)
+        waited = 0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+GROQ_TRANSCRIPTION_REQUESTS = TokenBucket(
+    float(os.environ.get("GROQ_TRANSCRIPTIONS_PER_MINUTE", "20")), 60
+)
+GROQ_AUDIO_SECONDS = TokenBucket(
+    float(os.environ.get("GROQ_AUDIO_SECONDS_PER_HOUR", "7200")), 60 * 60
+)
@@ -0,0 +1,341 @@
+"""
+Cache of remote files revalidated with conditional requests: bodies are
+streamed to disk with their ETag and Last-Modified, fresh entries are served
+without a request and stale ones cost a 304 when unchanged
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import AsyncIterator, Iterable
+from common import http_client, metrics
+from conf.logger import LOG
+
+CACHE_DIR = os.environ.get(
+    "REMOTE_CACHE_DIR", os.fspath(f"{os.environ["PROJECT_DIR"]}/cache/remote")
+)
+ENABLED = os.environ.get("REMOTE_CACHE_ENABLED", "1") != "0"
+# Freshness in seconds when server sends no Cache-Control max-age, 0 = revalidate
+DEFAULT_MAX_AGE = int(os.environ.get("REMOTE_CACHE_DEFAULT_MAX_AGE", "0"))
+MAX_BYTES = int(os.environ.get("REMOTE_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+CACHE_NAME = "remote"
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+STATS = {"hits": 0, "revalidated": 0, "misses": 0}
+
+_thread_locks = defaultdict(threading.Lock)
+# Running size of cache directory, listed once and updated on writes
+_SIZE = {"total": None}
+_size_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class RemoteResponse:
+    """Response body of remote file, read into memory"""
+
+    status_code: int
+    content_type: str = ""
+    body: bytes = b""
+
+    @property
+    def content(self) -> bytes:
+        """Body bytes"""
+        return self.body
+
+    @property
+    def text(self) -> str:
+        """Body decoded with charset of Content-Type, UTF-8 by default"""
+        charset = re.search(r"charset=([\w-]+)", self.content_type or "")
+        encoding = charset.group(1) if charset else "utf-8"
+        return self.content.decode(encoding, errors="replace")
+
+
+def _entry_path(url: str) -> str:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.fspath(f"{CACHE_DIR}/{key}")
+
+
+def _read_meta(path: str) -> dict:
+    try:
+        with open(f"{path}.json", "r", encoding="UTF-8") as file:
+            meta = json.load(file)
+    except FileNotFoundError:
+        return None
+    except json.decoder.JSONDecodeError:
+        LOG.warning("Remote cache entry %s cannot be decoded, refetching.", path)
+        return None
+    if not os.path.isfile(f"{path}.body"):
+        return None
+    return meta
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _entry_size(path: str) -> int:
+    return _file_size(f"{path}.json") + _file_size(f"{path}.body")
+
+
+# Entries by last use, metadata mtime is refreshed on hits
+def _entries() -> list[tuple[int, int, str]]:
+    entries = []
+    for file in os.listdir(CACHE_DIR):
+        if not file.endswith(".json"):
+            continue
+        path = os.fspath(f"{CACHE_DIR}/{file.removesuffix('.json')}")
+        try:
+            stat = os.stat(f"{path}.json")
+        except FileNotFoundError:
+            continue
+        entries.append(
+            (stat.st_mtime_ns, stat.st_size + _file_size(f"{path}.body"), path)
+        )
+    return entries
+
+
+def _evict() -> int:
+    entries = _entries()
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= MAX_BYTES:
+            break
+        for suffix in (".json", ".body"):
+            try:
+                os.remove(f"{path}{suffix}")
+            except FileNotFoundError:
+                pass
+        total_size -= size
+        LOG.debug("Evicted remote file: %s.", path)
+    return total_size
+
+
+def _track(path: str, previous_size: int) -> None:
+    with _size_lock:
+        if _SIZE["total"] is None:
+            _SIZE["total"] = sum(size for _, size, _ in _entries())
+        else:
+            _SIZE["total"] += _entry_size(path) - previous_size
+        if _SIZE["total"] > MAX_BYTES:
+            _SIZE["total"] = _evict()
+
+
+def _write_atomic(path: str, chunks: Iterable[bytes]) -> None:
+    descriptor, temp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=".tmp-")
+    try:
+        with open(descriptor, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+        os.replace(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+# Seconds the response stays fresh, None when it must not be stored
+def _max_age(headers) -> int:
+    cache_control = (headers.get("cache-control") or "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    max_age = MAX_AGE.search(cache_control)
+    return int(max_age.group(1)) if max_age else DEFAULT_MAX_AGE
+
+
+def _is_fresh(meta: dict) -> bool:
+    return time.time() - meta["fetched_at"] < meta["max_age"]
+
+
+def _validators(meta: dict) -> dict:
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def _save_meta(path: str, url: str, headers, max_age: int, previous: dict) -> dict:
+    previous = previous or {}
+    meta = {
+        "url": url,
+        "etag": headers.get("etag") or previous.get("etag"),
+        "last_modified": headers.get("last-modified") or previous.get("last_modified"),
+        "content_type": headers.get("content-type") or previous.get("content_type"),
+        "fetched_at": time.time(),
+        "max_age": max_age,
+    }
+    _write_atomic(f"{path}.json", [json.dumps(meta).encode("utf-8")])
+    return meta
+
+
+# Cached body read before the entry can be evicted, None when it already was
+def _cached(path: str, meta: dict) -> RemoteResponse:
+    try:
+        with open(f"{path}.body", "rb") as file:
+            body = file.read()
+    except FileNotFoundError:
+        LOG.debug("Remote cache entry %s evicted while read.", path)
+        return None
+    return RemoteResponse(HTTPStatus.OK, meta["content_type"], body=body)
+
+
+def _hit(url: str, path: str, meta: dict) -> RemoteResponse:
+    response = _cached(path, meta)
+    if response is None:
+        return None
+    STATS["hits"] += 1
+    try:
+        os.utime(f"{path}.json")
+    except FileNotFoundError:
+        pass
+    metrics.record_cache(CACHE_NAME, True)
+    LOG.debug("Remote file %s is fresh, served from cache.", url)
+    return response
+
+
+def _not_modified(url: str, path: str, headers, meta: dict) -> RemoteResponse:
+    response = _cached(path, meta)
+    if response is None:
+        return None
+    STATS["revalidated"] += 1
+    metrics.record_cache(CACHE_NAME, True)
+    LOG.debug("Remote file %s not modified.", url)
+    max_age = _max_age(headers)
+    _save_meta(
+        path, url, headers, meta["max_age"] if max_age is None else max_age, meta
+    )
+    return response
+
+
+def _miss(url: str) -> None:
+    STATS["misses"] += 1
+    metrics.record_cache(CACHE_NAME, False)
+    LOG.debug("Remote file %s downloaded.", url)
+
+
+def _fetch(url: str, path: str, meta: dict, timeout: float) -> RemoteResponse:
+    headers = _validators(meta) if meta else {}
+    with http_client.session.get(
+        url, headers=headers, timeout=timeout, stream=True
+    ) as response:
+        if meta and response.status_code == HTTPStatus.NOT_MODIFIED:
+            return _not_modified(url, path, response.headers, meta)
+        max_age = _max_age(response.headers)
+        content_type = response.headers.get("content-type")
+        if response.status_code != HTTPStatus.OK or max_age is None:
+            return RemoteResponse(
+                response.status_code, content_type, body=response.content
+            )
+        _miss(url)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        previous_size = _entry_size(path)
+        _write_atomic(f"{path}.body", response.iter_content(CHUNK_SIZE))
+        meta = _save_meta(path, url, response.headers, max_age, None)
+    cached = _cached(path, meta)
+    _track(path, previous_size)
+    return cached
+
+
+def get(url: str, timeout: float = None) -> RemoteResponse:
+    """
+    GET remote file, revalidating cached copy with conditional request,
+    entry evicted while read is downloaded again
+    """
+    if not ENABLED:
+        response = http_client.get(url, timeout=timeout)
+        return RemoteResponse(
+            response.status_code,
+            response.headers.get("content-type"),
+            body=response.content,
+        )
+    path = _entry_path(url)
+    with _thread_locks[path]:
+        meta = _read_meta(path)
+        response = _hit(url, path, meta) if meta and _is_fresh(meta) else None
+        if response is None:
+            response = _fetch(url, path, meta, timeout)
+        if response is None:
+            response = _fetch(url, path, None, timeout)
+    return response
+
+
+async def _write_atomic_async(path: str, chunks: AsyncIterator[bytes]) -> None:
+    descriptor, temp_path = await asyncio.to_thread(
+        tempfile.mkstemp, dir=CACHE_DIR, prefix=".tmp-"
+    )
+    try:
+        # Unbuffered so every write runs in a worker thread, not on close
+        with open(descriptor, "wb", buffering=0) as file:
+            async for chunk in chunks:
+                await asyncio.to_thread(file.write, chunk)
+        await asyncio.to_thread(os.replace, temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+async def _fetch_async(
+    url: str, path: str, meta: dict, timeout: float
+) -> RemoteResponse:
+    headers = _validators(meta) if meta else {}
+    async with http_client.async_client.stream(
+        "GET", url, headers=headers, timeout=timeout
+    ) as response:
+        if meta and response.status_code == HTTPStatus.NOT_MODIFIED:
+            return await asyncio.to_thread(
+                _not_modified, url, path, response.headers, meta
+            )
+        max_age = _max_age(response.headers)
+        content_type = response.headers.get("content-type")
+        if response.status_code != HTTPStatus.OK or max_age is None:
+            return RemoteResponse(
+                response.status_code, content_type, body=await response.aread()
+            )
+        _miss(url)
+        await asyncio.to_thread(os.makedirs, CACHE_DIR, exist_ok=True)
+        previous_size = await asyncio.to_thread(_entry_size, path)
+        await _write_atomic_async(f"{path}.body", response.aiter_bytes(CHUNK_SIZE))
+        meta = await asyncio.to_thread(
+            _save_meta, path, url, response.headers, max_age, None
+        )
+    cached = await asyncio.to_thread(_cached, path, meta)
+    await asyncio.to_thread(_track, path, previous_size)
+    return cached
+
+
+async def get_async(url: str, timeout: float = None) -> RemoteResponse:
+    """
+    Async variant of get, disk I/O runs in worker threads, concurrent misses
+    may download the file twice but writes stay atomic
+    """
+    if not ENABLED:
+        response = await http_client.async_client.get(url, timeout=timeout)
+        return RemoteResponse(
+            response.status_code,
+            response.headers.get("content-type"),
+            body=response.content,
+        )
+    path = _entry_path(url)
+    meta = await asyncio.to_thread(_read_meta, path)
+    response = None
+    if meta and _is_fresh(meta):
+        response = await asyncio.to_thread(_hit, url, path, meta)
+    if response is None:
+        response = await _fetch_async(url, path, meta, timeout)
+    if response is None:
+        response = await _fetch_async(url, path, None, timeout)
+    return response
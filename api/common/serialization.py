@@ -0,0 +1,55 @@
+"""Fast JSON and YAML serialization with pure Python fallbacks"""
+
+import json
+from typing import Any
+import yaml
+from fastapi.responses import JSONResponse as StandardJSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+JSONResponse = StandardJSONResponse if orjson is None else ORJSONResponse
+
+HIDDEN_KEYS = ("apikey",)
+HIDDEN_VALUE = "<hidden>"
+
+
+def dumps(value: Any) -> bytes:
+    """Encode value as UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False).encode("utf8")
+
+
+def loads(content: str | bytes) -> Any:
+    """Decode JSON, raises json.decoder.JSONDecodeError on invalid input"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def yaml_load(content: str) -> Any:
+    """Parse YAML using libyaml when available"""
+    return yaml.load(content, Loader=SafeLoader)
+
+
+def yaml_dump(value: Any) -> str:
+    """Dump YAML using libyaml when available"""
+    return yaml.dump(value, Dumper=SafeDumper)
+
+
+def redact(value: Any) -> Any:
+    """Return value with secrets hidden, only top level dict is copied"""
+    if not isinstance(value, dict) or not any(key in value for key in HIDDEN_KEYS):
+        return value
+    return {
+        **value,
+        **{key: HIDDEN_VALUE for key in HIDDEN_KEYS if key in value},
+    }
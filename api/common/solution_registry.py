@@ -0,0 +1,72 @@
+"""Lazy registry of task solutions"""
+
+import os
+import importlib
+import threading
+from types import ModuleType
+from conf.logger import LOG
+
+SOLUTIONS = {
+    "captcha_solver": "solutions.captcha_solver",
+    "robot_dump": "solutions.robot_dump",
+    "file_fixer": "solutions.file_fixer",
+    "censorship": "solutions.censorship",
+    "recording_analyzer": "solutions.recording_analyzer",
+    "report_processor": "solutions.report_processor",
+    "article_reader": "solutions.article_reader",
+    "keyword_extractor": "solutions.keyword_extractor",
+    "report_indexer": "solutions.report_indexer",
+    "datacenter_finder": "solutions.datacenter_finder",
+    "searcher": "solutions.searcher",
+    "grapher": "solutions.grapher",
+}
+
+
+def _names_from_env(key: str) -> list[str]:
+    value = os.environ.get(key, "")
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+ENABLED = _names_from_env("SOLUTIONS_ENABLED") or list(SOLUTIONS.keys())
+WARMUP = _names_from_env("SOLUTIONS_WARMUP")
+
+_loaded: dict[str, ModuleType] = {}
+_lock = threading.Lock()
+
+
+class SolutionUnavailableError(RuntimeError):
+    """Solution module cannot be loaded in current environment"""
+
+
+def get_solution(name: str) -> ModuleType:
+    """Return solution module, importing it on first use"""
+    if (name not in SOLUTIONS) or (name not in ENABLED):
+        raise LookupError(f"Solution {name} is not enabled.")
+    module = _loaded.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        if name not in _loaded:
+            LOG.info("Loading solution: %s.", name)
+            try:
+                _loaded[name] = importlib.import_module(SOLUTIONS[name])
+            except KeyError as exception:
+                LOG.error("Solution %s misses env variable: %s", name, exception)
+                raise SolutionUnavailableError(
+                    f"Solution {name} misses configuration: {exception}"
+                ) from exception
+            except ImportError as exception:
+                LOG.error("Solution %s cannot be imported: %s", name, exception)
+                raise SolutionUnavailableError(
+                    f"Solution {name} cannot be imported."
+                ) from exception
+        return _loaded[name]
+
+
+def warm_up(names: list[str] = None) -> None:
+    """Load solutions ahead of first request"""
+    for name in WARMUP if names is None else names:
+        try:
+            get_solution(name)
+        except (LookupError, SolutionUnavailableError) as exception:
+            LOG.warning("Solution %s skipped during warm-up: %s", name, exception)
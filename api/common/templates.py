@@ -0,0 +1,48 @@
+"""Template filling with many placeholders replaced in a single pass"""
+
+import re
+import functools
+
+
+def _trie(names: tuple[str, ...]) -> dict:
+    trie = {}
+    for name in names:
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return trie
+
+
+def _pattern(node: dict) -> str:
+    branches = [
+        re.escape(char) + _pattern(child)
+        for char, child in sorted(node.items())
+        if char
+    ]
+    if not branches:
+        return ""
+    if len(branches) == 1 and "" not in node:
+        return branches[0]
+    group = f"(?:{'|'.join(branches)})"
+    return f"{group}?" if "" in node else group
+
+
+@functools.lru_cache(maxsize=128)
+def matcher(names: tuple[str, ...]) -> re.Pattern:
+    """
+    Regex matching any of names, built as a trie so every position of text
+    is checked once regardless of number of names, longest name wins
+    """
+    return re.compile(_pattern(_trie(names)))
+
+
+def substitute(text: str, replacements: dict[str, str]) -> str:
+    """
+    Text with every placeholder replaced in one pass, placeholders inside
+    inserted values are not replaced again
+    """
+    names = tuple(sorted(name for name in replacements if name))
+    if not names:
+        return text
+    return matcher(names).sub(lambda match: replacements[match.group(0)], text)
@@ -0,0 +1,230 @@
+"""Local token counting, prompt budgets and fitting content into them"""
+
+import os
+import re
+import json
+import functools
+import tiktoken
+from conf.logger import LOG
+
+CHARS_PER_TOKEN = 4
+DEFAULT_ENCODING = "o200k_base"
+# Tokens added by chat format for every message and for the reply
+MESSAGE_TOKENS = 3
+REPLY_TOKENS = 3
+TRUNCATION_MARKER = "\n[...]\n"
+STRATEGIES = ("head", "tail", "middle", "compact")
+# Lines with their line break and words with whitespace before them
+LINES = re.compile(r"[^\n]*\n|[^\n]+")
+WORDS = re.compile(r"\s*\S+|\s+")
+
+CONTEXT_WINDOWS = {
+    "gpt-4o-mini": 128000,
+    "gpt-4o": 128000,
+    "llama-3.2-11b-vision-preview": 8192,
+    "llama-3.1-8b-instant": 131072,
+    "llama3.2:3b": 2048,
+}
+CONTEXT_WINDOWS.update(
+    (model, int(size))
+    for model, size in (
+        entry.rsplit("=", maxsplit=1)
+        for entry in os.environ.get("LLM_CONTEXT_WINDOWS", "").split(",")
+        if entry.strip()
+    )
+)
+RESERVED_OUTPUT_TOKENS = int(os.environ.get("LLM_RESERVED_OUTPUT_TOKENS", "4096"))
+
+
+def estimate(text: str) -> int:
+    """Approximate number of tokens in text, without calling the API"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+@functools.cache
+def _encoding(model: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except (ValueError, OSError) as exception:
+        LOG.warning("Tokenizer for %s not available: %s", model, exception)
+        return None
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except (ValueError, OSError) as exception:
+        LOG.warning("Tokenizer %s not available: %s", DEFAULT_ENCODING, exception)
+        return None
+
+
+def count(text: str, model: str) -> int:
+    """Number of tokens in text for model, estimated when tokenizer is missing"""
+    encoding = _encoding(model)
+    if encoding is None:
+        return estimate(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "\n".join(
+        part.get("text", "") for part in content or [] if isinstance(part, dict)
+    )
+
+
+def count_messages(messages: list[dict], model: str) -> int:
+    """Prompt tokens of chat messages, images are not counted"""
+    return REPLY_TOKENS + sum(
+        MESSAGE_TOKENS + count(_text(message.get("content")), model)
+        for message in messages
+    )
+
+
+@functools.cache
+def _warn_unknown(model: str) -> None:
+    LOG.warning(
+        "Context window of %s unknown, prompt budget not enforced. "
+        "Set it in LLM_CONTEXT_WINDOWS.",
+        model,
+    )
+
+
+def budget(model: str, max_tokens: int = None) -> int:
+    """
+    Prompt tokens available for model when output tokens are reserved,
+    None when context window of model is unknown
+    """
+    context = CONTEXT_WINDOWS.get(model)
+    if context is None:
+        _warn_unknown(model)
+        return None
+    reserved = max_tokens or min(RESERVED_OUTPUT_TOKENS, context // 4)
+    return context - reserved
+
+
+def _cut(text: str, max_chars: int, strategy: str) -> str:
+    if strategy == "head":
+        return text[:max_chars] + TRUNCATION_MARKER
+    if strategy == "tail":
+        return TRUNCATION_MARKER + text[len(text) - max_chars :]
+    half = max_chars // 2
+    return text[:half] + TRUNCATION_MARKER + text[len(text) - half :]
+
+
+def _compact(text: str) -> str:
+    try:
+        return json.dumps(json.loads(text), ensure_ascii=False, separators=(",", ":"))
+    except json.decoder.JSONDecodeError:
+        return re.sub(r"[ \t]+", " ", re.sub(r"\n\s*\n+", "\n", text)).strip()
+
+
+def fit(text: str, max_tokens: int, model: str, strategy: str = "middle") -> str:
+    """
+    Text shrunk to max_tokens: head keeps the beginning, tail keeps the end,
+    middle drops the middle, compact removes whitespace first and then
+    drops the middle
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown truncation strategy: {strategy}")
+    tokens = count(text, model)
+    if tokens <= max_tokens:
+        return text
+    if strategy == "compact":
+        text, strategy = _compact(text), "middle"
+        tokens = count(text, model)
+        if tokens <= max_tokens:
+            return text
+    max_chars, shrunk_tokens = len(text), tokens
+    while True:
+        max_chars = max(0, min(max_chars - 1, max_chars * max_tokens // shrunk_tokens))
+        shrunk = _cut(text, max_chars, strategy)
+        shrunk_tokens = count(shrunk, model)
+        if shrunk_tokens <= max_tokens or max_chars == 0:
+            LOG.info(
+                "Content shrunk from %d to %d tokens with %s strategy.",
+                tokens,
+                shrunk_tokens,
+                strategy,
+            )
+            return shrunk
+
+
+def fill(  # pylint: disable=too-many-arguments
+    template: str,
+    placeholder: str,
+    content: str,
+    model: str,
+    reserved: int = 0,
+    strategy: str = "middle",
+) -> str:
+    """
+    Template with placeholder replaced by content fitted into model budget,
+    reserved tokens are kept for other messages
+    """
+    limit = budget(model)
+    if limit is None:
+        return template.replace(placeholder, content)
+    available = (
+        limit
+        - reserved
+        - count_messages([{"content": template.replace(placeholder, "")}], model)
+    )
+    return template.replace(placeholder, fit(content, available, model, strategy))
+
+
+def _size(text: str, model: str) -> int:
+    return estimate(text) if model is None else count(text, model)
+
+
+def _pieces(text: str, max_tokens: int, model: str) -> list[str]:
+    pieces = []
+    for line in LINES.findall(text):
+        if _size(line, model) <= max_tokens:
+            pieces.append(line)
+        else:
+            pieces.extend(WORDS.findall(line))
+    return pieces
+
+
+def split(text: str, max_tokens: int, model: str = None) -> list[str]:
+    """
+    Text split on line or word boundaries into parts of at most max_tokens,
+    counted for model or estimated when model is not given, whitespace is kept
+    so parts joined together give the original text
+    """
+    if _size(text, model) <= max_tokens:
+        return [text]
+    parts, part, part_tokens = [], [], 0
+    for piece in _pieces(text, max_tokens, model):
+        tokens = _size(piece, model)
+        if part and part_tokens + tokens > max_tokens:
+            parts.append("".join(part))
+            part, part_tokens = [], 0
+        part.append(piece)
+        part_tokens += tokens
+    if part:
+        parts.append("".join(part))
+    return parts
+
+
+def pack(
+    texts: list[str], max_tokens: int, separator: str = "\n", model: str = None
+) -> list[str] | list[list[str]]:
+    """
+    Consecutive texts joined into groups of at most max_tokens,
+    groups are returned as lists when separator is None
+    """
+    groups, group, group_tokens = [], [], 0
+    for text in texts:
+        tokens = _size(text, model)
+        if group and group_tokens + tokens > max_tokens:
+            groups.append(group)
+            group, group_tokens = [], 0
+        group.append(text)
+        group_tokens += tokens
+    if group:
+        groups.append(group)
+    if separator is None:
+        return groups
+    return [separator.join(group) for group in groups]
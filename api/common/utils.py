@@ -1,14 +1,11 @@
 """Common tools"""
 
 import json
-import copy
+from common.serialization import redact
 
 
 def pretty_json(text: str) -> str:
     """
     Returns formatted json message
     """
-    print_text = copy.deepcopy(text)
-    if "apikey" in print_text:
-        print_text["apikey"] = "<hidden>"
-    return json.dumps(print_text, sort_keys=True, indent=4)
+    return json.dumps(redact(text), sort_keys=True, indent=4)
@@ -1,23 +1,73 @@
 """Common logger"""
 
+import atexit
 import logging
+import logging.handlers
 import os
-import datetime
+import queue
 
 PROJECT_DIR = os.environ["PROJECT_DIR"]
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "DEBUG").upper()
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", "5"))
+LOG_MAX_MESSAGE_LENGTH = int(os.environ.get("LOG_MAX_MESSAGE_LENGTH", "2000"))
+
+
+def parse_levels(levels: str) -> dict[str, int]:
+    """Module levels from "module=LEVEL,..." list, unknown level names are rejected"""
+    parsed = {}
+    for entry in levels.split(","):
+        if "=" not in entry:
+            continue
+        module, level = entry.split("=", maxsplit=1)
+        level_number = logging.getLevelName(level.strip().upper())
+        if not isinstance(level_number, int):
+            raise ValueError(f"Unknown log level {level!r} for module {module!r}")
+        parsed[module.strip()] = level_number
+    return parsed
+
+
+# Per module levels, ex. "report_processor=INFO,article_reader=DEBUG",
+# may be below LOG_LEVEL, console output stays at INFO
+LOG_MODULE_LEVELS = parse_levels(os.environ.get("LOG_MODULE_LEVELS", ""))
 
 log_dir = os.fspath(f"{PROJECT_DIR}/logs")
 
 if not os.path.isdir(log_dir):
     os.mkdir(log_dir)
 
-logfile = os.fspath(f"{log_dir}/{datetime.datetime.now()}.log")
+logfile = os.fspath(f"{log_dir}/api.log")
+
+
+def _truncate(text: str) -> str:
+    if len(text) <= LOG_MAX_MESSAGE_LENGTH:
+        return text
+    return f"{text[:LOG_MAX_MESSAGE_LENGTH]}... [truncated]"
+
+
+def payload_filter(record: logging.LogRecord) -> bool:
+    """Drop records below module or global level and truncate large payloads"""
+    level = LOG_MODULE_LEVELS.get(record.module, logging.getLevelName(LOG_LEVEL))
+    if record.levelno < level:
+        return False
+    if isinstance(record.args, tuple):
+        record.args = tuple(
+            arg[: LOG_MAX_MESSAGE_LENGTH + 1] if isinstance(arg, str) else arg
+            for arg in record.args
+        )
+    record.msg = _truncate(record.getMessage())
+    record.args = None
+    return True
+
 
 LOG = logging.getLogger("main")
 
-LOG.setLevel(logging.DEBUG)
+# Logger passes the lowest configured level, payload_filter applies module levels
+LOG.setLevel(min([logging.getLevelName(LOG_LEVEL), *LOG_MODULE_LEVELS.values()]))
 
-file_handler = logging.FileHandler(logfile)
+file_handler = logging.handlers.RotatingFileHandler(
+    logfile, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="UTF-8"
+)
 console_handler = logging.StreamHandler()
 
 file_handler.setLevel(logging.DEBUG)
@@ -27,5 +77,13 @@ formatter = logging.Formatter("%(levelname)s::%(module)s::%(funcName)s  %(messag
 file_handler.setFormatter(formatter)
 console_handler.setFormatter(formatter)
 
-LOG.addHandler(file_handler)
-LOG.addHandler(console_handler)
+log_queue = queue.SimpleQueue()
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_handler.addFilter(payload_filter)
+listener = logging.handlers.QueueListener(
+    log_queue, file_handler, console_handler, respect_handler_level=True
+)
+listener.start()
+atexit.register(listener.stop)
+
+LOG.addHandler(queue_handler)
@@ -1,10 +1,48 @@
 """Main API Controller"""
 
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from common import http_client, jobs, metrics
+from common.serialization import JSONResponse
+from common.solution_registry import warm_up
 from routers.task_router import task_router
 from routers.solutions_router import solutions_router
+from routers.jobs_router import jobs_router
+from routers.metrics_router import metrics_router
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Application scoped resources"""
+    warm_up()
+    jobs.recover()
+    yield
+    jobs.shutdown()
+    await http_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=JSONResponse)
 
 app.include_router(task_router)
 app.include_router(solutions_router)
+app.include_router(jobs_router)
+app.include_router(metrics_router)
+
+
+@app.middleware("http")
+async def measure_latency(request: Request, call_next):
+    """Record latency of requests by route template"""
+    metrics.REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.REQUEST_LATENCY.labels(
+            request.method, route.path if route else "unmatched", status
+        ).observe(time.perf_counter() - start)
+        metrics.REQUESTS_IN_FLIGHT.dec()
@@ -1,5 +1,7 @@
 """Base models"""
 
+from datetime import datetime
+from enum import Enum
 from typing import Any
 from pydantic import BaseModel
 
@@ -23,3 +25,25 @@ class DBRequest(BaseModel):
 
     task_id: str
     query: str
+
+
+class JobStatus(str, Enum):
+    """Background job state"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job(BaseModel):
+    """Background job definition"""
+
+    job_id: str
+    name: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    result: Any = None
+    error: str | None = None
@@ -0,0 +1,86 @@
+"""Endpoints running long solutions in background"""
+
+import asyncio
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from common import jobs
+from common.serialization import JSONResponse
+from common.solution_registry import get_solution, SolutionUnavailableError
+from models import Job, JobStatus
+
+JOB_TARGETS = {
+    "task9": ("report_processor", "report_analysis"),
+    "task10": ("article_reader", "answer_questions"),
+    "task11": ("keyword_extractor", "extract_keywords"),
+    "task12-embeddings": ("report_indexer", "report_embeddings"),
+}
+POLL_INTERVAL = 1
+
+jobs_router = APIRouter(prefix="/jobs")
+
+
+def _get_job(job_id: str) -> Job:
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+@jobs_router.post("/{task}", status_code=202)
+def submit_job(task: str) -> JSONResponse:
+    """Run task solution in background"""
+    if task not in JOB_TARGETS:
+        raise HTTPException(status_code=404, detail=f"Task {task} cannot run as job.")
+    solution_name, function_name = JOB_TARGETS[task]
+    try:
+        solution = get_solution(solution_name)
+    except LookupError as exception:
+        raise HTTPException(status_code=404, detail=str(exception)) from exception
+    except SolutionUnavailableError as exception:
+        raise HTTPException(status_code=503, detail=str(exception)) from exception
+    job = jobs.submit(task, getattr(solution, function_name))
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job.job_id, "status": job.status.value},
+    )
+
+
+@jobs_router.get("/{job_id}")
+def job_status(job_id: str) -> JSONResponse:
+    """Get job status"""
+    job = _get_job(job_id)
+    return JSONResponse(content=job.model_dump(mode="json", exclude={"result"}))
+
+
+@jobs_router.get("/{job_id}/result")
+def job_result(job_id: str) -> JSONResponse:
+    """Get result of finished job"""
+    job = _get_job(job_id)
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != JobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}.")
+    return JSONResponse(content=job.result)
+
+
+@jobs_router.get("/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """Stream job status changes as server-sent events"""
+    _get_job(job_id)
+
+    async def events():
+        status = None
+        while True:
+            job = jobs.get_job(job_id)
+            if job is None:
+                yield "event: error\ndata: Job not found.\n\n"
+                return
+            if job.status != status:
+                status = job.status
+                state = job.model_dump_json(exclude={"result"})
+                yield f"event: status\ndata: {state}\n\n"
+            if status in jobs.FINISHED:
+                return
+            await asyncio.sleep(POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,12 @@
+"""Prometheus metrics endpoint"""
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """Expose metrics in Prometheus text format"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,34 +1,34 @@
 """Endpoints with task solutions"""
 
+from types import ModuleType
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse, PlainTextResponse
-from solutions.captcha_solver import find_hidden_data
-from solutions.robot_dump import verification_process
-from solutions.file_fixer import fix_file
-from solutions.censorship import get_censored_file
-from solutions.recording_analyzer import create_transcriptions, analyse_transcriptions
-from solutions.report_processor import report_analysis
-from solutions.article_reader import answer_questions
-from solutions.keyword_extractor import extract_keywords
-from solutions.report_indexer import report_embeddings, get_answer
-from solutions.datacenter_finder import run_query, answer_question
-from solutions.searcher import find_missing_person
-from solutions.grapher import get_shortest_path
+from fastapi.responses import PlainTextResponse
+from common.serialization import JSONResponse
+from common.solution_registry import get_solution, SolutionUnavailableError
 
 solutions_router = APIRouter()
 
 
+def _solution(name: str) -> ModuleType:
+    try:
+        return get_solution(name)
+    except LookupError as exception:
+        raise HTTPException(status_code=404, detail=str(exception)) from exception
+    except SolutionUnavailableError as exception:
+        raise HTTPException(status_code=503, detail=str(exception)) from exception
+
+
 @solutions_router.get("/task1/robot-catcha")
-def complete_task_1() -> JSONResponse:
+async def complete_task_1() -> JSONResponse:
     """Solve task 1"""
-    flag, links = find_hidden_data()
+    flag, links = await _solution("captcha_solver").find_hidden_data()
     return JSONResponse(content={"flag": flag, "links": links})
 
 
 @solutions_router.get("/task2/robot-dump")
-def complete_task_2() -> JSONResponse:
+async def complete_task_2() -> JSONResponse:
     """Solve task 2"""
-    verification_result = verification_process()
+    verification_result = await _solution("robot_dump").verification_process()
     if verification_result is None:
         raise HTTPException(status_code=400, detail="Verification task failed.")
     return JSONResponse(content=verification_result)
@@ -37,16 +37,16 @@ def complete_task_2() -> JSONResponse:
 @solutions_router.get("/task3/file-fix")
 def complete_task_3() -> JSONResponse:
     """Solve task 3"""
-    fixinig_result = fix_file()
+    fixinig_result = _solution("file_fixer").fix_file()
     if fixinig_result is None:
         raise HTTPException(status_code=400, detail="Fixing file failed.")
     return JSONResponse(content=fixinig_result)
 
 
 @solutions_router.get("/task5/censorship")
-def complete_task_5() -> JSONResponse:
+async def complete_task_5() -> JSONResponse:
     """Solve task 5"""
-    censorship_result = get_censored_file()
+    censorship_result = await _solution("censorship").get_censored_file()
     if censorship_result is None:
         raise HTTPException(status_code=400, detail="Cannot censored file.")
     return JSONResponse(content=censorship_result)
@@ -55,17 +55,19 @@ def complete_task_5() -> JSONResponse:
 @solutions_router.get("/task6/transcribe")
 def complete_task_6() -> JSONResponse:
     """Solve task 6"""
-    transcriptions = create_transcriptions()
+    transcriptions = _solution("recording_analyzer").create_transcriptions()
     if transcriptions is None or len(transcriptions) == 0:
         raise HTTPException(status_code=400, detail="Cannot create transcriptions.")
-    analysis_result = analyse_transcriptions(transcriptions)
+    analysis_result = _solution("recording_analyzer").analyse_transcriptions(
+        transcriptions
+    )
     return JSONResponse(content=analysis_result)
 
 
 @solutions_router.get("/task9/report-processor")
 def complete_task_9() -> JSONResponse:
     """Solve task 9"""
-    analysis_result = report_analysis()
+    analysis_result = _solution("report_processor").report_analysis()
     if analysis_result is None:
         raise HTTPException(status_code=400, detail="Cannot analyze recordings.")
     return JSONResponse(content=analysis_result)
@@ -75,7 +77,7 @@ def complete_task_9() -> JSONResponse:
 def complete_task_10() -> JSONResponse:
     """Solve task 10"""
     try:
-        answers = answer_questions()
+        answers = _solution("article_reader").answer_questions()
         if answers is None:
             raise HTTPException(
                 status_code=400,
@@ -90,7 +92,7 @@ def complete_task_10() -> JSONResponse:
 def complete_task_11() -> JSONResponse:
     """Solve task 11"""
     try:
-        keywords_result = extract_keywords()
+        keywords_result = _solution("keyword_extractor").extract_keywords()
         if keywords_result is None:
             raise HTTPException(
                 status_code=400,
@@ -104,14 +106,14 @@ def complete_task_11() -> JSONResponse:
 @solutions_router.get("/task12/create-embeddings")
 def create_embeddings_task_12() -> PlainTextResponse:
     """Create embeddings for task 12"""
-    report_embeddings()
+    _solution("report_indexer").report_embeddings()
     return PlainTextResponse("Embeddings created successfully.")
 
 
 @solutions_router.get("/task12/answer-question")
-def complete_task_12(question: str) -> JSONResponse:
+async def complete_task_12(question: str) -> JSONResponse:
     """Solve task 12"""
-    answer = get_answer(question)
+    answer = await _solution("report_indexer").get_answer(question)
     if answer is None:
         raise HTTPException(
             status_code=400,
@@ -121,9 +123,9 @@ def complete_task_12(question: str) -> JSONResponse:
 
 
 @solutions_router.post("/task13/run-query")
-def run_query_task_13(query: str) -> JSONResponse:
+async def run_query_task_13(query: str) -> JSONResponse:
     """Run query for task 13"""
-    response = run_query(query)
+    response = await _solution("datacenter_finder").run_query(query)
     if response is None:
         raise HTTPException(
             status_code=400,
@@ -133,9 +135,9 @@ def run_query_task_13(query: str) -> JSONResponse:
 
 
 @solutions_router.post("/task13/solution-query")
-def solve_task_13(question: str) -> JSONResponse:
+async def solve_task_13(question: str) -> JSONResponse:
     """Solve task 13"""
-    response = answer_question(question)
+    response = await _solution("datacenter_finder").answer_question(question)
     if response is None:
         raise HTTPException(
             status_code=400,
@@ -145,7 +147,7 @@ def solve_task_13(question: str) -> JSONResponse:
 
 
 @solutions_router.get("/task14/loop")
-def solve_task_14(question: str) -> JSONResponse:
+async def solve_task_14(question: str) -> JSONResponse:
     """Solve task 14"""
     if not question:
         raise HTTPException(
@@ -153,7 +155,7 @@ def solve_task_14(question: str) -> JSONResponse:
             detail="Question must be provided.",
         )
 
-    response = find_missing_person(question)
+    response = await _solution("searcher").find_missing_person(question)
     if response is None:
         raise HTTPException(
             status_code=400,
@@ -163,7 +165,7 @@ def solve_task_14(question: str) -> JSONResponse:
 
 
 @solutions_router.get("/task15/shortest_path")
-def solve_task_15(
+async def solve_task_15(
     user_from: str, user_to: str, initialize: bool = False
 ) -> JSONResponse:
     """Solve task 15"""
@@ -173,7 +175,7 @@ def solve_task_15(
             detail="Both usernames must be provided.",
         )
 
-    shortest_path = get_shortest_path(user_from, user_to)
+    shortest_path = await _solution("grapher").get_shortest_path(user_from, user_to)
     if shortest_path is None:
         raise HTTPException(
             status_code=400,
@@ -4,24 +4,40 @@ Process article and answer to questions
 """
 
 import os
-import io
+import re
 import json
-import base64
 import html
+import math
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from http import HTTPStatus
-import requests
-from groq import Groq, BadRequestError
-from openai import OpenAI
-from common.prompts import CONVERT_ARTICLE, DESCRIBE_FIGURE, ANSWER_ARTICLE_QUESTIONS
+from common import (
+    audio_processor,
+    html_extractor,
+    http_client,
+    image_processor,
+    llm_gateway,
+    media_cache,
+    remote_cache,
+    templates,
+    tokens,
+)
+from common.artifact_store import get_or_create, digest
+from common.prompts import (
+    ANSWER_ARTICLE_QUESTION,
+    ANSWER_ARTICLE_QUESTIONS,
+    CONVERT_ARTICLE,
+    DESCRIBE_FIGURE,
+)
 from conf.logger import LOG
 from task_service import send_answer
 from models import Answer
 
-FILE_DIR = os.fspath(f"{os.environ["PROJECT_DIR"]}/resources/S02E05")
 AUDIO_FILE_EXTENSION = ".mp3"
 IMAGE_FILE_EXTENSION = ".png"
-GROQ_API_KEY = os.environ["GROQ_API_KEY"]
-OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
+TRANSCRIPTION_MODEL = llm_gateway.primary_model("transcribe")
+VISION_MODEL = llm_gateway.primary_model("vision")
 AIDEVS_API_KEY = os.environ["API_KEY"]
 TASK_NAME = "arxiv"
 VERIFY_URL = os.environ["VERIFY_URL"]
@@ -29,53 +45,46 @@ PLACEHOLDER = "task_10_article"
 ARTICLE_URL = os.environ["TASK10_ARTICLE_URL"]
 QUESTIONS_URL = os.environ["TASK10_QUESTIONS_URL"]
 TIMEOUT = 30
-
-groq_client = Groq(api_key=GROQ_API_KEY)
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+WORKERS = int(os.environ.get("TASK10_WORKERS", "8"))
+TRANSCRIPTION_SLOTS = threading.BoundedSemaphore(
+    int(os.environ.get("TASK10_TRANSCRIPTION_CONCURRENCY", "2"))
+)
+VISION_SLOTS = threading.BoundedSemaphore(
+    int(os.environ.get("TASK10_VISION_CONCURRENCY", "4"))
+)
+# Articles above context tokens are answered from retrieved chunks, 0 = always
+CONTEXT_TOKENS = int(os.environ.get("TASK10_CONTEXT_TOKENS", "12000"))
+CHUNK_TOKENS = int(os.environ.get("TASK10_CHUNK_TOKENS", "300"))
+TOP_K = int(os.environ.get("TASK10_TOP_K", "4"))
+RESOURCE_BLOCK = re.compile(
+    r"<IMAGE_DESCRIPTION>:\n.*?\n</IMAGE_DESCRIPTION>"
+    r"|<AUDIO_TRANSCRIPTION>\n.*?\n<AUDIO_TRANSCRIPTION>",
+    re.DOTALL,
+)
+# Convert article with the model when local extraction finds no text
+LLM_FALLBACK = os.environ.get("TASK10_LLM_CONVERSION_FALLBACK", "0") == "1"
 
 
 def _get_article() -> str:
-    if not os.path.isdir(FILE_DIR):
-        os.mkdir(FILE_DIR)
-    filename = os.fspath(f"{FILE_DIR}/article.html")
-    if not os.path.isfile(filename):
-        LOG.debug("[TASK-10] File %s not exist.", filename)
-        article = requests.get(url=ARTICLE_URL, timeout=30)
-        LOG.debug("[TASK-10] Article content: %s", article.text)
-        with open(filename, "w", encoding="UTF-8") as file:
-            file.write(article.text)
-            LOG.debug("[TASK-10] Article saved to file.")
-        return article.text
-    with open(filename, "r", encoding="UTF-8") as file:
-        LOG.debug("[TASK-10] Read article from file.")
-        return file.read()
+    article = remote_cache.get(ARTICLE_URL, timeout=TIMEOUT).text
+    LOG.debug("[TASK-10] Article read, length: %d", len(article))
+    return article
 
 
 def _get_questions() -> str:
-    if not os.path.isdir(FILE_DIR):
-        os.mkdir(FILE_DIR)
-    filename = os.fspath(f"{FILE_DIR}/questions.txt")
-    if not os.path.isfile(filename):
-        LOG.debug("[TASK-10] File %s not exist.", filename)
-        questions = requests.get(url=QUESTIONS_URL, timeout=30)
-        LOG.debug("[TASK-10] Questions content: %s", questions.text)
-        with open(filename, "w", encoding="UTF-8") as file:
-            file.write(questions.text)
-            LOG.debug("[TASK-10] Questions saved to file.")
-        return questions.text
-    with open(filename, "r", encoding="UTF-8") as file:
-        LOG.debug("[TASK-10] Read questions from file.")
-        return file.read()
+    questions = remote_cache.get(QUESTIONS_URL, timeout=TIMEOUT).text
+    LOG.debug("[TASK-10] Questions content: %s", questions)
+    return questions
 
 
 def _convert_article(article: str) -> str:
     LOG.debug("[TASK-10] Remove tags, figures and audio from article.")
     prompt = CONVERT_ARTICLE.replace(PLACEHOLDER, article)
-    completion = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
+    completion = llm_gateway.chat(
         messages=[
             {"role": "system", "content": prompt},
         ],
+        stage="task10-convert",
     )
     message = completion.choices[0].message
     LOG.debug("[TASK-10] Response from assistant: %s", message)
@@ -91,88 +100,104 @@ def _convert_article(article: str) -> str:
         return None
 
 
-def _get_converted_article(article: str) -> str:
-    if not os.path.isdir(FILE_DIR):
-        os.mkdir(FILE_DIR)
-    filename = os.fspath(f"{FILE_DIR}/article.json")
-    if not os.path.isfile(filename):
-        LOG.debug("[TASK-10] File %s not exist.", filename)
-        article = _convert_article(article)
-        LOG.debug("[TASK-10] Converted article content: %s", article)
-        with open(filename, "w", encoding="UTF-8") as file:
-            file.write(json.dumps(article))
-            LOG.debug("[TASK-10] Converted article saved to file.")
-        return article
-    with open(filename, "r", encoding="UTF-8") as file:
-        LOG.debug("[TASK-10] Read converted article from file.")
-        return json.loads(file.read())
+def _get_converted_article(article: str) -> dict:
+    converted_article = html_extractor.extract(article)
+    LOG.debug(
+        "[TASK-10] Article extracted locally, text length: %d, placeholders: %d.",
+        len(converted_article["content"]),
+        len(converted_article["placeholders"]),
+    )
+    if converted_article["content"] or not LLM_FALLBACK:
+        return converted_article
+    LOG.warning("[TASK-10] No text extracted locally, converting with model.")
+    converted_article = get_or_create(
+        "task10-converted-article",
+        {"article": digest(article), "prompt": digest(CONVERT_ARTICLE)},
+        lambda: _convert_article(article),
+        codec="json",
+    )
+    if not converted_article:
+        return converted_article
+    # Model copies character references from raw HTML, the local parser decodes them
+    content = html.unescape(converted_article["content"])
+    LOG.debug("[TASK-10] Replaced all numeric character references.")
+    return {**converted_article, "content": content}
+
+
+def _create_transcription(audio_filename: str) -> str:
+    try:
+        with TRANSCRIPTION_SLOTS:
+            transcription = llm_gateway.transcribe(
+                audio_filename,
+                temperature=0.1,
+                language="pl",
+                response_format="text",
+            )
+        LOG.debug("[TASK-10] Transcription content: %s", transcription)
+    except llm_gateway.BAD_REQUEST_ERRORS as exception:
+        LOG.error("[TASK-10] Could not transcribe audio file: %s", exception.message)
+        return None
+    return transcription
 
 
 def _transcribe_audio(resource_url: str) -> str:
     LOG.debug("[TASK-10] Read audio file: %s", resource_url)
-    response = requests.get(resource_url, timeout=TIMEOUT)
+    response = http_client.get(resource_url, timeout=TIMEOUT)
     if response.status_code != HTTPStatus.OK:
         raise ValueError(f"Cannot audio_file from resource url: {resource_url}")
     audio_file = response.content
     LOG.debug("[TASK-10] Transcribing audio file: %s.", resource_url)
-    audio_binary = io.BytesIO(audio_file)
-    audio_binary.name = "input.mp3"
-    try:
-        transcription = groq_client.audio.transcriptions.create(
-            file=audio_binary,
-            model="whisper-large-v3-turbo",
-            temperature=0.1,
-            language="pl",
-            response_format="text",
-        )
-        LOG.debug("[TASK-10] Transcription content: %s", transcription)
-    except BadRequestError as exception:
-        LOG.error("[TASK-10] Could not transcribe audio file: %s", exception.message)
+    transcription = media_cache.transcription(
+        digest(audio_file),
+        TRANSCRIPTION_MODEL,
+        "pl",
+        lambda: audio_processor.transcribe_content_in_chunks(
+            audio_file, AUDIO_FILE_EXTENSION, _create_transcription
+        ),
+    )
+    if transcription is None:
         return None
     return f"\n<AUDIO_TRANSCRIPTION>\n{transcription}\n<AUDIO_TRANSCRIPTION>\n"
 
 
-def _encode_image(resource_url: str) -> str:
-    response = requests.get(resource_url, timeout=TIMEOUT)
+def _read_image(resource_url: str) -> bytes:
+    response = http_client.get(resource_url, timeout=TIMEOUT)
 
     if response.status_code != HTTPStatus.OK:
         raise ValueError(f"Cannot read image from resource url: {resource_url}")
-    figure = response.content
     LOG.debug("[TASK-10] Image sucessfully read from url.")
-    return base64.b64encode(figure).decode("utf-8")
+    return response.content
 
 
-def _describe_image(resource_url: str) -> str:
-    LOG.debug("[TASK-10] Read figure: %s", resource_url)
-    image = _encode_image(resource_url)
-    LOG.debug("[TASK-10] Encoded image: %s.", image)
+def _create_description(image: image_processor.PreparedImage) -> str:
+    LOG.debug("[TASK-10] Prepared image length: %d.", len(image.content))
 
     try:
-        LOG.debug("[TASK-10] Describe image: %s", resource_url)
-        completion = groq_client.chat.completions.create(
-            model="llama-3.2-11b-vision-preview",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": DESCRIBE_FIGURE},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{image}",
+        with VISION_SLOTS:
+            completion = llm_gateway.vision(
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": DESCRIBE_FIGURE},
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": image.data_url(),
+                                },
                             },
-                        },
-                    ],
-                },
-            ],
-            temperature=0.1,
-            max_tokens=1024,
-            top_p=1,
-            stream=False,
-            stop=None,
-        )
-
-    except BadRequestError as exception:
+                        ],
+                    },
+                ],
+                temperature=0.1,
+                max_tokens=1024,
+                top_p=1,
+                stream=False,
+                stop=None,
+                stage="task10-figure",
+            )
+
+    except llm_gateway.BAD_REQUEST_ERRORS as exception:
         LOG.error("[TASK-10] Could not describe image: %s", exception.message)
         return None
 
@@ -180,6 +205,22 @@ def _describe_image(resource_url: str) -> str:
     LOG.debug("[TASK-10] Response from assistant with image description: %s", message)
     content = message.content
     LOG.debug("[TASK-10] Message content with image description: %s", content)
+    return content
+
+
+def _describe_image(resource_url: str) -> str:
+    LOG.debug("[TASK-10] Read figure: %s", resource_url)
+    figure = _read_image(resource_url)
+    LOG.debug("[TASK-10] Describe image: %s", resource_url)
+    image = image_processor.prepare(figure)
+    content = media_cache.description(
+        image_processor.DUPLICATES.canonical(image, digest(figure)),
+        VISION_MODEL,
+        DESCRIBE_FIGURE,
+        lambda: _create_description(image),
+    )
+    if content is None:
+        return None
     return f"\n<IMAGE_DESCRIPTION>:\n{content}\n</IMAGE_DESCRIPTION>\n"
 
 
@@ -191,56 +232,70 @@ def _get_text_and_placeholders(converted_article: str) -> tuple[str, list[dict]]
     return text, placeholders
 
 
-def _replace_text(text: str, placeholders: list[dict]) -> str:
-    for placeholder in placeholders:
-        LOG.debug("[TASK-10] Placeholder preparation: %s.", placeholder)
-        file_path: str = placeholder["resource-url"]
-        placeholder_name = placeholder["placeholder-name"]
-        resource_url = f"{ARTICLE_URL}/../{file_path}"
-        LOG.debug("[TASK-10] Convert resource %s into text.", file_path)
-        text_representation = ""
-        if file_path.endswith(IMAGE_FILE_EXTENSION):
-            text_representation = _describe_image(resource_url)
-        elif file_path.endswith(AUDIO_FILE_EXTENSION):
-            text_representation = _transcribe_audio(resource_url)
-        LOG.debug("[TASK-10] Text representation of resource: %s", text_representation)
-        text = text.replace(placeholder_name, text_representation)
-        LOG.debug("[TASK-10] Placeholder %s replaced successfully.", placeholder_name)
-    return text
+def _resolve_resource(placeholder: dict) -> str:
+    LOG.debug("[TASK-10] Placeholder preparation: %s.", placeholder)
+    file_path: str = placeholder["resource-url"]
+    resource_url = f"{ARTICLE_URL}/../{file_path}"
+    LOG.debug("[TASK-10] Convert resource %s into text.", file_path)
+    text_representation = ""
+    if file_path.endswith(IMAGE_FILE_EXTENSION):
+        text_representation = _describe_image(resource_url)
+    elif file_path.endswith(AUDIO_FILE_EXTENSION):
+        text_representation = _transcribe_audio(resource_url)
+    LOG.debug("[TASK-10] Text representation of resource: %s", text_representation)
+    return text_representation
+
+
+# Text with resolved placeholders and names of resources which failed to resolve
+def _replace_text(text: str, placeholders: list[dict]) -> tuple[str, list[str]]:
+    representations, failed = {}, []
+    # Representations are applied in one pass over text once all are ready
+    with ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="task10") as pool:
+        futures = {
+            pool.submit(_resolve_resource, placeholder): placeholder
+            for placeholder in placeholders
+        }
+        for future in as_completed(futures):
+            placeholder_name = futures[future]["placeholder-name"]
+            representation = future.result()
+            if representation is None:
+                failed.append(placeholder_name)
+            representations[placeholder_name] = representation or ""
+            LOG.debug(
+                "[TASK-10] Resource %s resolved (%d/%d).",
+                placeholder_name,
+                len(representations),
+                len(futures),
+            )
+    text = templates.substitute(text, representations)
+    LOG.debug("[TASK-10] %d placeholders replaced successfully.", len(representations))
+    return text, failed
 
 
 def _get_replaced_text(text: str, placeholders: list[dict]) -> str:
-    if not os.path.isdir(FILE_DIR):
-        os.mkdir(FILE_DIR)
-    filename = os.fspath(f"{FILE_DIR}/complete_article.txt")
-    if not os.path.isfile(filename):
-        LOG.debug("[TASK-10] File %s not exist.", filename)
-        article = _replace_text(text, placeholders)
-        LOG.debug("[TASK-10] Replaced all placeholders.")
-        with open(filename, "w", encoding="UTF-8") as file:
-            file.write(article)
-            LOG.debug("[TASK-10] Article with placeholder replaced saved to file.")
-        return article
-    with open(filename, "r", encoding="UTF-8") as file:
-        LOG.debug("[TASK-10] Read article with all resources converted to text.")
-        return file.read()
-
-
-def _get_fixed_text(text: str) -> str:
-    if not os.path.isdir(FILE_DIR):
-        os.mkdir(FILE_DIR)
-    filename = os.fspath(f"{FILE_DIR}/fixed_article.txt")
-    if not os.path.isfile(filename):
-        LOG.debug("[TASK-10] File %s not exist.", filename)
-        article = html.unescape(text)
-        LOG.debug("[TASK-10] Replaced all numeric character references.")
-        with open(filename, "w", encoding="UTF-8") as file:
-            file.write(article)
-            LOG.debug("[TASK-10] Fixed article saved to file.")
-        return article
-    with open(filename, "r", encoding="UTF-8") as file:
-        LOG.debug("[TASK-10] Read fixed article.")
-        return file.read()
+    degraded = []
+
+    # Article with missing resources is used for this run only, None is not stored
+    def replace() -> str:
+        replaced, failed = _replace_text(text, placeholders)
+        if not failed:
+            return replaced
+        LOG.warning("[TASK-10] Resources %s not resolved, article not stored.", failed)
+        degraded.append(replaced)
+        return None
+
+    article = get_or_create(
+        "task10-complete-article",
+        {
+            "text": digest(text),
+            "placeholders": placeholders,
+            "prompt": digest(DESCRIBE_FIGURE),
+            "vision_model": VISION_MODEL,
+            "transcription_model": TRANSCRIPTION_MODEL,
+        },
+        replace,
+    )
+    return degraded[0] if article is None else article
 
 
 def _create_questions_dict(questions: str) -> dict:
@@ -260,14 +315,23 @@ def _create_questions_dict(questions: str) -> dict:
 
 
 def _build_messages(questions: dict, article: str):
-    prompt = ANSWER_ARTICLE_QUESTIONS.replace(PLACEHOLDER, article)
     questions_prompt = "\n".join(questions.keys())
+    model = llm_gateway.primary_model("chat")
+    prompt = tokens.fill(
+        ANSWER_ARTICLE_QUESTIONS,
+        PLACEHOLDER,
+        article,
+        model,
+        reserved=tokens.count_messages(
+            [{"role": "user", "content": questions_prompt}], model
+        ),
+    )
     messages = [
         {"role": "system", "content": prompt},
         {"role": "user", "content": questions_prompt},
     ]
 
-    LOG.debug("[TASK-10] Messages list: %s", messages)
+    LOG.debug("[TASK-10] Messages list of length: %d", len(messages))
     return messages
 
 
@@ -283,13 +347,104 @@ def _build_answers(response: dict, questions: dict) -> dict:
     return answers
 
 
+def _chunk_text(text: str) -> list[str]:
+    # Chunks are measured with the same tokenizer as the article
+    model = llm_gateway.primary_model("chat")
+    paragraphs = [
+        part
+        for line in text.splitlines()
+        if line.strip()
+        for part in tokens.split(line.strip(), CHUNK_TOKENS, model)
+    ]
+    return tokens.pack(paragraphs, CHUNK_TOKENS, model=model)
+
+
+def _chunk_article(article: str) -> list[str]:
+    chunks, position = [], 0
+    for match in RESOURCE_BLOCK.finditer(article):
+        chunks.extend(_chunk_text(article[position : match.start()]))
+        chunks.append(match.group(0))
+        position = match.end()
+    chunks.extend(_chunk_text(article[position:]))
+    LOG.debug("[TASK-10] Article split into %d chunks.", len(chunks))
+    return chunks
+
+
+def _normalize(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(value * value for value in vector)) or 1
+    return [value / norm for value in vector]
+
+
+def _embed_chunks(chunks: list[str]) -> list[list[float]]:
+    return [_normalize(vector) for vector in llm_gateway.embed(chunks)]
+
+
+def _index_article(article: str) -> tuple[list[str], list[list[float]]]:
+    chunks = _chunk_article(article)
+    vectors = get_or_create(
+        "task10-article-index",
+        {
+            "chunks": digest("\n".join(chunks)),
+            "model": llm_gateway.primary_model("embed"),
+        },
+        lambda: _embed_chunks(chunks),
+        codec="json",
+    )
+    return chunks, vectors
+
+
+def _retrieve(vector: list[float], chunks: list[str], vectors: list[list[float]]):
+    scores = [sum(a * b for a, b in zip(vector, chunk)) for chunk in vectors]
+    top = heapq.nlargest(TOP_K, range(len(chunks)), key=scores.__getitem__)
+    return "\n\n".join(chunks[idx] for idx in sorted(top))
+
+
+def _answer_question(question: str, context: str) -> str:
+    prompt = ANSWER_ARTICLE_QUESTION.replace(PLACEHOLDER, context)
+    completion = llm_gateway.chat(
+        messages=[
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": question},
+        ],
+        stage="task10-retrieval-answer",
+    )
+    content = completion.choices[0].message.content
+    LOG.debug("[TASK-10] Answer to question %s: %s", question, content)
+    return content.strip()
+
+
+def _answer_with_retrieval(article: str, questions: dict) -> dict:
+    chunks, vectors = _index_article(article)
+    question_vectors = _embed_chunks(list(questions))
+    with ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="task10") as pool:
+        answers = pool.map(
+            lambda question, vector: _answer_question(
+                question, _retrieve(vector, chunks, vectors)
+            ),
+            questions,
+            question_vectors,
+        )
+        answers = {
+            questions[question]: answer for question, answer in zip(questions, answers)
+        }
+    LOG.debug("[TASK-10] Answers: %s", json.dumps(answers))
+    return answers
+
+
 def _answer_questions(article: str, questions_str: str) -> dict:
     LOG.debug("[TASK-10] Build assistant to answer questions")
     questions = _create_questions_dict(questions_str)
+    article_tokens = tokens.count(article, llm_gateway.primary_model("chat"))
+    if article_tokens > CONTEXT_TOKENS:
+        LOG.info(
+            "[TASK-10] Article has %d tokens, answering from retrieved chunks.",
+            article_tokens,
+        )
+        return _answer_with_retrieval(article, questions)
     messages = _build_messages(questions, article)
-    completion = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
+    completion = llm_gateway.chat(
         messages=messages,
+        stage="task10-answer",
     )
     LOG.debug("[TASK-10] Assistant choices: %s", completion.choices)
     message = completion.choices[0].message
@@ -328,9 +483,7 @@ def answer_questions() -> dict:
     LOG.info("[TASK-10] Text and placeholders retrived.")
     text = _get_replaced_text(text, placeholders)
     LOG.info("[TASK-10] Placeholders replaced.")
-    fixed_text = _get_fixed_text(text)
-    LOG.info("[TASK-10] Special characters restored.")
-    answers = _answer_questions(fixed_text, questions)
+    answers = _answer_questions(text, questions)
     LOG.info("[TASK-10] Answers based on article: %s", json.dumps(answers))
     result = _send_answer(answers)
     LOG.info("[TASK-10] Task submission result: %s", result)
@@ -6,31 +6,27 @@ Use AI model to login to service with anti-human captcha.
 import os
 import json
 from http import HTTPStatus
-import requests
-from openai import OpenAI
-from conf.logger import LOG
+from common import http_client, llm_gateway
 from common.prompts import ROBOT_CAPTCHA, SOLVE_TASK_1
+from conf.logger import LOG
 
-OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
 WEBSITE_URL = os.environ["TASK1_WEBSITE_URL"]
 USERNAME = os.environ["TASK1_USERNAME"]
 PASSWORD = os.environ["TASK1_PASSWORD"]
 TIMEOUT = 20
 PLACEHOLDER = "#task_1_page"
 
-client = OpenAI(api_key=OPENAI_API_KEY)
 
-
-def get_answer() -> tuple[str, str]:
+async def get_answer() -> tuple[str, str]:
     """Given the page context return the answer for captcha question"""
-    captcha_page = requests.get(WEBSITE_URL, timeout=TIMEOUT)
+    captcha_page = await http_client.async_client.get(WEBSITE_URL, timeout=TIMEOUT)
     if captcha_page.status_code != HTTPStatus.OK:
         LOG.error(
             "Request to access login page failed, code = %s", captcha_page.status_code
         )
     prompt = ROBOT_CAPTCHA.replace(PLACEHOLDER, captcha_page.text)
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
+    completion = await llm_gateway.chat_async(
+        cache=False,
         messages=[
             {"role": "system", "content": prompt},
             {
@@ -38,6 +34,7 @@ def get_answer() -> tuple[str, str]:
                 "content": f"URL={WEBSITE_URL}, username={USERNAME}, password={PASSWORD}",
             },
         ],
+        stage="task1-captcha",
     )
 
     message = completion.choices[0].message
@@ -56,30 +53,33 @@ def get_answer() -> tuple[str, str]:
         return None
 
 
-def login(answer: str, username: str = USERNAME, password: str = PASSWORD) -> str:
+async def login(answer: str, username: str = USERNAME, password: str = PASSWORD) -> str:
     """Given the answer for question send POST request to login"""
     form_data = {"username": username, "password": password, "answer": answer}
     LOG.debug("Send following request to log in: %s", form_data)
-    response = requests.post(WEBSITE_URL, data=form_data, timeout=TIMEOUT)
+    response = await http_client.async_client.post(
+        WEBSITE_URL, data=form_data, timeout=TIMEOUT
+    )
     if response.status_code != HTTPStatus.OK:
         LOG.error("Login failed, status code = %s", response.status_code)
         return None
     return response.text
 
 
-def find_hidden_data() -> tuple[str, list]:
+async def find_hidden_data() -> tuple[str, list]:
     """Find flag and hidden links after login"""
-    answer = get_answer()
+    answer = await get_answer()
     if answer is None:
         return None
-    hidden_page = login(answer)
+    hidden_page = await login(answer)
     if hidden_page is None:
         return None
     prompt = SOLVE_TASK_1.replace(PLACEHOLDER, hidden_page)
 
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
+    completion = await llm_gateway.chat_async(
+        cache=False,
         messages=[{"role": "system", "content": prompt}],
+        stage="task1-links",
     )
 
     message = completion.choices[0].message
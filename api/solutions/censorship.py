@@ -5,30 +5,23 @@ Censor a given file
 
 import os
 from http import HTTPStatus
-import requests
-from openai import OpenAI
-from conf.logger import LOG
+from common import llm_gateway, remote_cache
 from common.prompts import CENSORE_FILE
+from conf.logger import LOG
 from models import Answer
-from task_service import send_answer
+from task_service import send_answer_async
 
 AIDEVS_API_KEY = os.environ["API_KEY"]
 DATA_URL = os.environ["TASK5_DATA_URL"]
 VERIFY_URL = os.environ["VERIFY_URL"]
 TIMEOUT = 60
-OLLAMA_URL = os.environ["OLLAMA_URL"]
-MODEL = "llama3.2:3b"
-# MODEL = "gpt-4o-mini"
-
-client = OpenAI(base_url=OLLAMA_URL)
-
-# OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
-# client = OpenAI(api_key=OPENAI_API_KEY)
+# Personal data stays on local model, see LLM_ROUTES_LOCAL_CHAT
+CAPABILITY = "local-chat"
 
 
-def _get_file() -> str:
+async def _get_file() -> str:
     """Download data file"""
-    file_response = requests.get(DATA_URL, timeout=TIMEOUT)
+    file_response = await remote_cache.get_async(DATA_URL, timeout=TIMEOUT)
     if file_response.status_code != HTTPStatus.OK:
         LOG.error(
             "[TASK-5] Cannot download file, status code: %d", file_response.status_code
@@ -39,14 +32,15 @@ def _get_file() -> str:
     return file_content
 
 
-def _censore_file(file_content: str) -> str:
+async def _censore_file(file_content: str) -> str:
     """Censore data in file"""
-    completion = client.chat.completions.create(
-        model=MODEL,
+    completion = await llm_gateway.chat_async(
+        capability=CAPABILITY,
         messages=[
             {"role": "system", "content": CENSORE_FILE},
             {"role": "user", "content": file_content},
         ],
+        stage="task5-censor",
     )
     message = completion.choices[0].message
     LOG.debug("[TASK-5] Response from assistant: %s", message)
@@ -55,11 +49,11 @@ def _censore_file(file_content: str) -> str:
     return content
 
 
-def get_censored_file() -> dict:
+async def get_censored_file() -> dict:
     """Returns censored file"""
-    file_data = _get_file()
-    censored_text = _censore_file(file_data)
-    code, text = send_answer(
+    file_data = await _get_file()
+    censored_text = await _censore_file(file_data)
+    code, text = await send_answer_async(
         Answer(task_id="CENZURA", answer_url=VERIFY_URL, answer_content=censored_text)
     )
     return {"code": code, "text": text}
@@ -7,28 +7,25 @@ import os
 import json
 from http import HTTPStatus
 import numexpr
-import requests
-from openai import OpenAI
-from conf.logger import LOG
+from common import llm_gateway, remote_cache
+from common.file_processor import save_file_atomic
 from common.prompts import FIX_FILE
+from common.serialization import dumps, loads
+from conf.logger import LOG
 from models import Answer
 from task_service import send_answer
 
-OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
 AIDEVS_API_KEY = os.environ["API_KEY"]
 FILE_URL = os.environ["TASK3_FILE_URL"]
 VERIFY_URL = os.environ["VERIFY_URL"]
 PROJECT_DIR = os.environ["PROJECT_DIR"]
-FILENAME = "task3.json"
 TIMEOUT = 60
 PLACEHOLDER = "#task_3_test_data"
 
-client = OpenAI(api_key=OPENAI_API_KEY)
-
 
 def _download_file() -> str:
     """Download configuration file"""
-    file_response = requests.get(FILE_URL, timeout=TIMEOUT)
+    file_response = remote_cache.get(FILE_URL, timeout=TIMEOUT)
     if file_response.status_code != HTTPStatus.OK:
         LOG.error(
             "[TASK-3] Cannot download file, status code: %d", file_response.status_code
@@ -41,26 +38,11 @@ def _download_file() -> str:
 
 def _get_file() -> dict:
     """Read configuration file"""
-    temp_dir = os.fspath(f"{PROJECT_DIR}/tmp")
-    if not os.path.isdir(temp_dir):
-        try:
-            os.mkdir(temp_dir)
-        except FileExistsError:
-            LOG.error("[TASK-3] File or directory: %s already exists", temp_dir)
-            return None
-        except FileNotFoundError:
-            LOG.error("[TASK-3] Parent directory: %s does not exists", PROJECT_DIR)
-            return None
-    file_path = os.fspath(f"{temp_dir}/{FILENAME}")
-    if not os.path.isfile(file_path):
-        file_content = _download_file()
-        with open(file_path, "w", encoding="UTF-8") as file:
-            file.write(file_content)
-    else:
-        with open(file_path, "r", encoding="UTF-8") as file:
-            file_content = file.read()
+    file_content = _download_file()
+    if file_content is None:
+        return None
     try:
-        return json.loads(file_content)
+        return loads(file_content)
     except json.decoder.JSONDecodeError:
         LOG.error("[TASK-3] Cannot decode file as json")
         return None
@@ -101,11 +83,11 @@ def _get_open_questions_with_positions(test_data: list) -> tuple[list, dict]:
 def _get_question_answers(questions: list):
     """Sent questions to an assistant"""
     prompt = FIX_FILE.replace(PLACEHOLDER, str(questions))
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
+    completion = llm_gateway.chat(
         messages=[
             {"role": "system", "content": prompt},
         ],
+        stage="task3-question",
     )
     message = completion.choices[0].message
     LOG.debug("[TASK-3] Response from assistant: %s", message)
@@ -137,11 +119,8 @@ def _build_correct_data(file_content: dict, answers: dict, positions: dict):
 
     file_content["apikey"] = AIDEVS_API_KEY
 
-    temp_dir = os.fspath(f"{PROJECT_DIR}/tmp")
-    file_path = os.fspath(f"{temp_dir}/fixed.json")
-
-    with open(file_path, "w", encoding="UTF-8") as file:
-        file.write(json.dumps(file_content))
+    file_path = os.fspath(f"{PROJECT_DIR}/tmp/fixed.json")
+    save_file_atomic(file_path, dumps(file_content))
     return file_content
 
 
@@ -5,7 +5,8 @@ Anylyse facts and raports, then extract the keywords
 
 import os
 import json
-from openai import OpenAI
+from common import llm_gateway, templates, tokens
+from common.artifact_store import get_or_create
 from common.prompts import EXTRACT_KEYWORDS_FROM_FACT, EXTRACT_KEYWORDS_FROM_REPORT
 from conf.logger import LOG
 from task_service import send_answer
@@ -13,10 +14,8 @@ from models import Answer
 
 RESOURCE_PATH = os.fspath(f"{os.environ["PROJECT_DIR"]}/resources/S03E01")
 FACTS_PATH = os.fspath(f"{RESOURCE_PATH}/facts")
-FACTS_FILE = os.fspath(f"{RESOURCE_PATH}/facts.json")
 TEXT_FILE_EXTENSION = ".txt"
 
-OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
 AIDEVS_API_KEY = os.environ["API_KEY"]
 TASK_NAME = "dokumenty"
 VERIFY_URL = os.environ["VERIFY_URL"]
@@ -25,8 +24,6 @@ REPORT_PLACEHOLDER = "task_11_report"
 SECTOR_PLACEHOLDER = "task_11_sector"
 TIMEOUT = 30
 
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-
 
 def _get_files_list(dirname: str) -> list[str]:
     files = []
@@ -53,8 +50,9 @@ def _extract_fact_keywords(fact: str) -> tuple[str, list[str]]:
     LOG.debug("[TASK-11] Process fact: %s", fact)
     prompt = EXTRACT_KEYWORDS_FROM_FACT.replace(FACTS_PLACEHOLDER, fact)
 
-    completion = openai_client.chat.completions.create(
-        model="gpt-4o-mini", messages=[{"role": "system", "content": prompt}]
+    completion = llm_gateway.chat(
+        messages=[{"role": "system", "content": prompt}],
+        stage="task11-fact",
     )
     message = completion.choices[0].message
     LOG.debug("[TASK-11] Response from assistant: %s", message)
@@ -70,42 +68,46 @@ def _extract_fact_keywords(fact: str) -> tuple[str, list[str]]:
         return None
 
 
-def _save_facts(facts: dict) -> None:
-    filename = os.fspath(f"{RESOURCE_PATH}/facts.json")
-    with open(filename, "w", encoding="UTF-8") as file:
-        file.write(json.dumps(facts))
-
-
-def _prepare_facts(fact_files: list[str]) -> dict:
-    if os.path.isfile(FACTS_FILE):
-        try:
-            with open(FACTS_FILE, "r", encoding="UTF-8") as file:
-                return json.loads(file.read())
-        except json.decoder.JSONDecodeError:
-            LOG.error("[TASK-11] Cannot get facts from file.")
-            return None
+def _create_facts(facts_content: dict[str, str]) -> dict:
     facts = {}
-    for file in fact_files:
-        fact = _read_file(FACTS_PATH, file)
+    for file, fact in facts_content.items():
         name, keywords = _extract_fact_keywords(fact)
         LOG.debug("[TASK-11] Keywords for file %s were extracted.", file)
         if name != "invalid":
             facts[name] = keywords
     LOG.debug("[TASK-11] Created facts dict: %s", json.dumps(facts))
-    _save_facts(facts)
     return facts
 
 
+def _prepare_facts(fact_files: list[str]) -> dict:
+    facts_content = {file: _read_file(FACTS_PATH, file) for file in fact_files}
+    return get_or_create(
+        "task11-facts",
+        {"facts": facts_content, "prompt": EXTRACT_KEYWORDS_FROM_FACT},
+        lambda: _create_facts(facts_content),
+        codec="json",
+    )
+
+
 def _extract_report_keywords(
     filename: str, report: str, facts: dict
 ) -> tuple[list[str], list[str]]:
     LOG.debug("[TASK-11] Process report: %s", report)
-    prompt = EXTRACT_KEYWORDS_FROM_REPORT.replace(FACTS_PLACEHOLDER, json.dumps(facts))
-    prompt = prompt.replace(REPORT_PLACEHOLDER, report)
-    prompt = prompt.replace(SECTOR_PLACEHOLDER, filename)
+    prompt = templates.substitute(
+        EXTRACT_KEYWORDS_FROM_REPORT,
+        {REPORT_PLACEHOLDER: report, SECTOR_PLACEHOLDER: filename},
+    )
+    prompt = tokens.fill(
+        prompt,
+        FACTS_PLACEHOLDER,
+        json.dumps(facts),
+        llm_gateway.primary_model("chat"),
+        strategy="compact",
+    )
 
-    completion = openai_client.chat.completions.create(
-        model="gpt-4o-mini", messages=[{"role": "system", "content": prompt}]
+    completion = llm_gateway.chat(
+        messages=[{"role": "system", "content": prompt}],
+        stage="task11-report",
     )
     message = completion.choices[0].message
     LOG.debug("[TASK-11] Response from assistant: %s", message)
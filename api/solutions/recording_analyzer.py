@@ -4,27 +4,36 @@ Analyze audio transcriptions
 """
 
 import os
-import io
 import json
-from groq import Groq, BadRequestError
-from openai import OpenAI
-from common.prompts import TRANSCRIPTION_ANALYSIS
+import time
+from concurrent.futures import ThreadPoolExecutor
+from common import audio_processor, llm_gateway, media_cache, tokens
+from common.artifact_store import file_digest
+from common.rate_limiter import GROQ_AUDIO_SECONDS, GROQ_TRANSCRIPTION_REQUESTS
+from common.prompts import EXTRACT_TRANSCRIPTION_FACTS, TRANSCRIPTION_ANALYSIS
 from conf.logger import LOG
 from task_service import send_answer
 from models import Answer
 
 FILE_DIR = os.fspath(f"{os.environ["PROJECT_DIR"]}/resources/S02E01")
 AUDIO_FILE_EXTENSION = ".m4a"
-TEXT_FILE_EXTENSION = ".txt"
-GROQ_API_KEY = os.environ["GROQ_API_KEY"]
+TRANSCRIPTION_MODEL = llm_gateway.primary_model("transcribe")
+CHAT_MODEL = llm_gateway.primary_model("chat")
 PLACEHOLDER = "task_6_placeholder"
-OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
 AIDEVS_API_KEY = os.environ["API_KEY"]
 TASK_NAME = "mp3"
 VERIFY_URL = os.environ["VERIFY_URL"]
-client = Groq(api_key=GROQ_API_KEY)
-
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+WORKERS = int(os.environ.get("TASK6_WORKERS", "4"))
+MAX_RETRIES = int(os.environ.get("TASK6_MAX_RETRIES", "5"))
+BACKOFF = float(os.environ.get("TASK6_BACKOFF", "2"))
+# Estimated bitrate of recordings, used to count audio seconds without decoding
+AUDIO_BITRATE = int(os.environ.get("TASK6_AUDIO_BITRATE", "64000"))
+MIN_BILLED_SECONDS = 10
+# Transcriptions above context budget are reduced to facts before analysis
+CONTEXT_TOKENS = int(os.environ.get("TASK6_CONTEXT_TOKENS", "6000"))
+MAP_TOKENS = int(os.environ.get("TASK6_MAP_TOKENS", "3000"))
+MAX_REDUCE_ROUNDS = int(os.environ.get("TASK6_MAX_REDUCE_ROUNDS", "3"))
+NO_FACTS = "NONE"
 
 
 def _get_file_list(dirname: str) -> list[str]:
@@ -39,52 +48,139 @@ def _get_file_list(dirname: str) -> list[str]:
     return filenames
 
 
-def _transcribe_audio(filename: str) -> str:
-    transcription_filename = os.fspath(f"{filename}{TEXT_FILE_EXTENSION}")
+def _audio_seconds(audio_filename: str) -> float:
+    bitrate = (
+        audio_processor.CHUNK_BITRATE
+        if audio_filename.endswith(audio_processor.CHUNK_EXTENSION)
+        else AUDIO_BITRATE
+    )
+    estimated = os.path.getsize(audio_filename) * 8 / bitrate
+    return max(MIN_BILLED_SECONDS, estimated)
 
-    if os.path.isfile(transcription_filename):
-        LOG.info(
-            "[TASK-6] Transcription file: %s already exists.", transcription_filename
-        )
-        with open(transcription_filename, "r", encoding="UTF-8") as file:
-            transcription = file.read()
-        return transcription
 
-    audio_filename = os.fspath(f"{filename}{AUDIO_FILE_EXTENSION}")
-    with open(audio_filename, "rb") as file:
+def _retry_delay(exception: Exception, attempt: int) -> float:
+    retry_after = exception.response.headers.get("retry-after")
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return BACKOFF * 2**attempt
+
+
+def _create_transcription(audio_filename: str) -> str:
+    audio_seconds = _audio_seconds(audio_filename)
+    for attempt in range(MAX_RETRIES + 1):
+        GROQ_TRANSCRIPTION_REQUESTS.acquire()
+        GROQ_AUDIO_SECONDS.acquire(audio_seconds)
         LOG.info("[TASK-6] Transcribing audio file: %s.", audio_filename)
-        audio_binary = io.BytesIO(file.read())
-        audio_binary.name = "test.m4a"
         try:
-            transcription = client.audio.transcriptions.create(
-                file=audio_binary,
-                model="whisper-large-v3-turbo",
+            # Retries are handled here to respect the shared rate limit buckets
+            return llm_gateway.transcribe(
+                audio_filename,
+                max_retries=0,
                 temperature=0.1,
                 language="pl",
                 response_format="text",
             )
-        except BadRequestError as exception:
+        except llm_gateway.RATE_LIMIT_ERRORS as exception:
+            delay = _retry_delay(exception, attempt)
+            LOG.warning(
+                "[TASK-6] Rate limited on %s, retry in %.1fs.",
+                audio_filename,
+                delay,
+            )
+            time.sleep(delay)
+        except llm_gateway.SERVER_ERRORS as exception:
+            delay = BACKOFF * 2**attempt
+            LOG.warning(
+                "[TASK-6] Provider error on %s, retry in %.1fs: %s",
+                audio_filename,
+                delay,
+                exception,
+            )
+            time.sleep(delay)
+        except llm_gateway.BAD_REQUEST_ERRORS as exception:
             LOG.error("[TASK-6] Could not transcribe audio file: %s", exception.message)
             return None
-    with open(transcription_filename, "w", encoding="UTF-8") as file:
-        file.write(transcription)
-    return transcription
+    LOG.error("[TASK-6] Transcription retries exhausted for: %s", audio_filename)
+    return None
+
+
+def _transcribe_audio(filename: str) -> str:
+    audio_filename = os.fspath(f"{filename}{AUDIO_FILE_EXTENSION}")
+    return media_cache.transcription(
+        file_digest(audio_filename),
+        TRANSCRIPTION_MODEL,
+        "pl",
+        lambda: audio_processor.transcribe_in_chunks(
+            audio_filename, _create_transcription
+        ),
+    )
 
 
 def _get_transcriptions(filenames: list[str]) -> list[str]:
-    transcriptions = []
-    for filename in filenames:
-        transcription = _transcribe_audio(filename)
-        if transcription is not None:
-            transcriptions.append(transcription)
+    with ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="task6") as pool:
+        results = pool.map(_transcribe_audio, filenames)
+        transcriptions = [result for result in results if result is not None]
     LOG.info("[TASK-6] %d transcriptions created", len(transcriptions))
     return transcriptions
 
 
+def _extract_facts(fragment: str) -> str:
+    prompt = EXTRACT_TRANSCRIPTION_FACTS.replace(PLACEHOLDER, fragment)
+    completion = llm_gateway.chat(
+        messages=[
+            {"role": "system", "content": prompt},
+        ],
+        stage="task6-facts",
+    )
+    content = completion.choices[0].message.content
+    if content is None:
+        LOG.warning("[TASK-6] No facts returned for fragment.")
+        return None
+    content = content.strip()
+    LOG.debug("[TASK-6] Facts extracted: %s", content)
+    return None if content == NO_FACTS else content
+
+
+def _map_facts(texts: list[str]) -> list[str]:
+    fragments = [
+        fragment
+        for text in texts
+        for fragment in tokens.split(text, MAP_TOKENS, CHAT_MODEL)
+    ]
+    with ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="task6") as pool:
+        facts = [fact for fact in pool.map(_extract_facts, fragments) if fact]
+    LOG.info("[TASK-6] %d fragments reduced to %d facts", len(fragments), len(facts))
+    return facts
+
+
+def _reduce_context(transcriptions: list[str]) -> str:
+    texts, previous_tokens = transcriptions, None
+    for reduce_round in range(MAX_REDUCE_ROUNDS):
+        facts = _map_facts(texts)
+        context = "\n".join(facts)
+        context_tokens = tokens.count(context, CHAT_MODEL)
+        LOG.info("[TASK-6] Round %d context: %d tokens", reduce_round, context_tokens)
+        if context_tokens <= CONTEXT_TOKENS or len(facts) <= 1:
+            return context
+        if previous_tokens is not None and context_tokens >= previous_tokens:
+            break
+        texts, previous_tokens = (
+            tokens.pack(facts, MAP_TOKENS, model=CHAT_MODEL),
+            context_tokens,
+        )
+    LOG.warning("[TASK-6] Context still above budget, truncating.")
+    return tokens.split(context, CONTEXT_TOKENS, CHAT_MODEL)[0]
+
+
 def _build_prompt_context(transcriptions: list[str]) -> str:
     if (transcriptions is None) or (len(transcriptions) == 0):
         return None
-    return "\n".join(transcriptions)
+    context = "\n".join(transcriptions)
+    if tokens.count(context, CHAT_MODEL) <= CONTEXT_TOKENS:
+        return context
+    LOG.info("[TASK-6] Transcriptions above %d tokens, map-reduce", CONTEXT_TOKENS)
+    return _reduce_context(transcriptions)
 
 
 def _build_prompt(transcriptions: list[str]) -> str:
@@ -94,11 +190,12 @@ def _build_prompt(transcriptions: list[str]) -> str:
 
 
 def _find_location(prompt: str) -> str:
-    completion = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
+    completion = llm_gateway.chat(
+        cache=False,
         messages=[
             {"role": "system", "content": prompt},
         ],
+        stage="task6-location",
     )
     message = completion.choices[0].message
     LOG.debug("[TASK-6] Response from assistant: %s", message)
@@ -4,14 +4,14 @@ Generate report embeddings, store in vector db, search relevant data
 """
 
 import os
-from openai import OpenAI
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from qdrant_client.models import PointStruct, VectorParams, Distance, ScoredPoint
 
+from common import llm_gateway, metrics
 from common.file_processor import read_file, get_text_files_list
 from common.prompts import GET_ANSWER_FROM_EMBEDED_DOCUMENT
 from conf.logger import LOG
-from task_service import send_answer
+from task_service import send_answer_async
 from models import Answer
 
 RESOURCE_PATH = os.fspath(f"{os.environ["PROJECT_DIR"]}/resources/S03E02")
@@ -24,30 +24,27 @@ AIDEVS_API_KEY = os.environ["API_KEY"]
 TASK_NAME = "wektory"
 VERIFY_URL = os.environ["VERIFY_URL"]
 
-OLLAMA_URL = os.environ["OLLAMA_URL"]
-EMBEDDING_MODEL = "bge-m3"
-ASSISTANT_MODEL = "gpt-4o-mini"
-OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
-
 PLACEHOLDER = "task_12_placeholder"
 
-openai_client = OpenAI(base_url=OLLAMA_URL)
-assistant_client = OpenAI(api_key=OPENAI_API_KEY)
-
 qdrant_client = QdrantClient(
     url=QDRANT_URL,
     api_key=QDRANT_API_KEY,
 )
+async_qdrant_client = AsyncQdrantClient(
+    url=QDRANT_URL,
+    api_key=QDRANT_API_KEY,
+)
 
 
 def _create_collection() -> None:
-    qdrant_client.recreate_collection(
-        COLLECTION_NAME,
-        vectors_config=VectorParams(
-            size=1024,
-            distance=Distance.COSINE,
-        ),
-    )
+    with metrics.track("qdrant", "recreate_collection"):
+        qdrant_client.recreate_collection(
+            COLLECTION_NAME,
+            vectors_config=VectorParams(
+                size=1024,
+                distance=Distance.COSINE,
+            ),
+        )
 
 
 def _embedding_documents(reports: list[str]) -> None:
@@ -56,45 +53,45 @@ def _embedding_documents(reports: list[str]) -> None:
         return
 
     LOG.debug("[TASK-12] Start embedding.")
-    result = openai_client.embeddings.create(input=reports, model=EMBEDDING_MODEL)
-    LOG.debug("[TASK-12] Embedding of size: %d created.", len(result.data))
+    embeddings = llm_gateway.embed(reports)
+    LOG.debug("[TASK-12] Embedding of size: %d created.", len(embeddings))
     points = [
         PointStruct(
             id=idx,
-            vector=data.embedding,
+            vector=embedding,
             payload={"text": text},
         )
-        for idx, (data, text) in enumerate(zip(result.data, reports))
+        for idx, (embedding, text) in enumerate(zip(embeddings, reports))
     ]
     LOG.debug("[TASK-12] %d points created.", len(points))
-    qdrant_client.upsert(COLLECTION_NAME, points)
-
-
-def _search_documents(question: str) -> list[ScoredPoint]:
-    result = qdrant_client.search(
-        collection_name=COLLECTION_NAME,
-        query_vector=openai_client.embeddings.create(
-            input=[question],
-            model=EMBEDDING_MODEL,
-        )
-        .data[0]
-        .embedding,
-        limit=1,
-    )[0]
+    with metrics.track("qdrant", "upsert"):
+        qdrant_client.upsert(COLLECTION_NAME, points)
+
+
+async def _search_documents(question: str) -> list[ScoredPoint]:
+    embeddings = await llm_gateway.embed_async([question])
+    with metrics.track("qdrant", "search"):
+        result = (
+            await async_qdrant_client.search(
+                collection_name=COLLECTION_NAME,
+                query_vector=embeddings[0],
+                limit=1,
+            )
+        )[0]
     LOG.debug("[TASK-12] Document search result: %s", result)
     return result
 
 
-def _read_answer(scored_points: ScoredPoint, question: str) -> str:
+async def _read_answer(scored_points: ScoredPoint, question: str) -> str:
     payload = scored_points.payload["text"]
     LOG.debug("[TASK-12] Found document\n%s.", payload)
     prompt = GET_ANSWER_FROM_EMBEDED_DOCUMENT.replace(PLACEHOLDER, payload)
-    completion = assistant_client.chat.completions.create(
+    completion = await llm_gateway.chat_async(
         messages=[
             {"role": "system", "content": prompt},
             {"role": "user", "content": question},
         ],
-        model=ASSISTANT_MODEL,
+        stage="task12-answer",
     )
     message = completion.choices[0].message
     LOG.debug("[TASK-12] Message from assistant %s.", message)
@@ -116,14 +113,14 @@ def report_embeddings() -> None:
     LOG.info("[TASK-12] Embeddings succesfully created.")
 
 
-def get_answer(question: str) -> dict:
+async def get_answer(question: str) -> dict:
     """Get answer to question"""
     LOG.info("[TASK-12] Get answer to question: %s.", question)
-    result = _search_documents(question)
+    result = await _search_documents(question)
     LOG.info("[TASK-12] Documents searched.")
-    answer = _read_answer(result, question)
+    answer = await _read_answer(result, question)
     LOG.info("[TASK-12] Answer: %s", answer)
-    code, text = send_answer(
+    code, text = await send_answer_async(
         Answer(task_id=TASK_NAME, answer_url=VERIFY_URL, answer_content=answer)
     )
     return {"code": code, "text": text, "answer": answer}
@@ -4,13 +4,20 @@ Report processor
 """
 
 import os
-import io
 import json
-import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from groq import Groq, BadRequestError
-from openai import OpenAI
-from common.prompts import ANALYSE_REPORT, DESCRIBE_IMAGE
+from common import (
+    audio_processor,
+    image_processor,
+    llm_gateway,
+    media_cache,
+    ocr,
+    tokens,
+)
+from common.artifact_store import digest, file_digest
+from common.prompts import ANALYSE_REPORT, ANALYSE_REPORTS, DESCRIBE_IMAGE
 from conf.logger import LOG
 from task_service import send_answer
 from models import Answer
@@ -19,15 +26,25 @@ FILE_DIR = os.fspath(f"{os.environ["PROJECT_DIR"]}/resources/S02E04")
 AUDIO_FILE_EXTENSION = ".mp3"
 TEXT_FILE_EXTENSION = ".txt"
 IMAGE_FILE_EXTENSION = ".png"
-GROQ_API_KEY = os.environ["GROQ_API_KEY"]
-OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
+TRANSCRIPTION_MODEL = llm_gateway.primary_model("transcribe")
+VISION_MODEL = llm_gateway.primary_model("vision")
 AIDEVS_API_KEY = os.environ["API_KEY"]
 TASK_NAME = "kategorie"
 VERIFY_URL = os.environ["VERIFY_URL"]
 PLACEHOLDER = "task_9_context"
-
-groq_client = Groq(api_key=GROQ_API_KEY)
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+WORKERS = int(os.environ.get("TASK9_WORKERS", "8"))
+TRANSCRIPTION_SLOTS = threading.BoundedSemaphore(
+    int(os.environ.get("TASK9_TRANSCRIPTION_CONCURRENCY", "2"))
+)
+VISION_SLOTS = threading.BoundedSemaphore(
+    int(os.environ.get("TASK9_VISION_CONCURRENCY", "2"))
+)
+CLASSIFICATION_SLOTS = threading.BoundedSemaphore(
+    int(os.environ.get("TASK9_CLASSIFICATION_CONCURRENCY", "4"))
+)
+BATCH_CLASSIFICATION = os.environ.get("TASK9_BATCH_CLASSIFICATION", "1") != "0"
+BATCH_TOKENS = int(os.environ.get("TASK9_BATCH_TOKENS", "6000"))
+LABELS = ("people", "hardware", "other")
 
 
 @dataclass(frozen=True)
@@ -55,65 +72,67 @@ def _get_file_map() -> dict:
     return filenames
 
 
-def _transcribe_audio(filename: str) -> str:
-    audio_filename = os.fspath(f"{FILE_DIR}/{filename}")
-    LOG.debug("[TASK-9] Read audio file: %s", audio_filename)
-    with open(audio_filename, "rb") as file:
-        LOG.debug("[TASK-9] Transcribing audio file: %s.", filename)
-        audio_binary = io.BytesIO(file.read())
-        audio_binary.name = "input.mp3"
-        try:
-            transcription = groq_client.audio.transcriptions.create(
-                file=audio_binary,
-                model="whisper-large-v3-turbo",
+def _create_transcription(audio_filename: str) -> str:
+    LOG.debug("[TASK-9] Transcribing audio file: %s.", audio_filename)
+    try:
+        with TRANSCRIPTION_SLOTS:
+            transcription = llm_gateway.transcribe(
+                audio_filename,
                 temperature=0.1,
                 language="pl",
                 response_format="text",
             )
-            LOG.debug("[TASK-9] Transcription content: %s", transcription)
-        except BadRequestError as exception:
-            LOG.error("[TASK-9] Could not transcribe audio file: %s", exception.message)
-            return None
+        LOG.debug("[TASK-9] Transcription content: %s", transcription)
+    except llm_gateway.BAD_REQUEST_ERRORS as exception:
+        LOG.error("[TASK-9] Could not transcribe audio file: %s", exception.message)
+        return None
     return transcription
 
 
-def _encode_image(filename: str) -> str:
-    with open(filename, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
+def _transcribe_audio(filename: str) -> str:
+    audio_filename = os.fspath(f"{FILE_DIR}/{filename}")
+    return media_cache.transcription(
+        file_digest(audio_filename),
+        TRANSCRIPTION_MODEL,
+        "pl",
+        lambda: audio_processor.transcribe_in_chunks(
+            audio_filename, _create_transcription
+        ),
+    )
 
 
-def _describe_image(filename: str) -> str:
-    image_filename = os.fspath(f"{FILE_DIR}/{filename}")
-    LOG.debug("[TASK-9] Read image: %s", image_filename)
-    image = _encode_image(image_filename)
-    LOG.debug("[TASK-9] Encoded image: %s.", image)
+def _create_description(
+    image_filename: str, image: image_processor.PreparedImage
+) -> str:
+    LOG.debug("[TASK-9] Prepared image length: %d.", len(image.content))
 
     try:
-        LOG.debug("[TASK-9] Describe image: %s", filename)
-        completion = groq_client.chat.completions.create(
-            model="llama-3.2-11b-vision-preview",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": DESCRIBE_IMAGE},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{image}",
+        LOG.debug("[TASK-9] Describe image: %s", image_filename)
+        with VISION_SLOTS:
+            completion = llm_gateway.vision(
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": DESCRIBE_IMAGE},
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": image.data_url(),
+                                },
                             },
-                        },
-                    ],
-                },
-            ],
-            temperature=0.1,
-            max_tokens=1024,
-            top_p=1,
-            stream=False,
-            stop=None,
-        )
+                        ],
+                    },
+                ],
+                temperature=0.1,
+                max_tokens=1024,
+                top_p=1,
+                stream=False,
+                stop=None,
+                stage="task9-image",
+            )
 
-    except BadRequestError as exception:
+    except llm_gateway.BAD_REQUEST_ERRORS as exception:
         LOG.error("[TASK-9] Could not describe image: %s", exception.message)
         return None
 
@@ -124,6 +143,24 @@ def _describe_image(filename: str) -> str:
     return content
 
 
+def _describe_image(filename: str) -> str:
+    image_filename = os.fspath(f"{FILE_DIR}/{filename}")
+    LOG.debug("[TASK-9] Read image: %s", image_filename)
+    with open(image_filename, "rb") as image_file:
+        content = image_file.read()
+    text = ocr.extract_text(content)
+    if text is not None:
+        LOG.info("[TASK-9] Image %s read with local OCR.", filename)
+        return text
+    image = image_processor.prepare(content)
+    return media_cache.description(
+        image_processor.DUPLICATES.canonical(image, digest(content)),
+        VISION_MODEL,
+        DESCRIBE_IMAGE,
+        lambda: _create_description(image_filename, image),
+    )
+
+
 def _read_text_file(filename: str) -> str:
     text_filename = os.fspath(f"{FILE_DIR}/{filename}")
     LOG.debug("[TASK-9] Read text file: %s", text_filename)
@@ -133,12 +170,13 @@ def _read_text_file(filename: str) -> str:
 
 def _analyse_text(text: str) -> str:
     prompt = ANALYSE_REPORT.replace(PLACEHOLDER, text)
-    completion = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": prompt},
-        ],
-    )
+    with CLASSIFICATION_SLOTS:
+        completion = llm_gateway.chat(
+            messages=[
+                {"role": "system", "content": prompt},
+            ],
+            stage="task9-analyse",
+        )
     message = completion.choices[0].message
     LOG.debug("[TASK-9] Response from assistant: %s", message)
     content = message.content
@@ -153,23 +191,102 @@ def _analyse_text(text: str) -> str:
         return None
 
 
-def _build_report_result(response_from_ai: str, filename: str) -> _ReportResult:
-    label = response_from_ai["label"]
-    LOG.debug("[TASK-9] File = %s, Label = %s", filename, label)
-    return _ReportResult(label=label, filename=filename)
-
-
-def _analyse_file(filename: str, filetype: str) -> _ReportResult:
-    LOG.debug("[TASK-9] Analyze file: %s", filename)
-    match filetype:
-        case "audio":
-            text = _transcribe_audio(filename)
-        case "text":
-            text = _read_text_file(filename)
-        case "image":
-            text = _describe_image(filename)
+def _classify_text(filename: str, text: str) -> dict[str, str]:
     analysis = _analyse_text(text)
-    return _build_report_result(analysis, filename)
+    if not isinstance(analysis, dict):
+        return {}
+    label = analysis.get("label")
+    LOG.debug("[TASK-9] File = %s, Label = %s", filename, label)
+    if label not in LABELS:
+        LOG.error("[TASK-9] Unknown label %s for file %s.", label, filename)
+        return {}
+    return {filename: label}
+
+
+def _request_labels(reports: dict[str, str]) -> dict[str, str]:
+    context = "\n".join(
+        f'<report filename="{filename}">\n{text}\n</report>'
+        for filename, text in reports.items()
+    )
+    prompt = ANALYSE_REPORTS.replace(PLACEHOLDER, context)
+    with CLASSIFICATION_SLOTS:
+        completion = llm_gateway.chat(
+            messages=[
+                {"role": "system", "content": prompt},
+            ],
+            stage="task9-labels",
+        )
+    content = completion.choices[0].message.content
+    LOG.debug("[TASK-9] Batch labels content: %s", content)
+    try:
+        labels = json.loads(content)["labels"]
+    except (json.decoder.JSONDecodeError, KeyError, TypeError):
+        LOG.error("[TASK-9] Cannot decode batch labels: %s", content)
+        return {}
+    return {
+        filename: label
+        for filename, label in labels.items()
+        if filename in reports and label in LABELS
+    }
+
+
+def _label_reports(reports: dict[str, str]) -> dict[str, str]:
+    try:
+        if len(reports) == 1:
+            return _classify_text(*next(iter(reports.items())))
+        return _request_labels(reports)
+    except Exception:  # pylint: disable=broad-exception-caught
+        LOG.exception("[TASK-9] Classification of %d reports failed.", len(reports))
+        return {}
+
+
+def _classify_batch(reports: dict[str, str]) -> dict[str, str]:
+    """Label reports in one request, split batch when labels are missing"""
+    labels = _label_reports(reports)
+    missing = [filename for filename in reports if filename not in labels]
+    if missing and len(reports) > 1:
+        LOG.warning("[TASK-9] %d reports without label, splitting.", len(missing))
+        half = (len(missing) + 1) // 2
+        for part in (missing[:half], missing[half:]):
+            if part:
+                labels.update(_classify_batch({name: reports[name] for name in part}))
+    return labels
+
+
+def _pack_batches(texts: dict[str, str]) -> list[dict[str, str]]:
+    reports = iter(texts.items())
+    return [
+        dict(next(reports) for _ in group)
+        for group in tokens.pack(list(texts.values()), BATCH_TOKENS, separator=None)
+    ]
+
+
+def _classify_texts(texts: dict[str, str]) -> dict[str, str]:
+    if BATCH_CLASSIFICATION:
+        batches = _pack_batches(texts)
+    else:
+        batches = [{filename: text} for filename, text in texts.items()]
+    LOG.info("[TASK-9] %d reports split into %d requests.", len(texts), len(batches))
+    labels = {}
+    with ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="task9") as pool:
+        for batch_labels in pool.map(_classify_batch, batches):
+            labels.update(batch_labels)
+    return labels
+
+
+def _extract_text(filename: str, filetype: str) -> str:
+    LOG.debug("[TASK-9] Extract text from file: %s", filename)
+    try:
+        match filetype:
+            case "audio":
+                return _transcribe_audio(filename)
+            case "text":
+                return _read_text_file(filename)
+            case "image":
+                return _describe_image(filename)
+    except Exception:  # pylint: disable=broad-exception-caught
+        LOG.exception("[TASK-9] Text extraction from file %s failed.", filename)
+    return None
 
 
 def _build_answer(report_results: list[_ReportResult]) -> dict:
@@ -202,13 +319,25 @@ def report_analysis() -> dict:
         len(files["text"]),
         len(files["image"]),
     )
-    reports = []
     LOG.info("[TASK-9] Start report analysis.")
-    for _, (filetype, file_list) in enumerate(files.items()):
-        for filename in file_list:
-            result = _analyse_file(filename, filetype)
-            reports.append(result)
-    LOG.info("[TASK-9] %d report analyzed.", len(reports))
+    tasks = [
+        (filename, filetype)
+        for filetype, file_list in files.items()
+        for filename in file_list
+    ]
+    with ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="task9") as pool:
+        extracted = pool.map(lambda task: _extract_text(*task), tasks)
+        texts = {
+            filename: text
+            for (filename, _), text in zip(tasks, extracted)
+            if text is not None
+        }
+    labels = _classify_texts(texts)
+    reports = [
+        _ReportResult(filename=filename, label=label)
+        for filename, label in labels.items()
+    ]
+    LOG.info("[TASK-9] %d of %d reports analyzed.", len(reports), len(tasks))
     answer = _build_answer(reports)
     LOG.info("[TASK-9] The answer: %s", json.dumps(answer))
     response_from_api = _send_answer(answer)
@@ -6,25 +6,23 @@ Use robot memory dump to learn verification proccess.
 import os
 import json
 from http import HTTPStatus
-import requests
-from openai import OpenAI
-from conf.logger import LOG
+from common import http_client, llm_gateway, remote_cache
 from common.prompts import DUMP_ANALYSIS
+from conf.logger import LOG
 
-OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
 VERIFY_URL = os.environ["TASK2_URL"]
 DUMP_URL = os.environ["TASK2_DUMP_URL"]
 TIMEOUT = 20
 PLACEHOLDER = "#task_2_page"
 
-client = OpenAI(api_key=OPENAI_API_KEY)
-
 
-def get_question() -> tuple[int, str]:
+async def get_question() -> tuple[int, str]:
     """Get verification task"""
     initial_msg = {"text": "READY", "msgID": "0"}
     request_body = json.dumps(initial_msg)
-    task_response = requests.post(VERIFY_URL, timeout=TIMEOUT, data=request_body)
+    task_response = await http_client.async_client.post(
+        VERIFY_URL, timeout=TIMEOUT, content=request_body
+    )
     LOG.info("Task description: %s", task_response.text)
     if task_response.status_code != HTTPStatus.OK:
         LOG.error(
@@ -41,15 +39,15 @@ def get_question() -> tuple[int, str]:
         return None
 
 
-def answer_question(question: str) -> str:
+async def answer_question(question: str) -> str:
     """Ask AI to answer question based on dump data"""
-    robot_dump = requests.get(DUMP_URL, timeout=TIMEOUT)
+    robot_dump = await remote_cache.get_async(DUMP_URL, timeout=TIMEOUT)
     if robot_dump.status_code != HTTPStatus.OK:
         LOG.error("Could not read robot dump")
         return None
     prompt = DUMP_ANALYSIS.replace(PLACEHOLDER, robot_dump.text)
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
+    completion = await llm_gateway.chat_async(
+        cache=False,
         messages=[
             {"role": "system", "content": prompt},
             {
@@ -57,6 +55,7 @@ def answer_question(question: str) -> str:
                 "content": f"Question={question}",
             },
         ],
+        stage="task2-answer",
     )
     message = completion.choices[0].message
     LOG.debug("Response from assistant: %s", message)
@@ -73,11 +72,13 @@ def answer_question(question: str) -> str:
         return None
 
 
-def verify(msg_id: int, answer: str) -> str:
+async def verify(msg_id: int, answer: str) -> str:
     """Solve verification task"""
     answer_with_id = {"text": answer, "msgID": msg_id}
     answer_body = json.dumps(answer_with_id)
-    verification_response = requests.post(VERIFY_URL, timeout=TIMEOUT, data=answer_body)
+    verification_response = await http_client.async_client.post(
+        VERIFY_URL, timeout=TIMEOUT, content=answer_body
+    )
     if verification_response.status_code != HTTPStatus.OK:
         LOG.error("Task resolution failed")
         return None
@@ -89,17 +90,17 @@ def verify(msg_id: int, answer: str) -> str:
         return None
 
 
-def verification_process() -> dict:
+async def verification_process() -> dict:
     """Read flag"""
-    msg_id, question = get_question()
+    msg_id, question = await get_question()
     if (msg_id is None) or (question is None):
         LOG.error("Task cannot be solved")
         return None
-    answer = answer_question(question)
+    answer = await answer_question(question)
     if answer is None:
         LOG.error("No answer returned")
         return None
-    verification_response = verify(msg_id, answer)
+    verification_response = await verify(msg_id, answer)
     if verification_response is None:
         LOG.error("Verification failed")
         return None
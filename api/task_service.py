@@ -1,9 +1,10 @@
 """AiDevs task api client service"""
 
-import json
+import logging
 import os
-import requests
 
+from common import http_client
+from common.serialization import dumps
 from common.utils import pretty_json
 from models import Task, Answer
 from conf.logger import LOG
@@ -14,11 +15,24 @@ API_KEY = os.environ["API_KEY"]
 def get_task(task: Task) -> str:
     """Get task description"""
     LOG.info("Request to read description from url: %s", task.task_url)
-    task = requests.get(task.task_url, timeout=30)
+    task = http_client.get(task.task_url, timeout=30)
     LOG.info("Task content: %s", task.text)
     return task.text
 
 
+def _build_answer_body(answer: Answer) -> bytes:
+    full_answer = {
+        "task": answer.task_id,
+        "apikey": API_KEY,
+        "answer": answer.answer_content,
+    }
+    answer_body = dumps(full_answer)
+    LOG.info("TASK_SERVICE: Sending answer to task: %s", answer.task_id)
+    if LOG.isEnabledFor(logging.DEBUG):
+        LOG.debug("TASK_SERVICE: Answer body:\n%s", pretty_json(full_answer))
+    return answer_body
+
+
 def send_answer(answer: Answer) -> tuple[int, str]:
     """Sends task answer to specified url
 
@@ -30,16 +44,17 @@ def send_answer(answer: Answer) -> tuple[int, str]:
     Returns:
         tuple[int, str]: response status code and body
     """
-    LOG.info("TASK_SERVICE: Answer body is: %s", answer.answer_content)
-    full_answer = {
-        "task": answer.task_id,
-        "apikey": API_KEY,
-        "answer": answer.answer_content,
-    }
-    answer_body = json.dumps(full_answer, ensure_ascii=False).encode("utf8")
-    LOG.info(
-        "TASK_SERVICE: Answer to task: %s\n%s", answer.task_id, pretty_json(full_answer)
+    answer_body = _build_answer_body(answer)
+    result = http_client.post(answer.answer_url, data=answer_body, timeout=30)
+    LOG.info("Answer response status: %d message: %s", result.status_code, result.text)
+    return result.status_code, result.text
+
+
+async def send_answer_async(answer: Answer) -> tuple[int, str]:
+    """Sends task answer to specified url without blocking the event loop"""
+    answer_body = _build_answer_body(answer)
+    result = await http_client.async_client.post(
+        answer.answer_url, content=answer_body, timeout=30
     )
-    result = requests.post(answer.answer_url, data=answer_body, timeout=30)
     LOG.info("Answer response status: %d message: %s", result.status_code, result.text)
     return result.status_code, result.text
@@ -0,0 +1 @@
+"""Benchmarks of solution endpoints against local stand-in services"""
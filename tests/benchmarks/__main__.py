@@ -0,0 +1,224 @@
+"""
+Run benchmarks of solution endpoints against local stand-in services.
+
+Usage: python -m tests.benchmarks [--latency 0.2] [--iterations 5] ...
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import httpx
+from tests.benchmarks import fake_services, stand_ins
+from tests.benchmarks.scenarios import (
+    SCENARIOS,
+    USERS,
+    Scenario,
+    create_fixtures,
+    environment,
+    write_resources,
+)
+
+API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "api"))
+COMPARED_METRICS = {"p50_ms": 1, "peak_memory_kib": 1, "throughput_rps": -1}
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks")
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="LLM provider latency in seconds"
+    )
+    parser.add_argument(
+        "--service-latency",
+        type=float,
+        default=0.02,
+        help="AiDevs, Qdrant and Neo4j latency in seconds",
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=5, help="requests per scenario"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="parallel requests in throughput run"
+    )
+    parser.add_argument(
+        "--scale", type=int, default=1, help="multiplier of resource sizes"
+    )
+    parser.add_argument("--only", nargs="*", default=[], help="scenario names to run")
+    parser.add_argument(
+        "--warm", action="store_true", help="keep artifact store between requests"
+    )
+    parser.add_argument("--output", help="save results as json")
+    parser.add_argument("--baseline", help="compare with previously saved results")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed relative regression"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args()
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def _install_stand_ins(service_latency: float) -> None:
+    # pylint: disable-next=import-outside-toplevel
+    from common.solution_registry import get_solution
+
+    report_indexer = get_solution("report_indexer")
+    qdrant_client, async_qdrant_client = stand_ins.create_qdrant(service_latency)
+    report_indexer.qdrant_client = qdrant_client
+    report_indexer.async_qdrant_client = async_qdrant_client
+
+    graph = stand_ins.GraphStandIn(service_latency)
+    for user1, user2 in zip(USERS, USERS[1:]):
+        graph.connect(user1, user2)
+    get_solution("grapher").AsyncGraphDatabase = graph
+
+
+class _Runner:  # pylint: disable=too-few-public-methods
+    def __init__(
+        self, client: httpx.AsyncClient, args: argparse.Namespace, cache_dir: str
+    ):
+        self.client = client
+        self.args = args
+        self.cache_dir = cache_dir
+
+    def _reset(self) -> None:
+        if not self.args.warm:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    async def _call(self, scenario: Scenario) -> tuple[float, bool]:
+        start = time.perf_counter()
+        response = await self.client.request(
+            scenario.method, scenario.path, params=scenario.params
+        )
+        return time.perf_counter() - start, response.is_success
+
+    async def _throughput(self, scenario: Scenario) -> tuple[float, int]:
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def limited_call():
+            async with semaphore:
+                return await self._call(scenario)
+
+        self._reset()
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(limited_call() for _ in range(self.args.iterations))
+        )
+        elapsed = time.perf_counter() - start
+        return self.args.iterations / elapsed, sum(not ok for _, ok in results)
+
+    async def _peak_memory(self, scenario: Scenario) -> float:
+        self._reset()
+        tracemalloc.start()
+        try:
+            await self._call(scenario)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak / 1024
+
+    async def measure(self, scenario: Scenario) -> dict:
+        """Latency of sequential calls, throughput and peak memory"""
+        latencies, errors = [], 0
+        for _ in range(self.args.iterations):
+            self._reset()
+            latency, ok = await self._call(scenario)
+            latencies.append(latency)
+            errors += not ok
+        throughput, throughput_errors = await self._throughput(scenario)
+        return {
+            "requests": 2 * self.args.iterations + 1,
+            "errors": errors + throughput_errors,
+            "p50_ms": round(_percentile(latencies, 0.5) * 1000, 1),
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 1),
+            "throughput_rps": round(throughput, 2),
+            "peak_memory_kib": round(await self._peak_memory(scenario), 1),
+        }
+
+
+async def _run(args: argparse.Namespace, cache_dir: str) -> dict:
+    # pylint: disable-next=import-outside-toplevel
+    from main import app
+
+    _install_stand_ins(args.service_latency)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://benchmark", timeout=None
+    ) as client:
+        runner = _Runner(client, args, cache_dir)
+        for scenario in SCENARIOS:
+            if args.only and scenario.name not in args.only:
+                continue
+            results[scenario.name] = await runner.measure(scenario)
+            print(_format_row(scenario.name, results[scenario.name]), flush=True)
+    return results
+
+
+def _format_row(name: str, result: dict) -> str:
+    return (
+        f"{name:<18} errors={result["errors"]:<3} p50={result["p50_ms"]:>9.1f}ms "
+        f"p95={result["p95_ms"]:>9.1f}ms rps={result["throughput_rps"]:>7.2f} "
+        f"peak={result["peak_memory_kib"]:>10.1f}KiB"
+    )
+
+
+def _regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            limit = previous[metric] * (1 + tolerance) ** direction
+            if (result[metric] - limit) * direction > 0:
+                regressions.append(
+                    f"{name}: {metric} {result[metric]} regressed from baseline "
+                    f"{previous[metric]} by more than {tolerance:.0%}"
+                )
+        if result["errors"] > previous["errors"]:
+            regressions.append(f"{name}: {result["errors"]} failed requests")
+    return regressions
+
+
+def main() -> int:
+    """Run benchmarks, returns non zero exit code on regression"""
+    args = _parse_args()
+    sys.path.insert(0, API_DIR)
+    base_url, services = fake_services.start(
+        create_fixtures(args.scale), args.latency, args.service_latency
+    )
+    project_dir = tempfile.mkdtemp(prefix="aidevs-benchmark-")
+    try:
+        write_resources(project_dir, args.scale)
+        os.environ.update(environment(base_url, project_dir))
+        os.environ["LOG_LEVEL"] = args.log_level
+        results = asyncio.run(_run(args, os.fspath(f"{project_dir}/cache")))
+    finally:
+        services.terminate()
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+    report = {"settings": vars(args), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8") as file:
+            json.dump(report, file, indent=4)
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r", encoding="UTF-8") as file:
+        regressions = _regressions(results, json.load(file), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Local stand-ins for LLM providers and AiDevs endpoints"""
+
+import json
+import time
+import random
+import hashlib
+import multiprocessing
+from dataclasses import dataclass
+from typing import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+EMBEDDING_SIZE = 1024
+TRANSCRIPTION = "Transkrypcja nagrania z przesłuchania."
+RESTRICTED = "[**RESTRICTED DATA**]"
+PROVIDER_PATHS = ("/chat/completions", "/embeddings", "/audio/transcriptions")
+
+
+@dataclass(frozen=True)
+class Fixtures:  # pylint: disable=too-many-instance-attributes
+    """Data served by fake services"""
+
+    files: dict[str, bytes]
+    chat_rules: list[tuple[str, str | Callable[[str], str]]]
+    search_index: dict[str, str]
+    db_rows: list[dict]
+    verify_reply: dict
+    robot_reply: dict
+    captcha_page: str
+    hidden_page: str
+
+
+def _embedding(text: str) -> list[float]:
+    seed = hashlib.sha256(text.encode("utf-8")).digest()
+    generator = random.Random(seed)
+    return [generator.uniform(-1, 1) for _ in range(EMBEDDING_SIZE)]
+
+
+def _prompt_text(body: dict) -> str:
+    parts = []
+    for message in body.get("messages", []):
+        content = message["content"]
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(part["text"] for part in content if part["type"] == "text")
+    return "\n".join(parts)
+
+
+def _completion(body: dict, fixtures: Fixtures) -> dict:
+    prompt = _prompt_text(body)
+    reply = next(
+        (reply for marker, reply in fixtures.chat_rules if marker in prompt), "{}"
+    )
+    if callable(reply):
+        reply = reply(prompt)
+    prompt_tokens, completion_tokens = len(prompt) // 4, len(reply) // 4
+    return {
+        "id": "chatcmpl-benchmark",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "unknown"),
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": reply},
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _embeddings(body: dict) -> dict:
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    return {
+        "object": "list",
+        "model": body.get("model", "unknown"),
+        "data": [
+            {"object": "embedding", "index": idx, "embedding": _embedding(text)}
+            for idx, text in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _create_handler(fixtures: Fixtures, latency: float, service_latency: float):
+
+    class Handler(BaseHTTPRequestHandler):
+        """Route requests by path suffix"""
+
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+            pass
+
+        def _read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def _json_body(self, raw_body: bytes) -> dict:
+            try:
+                return json.loads(raw_body)
+            except ValueError:
+                return {}
+
+        def _reply(self, content, status: int = 200, content_type: str = None):
+            if isinstance(content, (dict, list)):
+                content = json.dumps(content).encode("utf-8")
+                content_type = content_type or "application/json"
+            elif isinstance(content, str):
+                content = content.encode("utf-8")
+            self.send_response(status)
+            self.send_header(
+                "Content-Type", content_type or "text/plain; charset=utf-8"
+            )
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def _handle(self) -> None:
+            raw_body = self._read_body()
+            path = urlparse(self.path).path
+            is_provider = path.endswith(PROVIDER_PATHS)
+            time.sleep(latency if is_provider else service_latency)
+            if path.endswith("/chat/completions"):
+                self._reply(_completion(self._json_body(raw_body), fixtures))
+            elif path.endswith("/embeddings"):
+                self._reply(_embeddings(self._json_body(raw_body)))
+            elif path.endswith("/audio/transcriptions"):
+                self._reply(TRANSCRIPTION)
+            elif path == "/verify":
+                self._reply(fixtures.verify_reply)
+            elif path == "/robot-verify":
+                self._reply(fixtures.robot_reply)
+            elif path == "/apidb":
+                self._reply({"reply": fixtures.db_rows, "error": "OK"})
+            elif path in ("/people", "/places"):
+                query = self._json_body(raw_body).get("query", "")
+                message = fixtures.search_index.get(query, RESTRICTED)
+                self._reply({"code": 0, "message": message})
+            elif path == "/captcha":
+                page = fixtures.hidden_page if self.command == "POST" else None
+                self._reply(
+                    page or fixtures.captcha_page,
+                    content_type="text/html; charset=utf-8",
+                )
+            elif path.startswith("/files/"):
+                name = path.rsplit("/", maxsplit=1)[-1]
+                if name in fixtures.files:
+                    self._reply(fixtures.files[name])
+                else:
+                    self._reply({"error": "not found"}, status=404)
+            else:
+                self._reply({"error": "not found"}, status=404)
+
+        do_GET = do_POST = _handle  # pylint: disable=invalid-name
+
+    return Handler
+
+
+def _serve(fixtures: Fixtures, latency: float, service_latency: float, port_pipe):
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), _create_handler(fixtures, latency, service_latency)
+    )
+    server.daemon_threads = True
+    port_pipe.send(server.server_address[1])
+    server.serve_forever()
+
+
+def start(
+    fixtures: Fixtures, latency: float, service_latency: float
+) -> tuple[str, multiprocessing.Process]:
+    """Start fake services in child process, returns base url and process"""
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_serve,
+        args=(fixtures, latency, service_latency, sender),
+        daemon=True,
+    )
+    process.start()
+    port = receiver.recv()
+    return f"http://127.0.0.1:{port}", process
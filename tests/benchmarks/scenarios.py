@@ -0,0 +1,267 @@
+"""Benchmarked endpoints with resources and scripted provider replies"""
+
+import io
+import os
+import re
+import json
+from dataclasses import dataclass, field
+from typing import Callable
+from PIL import Image, ImageDraw
+from tests.benchmarks.fake_services import Fixtures
+
+FLAG = "{{FLG:BENCHMARK}}"
+QUESTIONS = {"01": "Gdzie zrobiono zdjęcie?", "02": "Co upiekła Zofia?"}
+USERS = ["Rafał", "Azazel", "Aleksander", "Barbara", "Samuel", "Zygfryd"]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Single endpoint call"""
+
+    name: str
+    method: str
+    path: str
+    params: dict = field(default_factory=dict)
+
+
+SCENARIOS = [
+    Scenario("task1", "GET", "/task1/robot-catcha"),
+    Scenario("task2", "GET", "/task2/robot-dump"),
+    Scenario("task3", "GET", "/task3/file-fix"),
+    Scenario("task5", "GET", "/task5/censorship"),
+    Scenario("task6", "GET", "/task6/transcribe"),
+    Scenario("task9", "GET", "/task9/report-processor"),
+    Scenario("task10", "GET", "/task10/article-reader"),
+    Scenario("task11", "GET", "/task11/extract-keywords"),
+    Scenario("task12-embeddings", "GET", "/task12/create-embeddings"),
+    Scenario(
+        "task12-answer",
+        "GET",
+        "/task12/answer-question",
+        {"question": "W raporcie z którego dnia znajduje się wzmianka o kradzieży?"},
+    ),
+    Scenario(
+        "task13-query",
+        "POST",
+        "/task13/run-query",
+        {"query": "select dc_id from datacenters"},
+    ),
+    Scenario(
+        "task13-solution",
+        "POST",
+        "/task13/solution-query",
+        {"question": "Które aktywne datacenter zarządzane są przez nieaktywnych?"},
+    ),
+    Scenario("task14", "GET", "/task14/loop", {"question": "BARBARA"}),
+    Scenario(
+        "task15",
+        "GET",
+        "/task15/shortest_path",
+        {"user_from": USERS[0], "user_to": USERS[-1]},
+    ),
+]
+
+
+def _marker(prompt: str) -> str:
+    return re.split(r"#?task_\d+_\w+", prompt.strip())[0][:120]
+
+
+def _batch_labels(prompt: str) -> str:
+    filenames = re.findall(r'<report filename="([^"]+)">', prompt)
+    return json.dumps({"labels": dict.fromkeys(filenames, "people")})
+
+
+def _chat_rules() -> list[tuple[str, str]]:
+    # pylint: disable-next=import-outside-toplevel
+    from common import prompts
+
+    replies = {
+        prompts.ROBOT_CAPTCHA: {
+            "question": "Rok lądowania na Księżycu?",
+            "answer": 1969,
+        },
+        prompts.SOLVE_TASK_1: {"flag": FLAG, "links": ["/files/firmware"]},
+        prompts.DUMP_ANALYSIS: {"text": "KRAKOW"},
+        prompts.FIX_FILE: {"questions": [{"q": "Stolica Polski?", "a": "Warszawa"}]},
+        prompts.CENSORE_FILE: "Dane osoby podejrzanej: CENZURA. Adres: CENZURA.",
+        prompts.TRANSCRIPTION_ANALYSIS: {"answer": "Łojasiewicza"},
+        prompts.EXTRACT_TRANSCRIPTION_FACTS: "Andrzej Maj wykłada w Krakowie.",
+        prompts.DESCRIBE_IMAGE: "Raport: schwytano dwie osoby w sektorze C.",
+        prompts.ANALYSE_REPORT: {"label": "people"},
+        prompts.ANALYSE_REPORTS: _batch_labels,
+        prompts.CONVERT_ARTICLE: {
+            "content": "Początek artykułu [[FIG1]] dalsza część [[REC1]] koniec &#243;.",
+            "placeholders": [
+                {"resource-url": "i/figure.png", "placeholder-name": "[[FIG1]]"},
+                {"resource-url": "i/recording.mp3", "placeholder-name": "[[REC1]]"},
+            ],
+        },
+        prompts.DESCRIBE_FIGURE: "Zdjęcie rynku w Krakowie.",
+        prompts.ANSWER_ARTICLE_QUESTIONS: {
+            "response": [
+                {"question": question, "answer": f"Odpowiedź {question_id}"}
+                for question_id, question in QUESTIONS.items()
+            ]
+        },
+        prompts.ANSWER_ARTICLE_QUESTION: "Odpowiedź z fragmentów artykułu.",
+        prompts.EXTRACT_KEYWORDS_FROM_FACT: {
+            "topic-name": "Barbara Zawadzka",
+            "keywords": ["programistka", "ruch oporu"],
+        },
+        prompts.EXTRACT_KEYWORDS_FROM_REPORT: {
+            "keywords": ["sektor", "patrol"],
+            "references": ["Barbara Zawadzka"],
+        },
+        prompts.GET_ANSWER_FROM_EMBEDED_DOCUMENT: "2024-02-21",
+        prompts.GET_DATACENTERS: (
+            "- summary: Znaleziono tabelę datacenters.\n"
+            "  queries:\n"
+            "    - query: select dc_id from datacenters\n"
+            "  isAnswer: true\n"
+        ),
+        prompts.MISSING_PERSON_DATA_EXTRACTOR: "people:\n  - RAFAL\ncities:\n  - KRAKOW\n",
+        prompts.FIND_PERSON_OR_CITY: "cities:\n  - ELBLAG\n",
+    }
+    return [
+        (
+            _marker(prompt),
+            reply if isinstance(reply, (str, Callable)) else json.dumps(reply),
+        )
+        for prompt, reply in replies.items()
+    ]
+
+
+def _image(size: tuple[int, int], seed: int) -> bytes:
+    image = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(image)
+    for idx, line in enumerate(range(40, size[1] - 40, 36)):
+        width = (idx * 7919 + seed * 104729) % (size[0] // 2)
+        draw.rectangle((60, line, size[0] // 3 + width, line + 18), 0)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _test_data(scale: int) -> bytes:
+    test_data = [
+        {"question": f"{idx} + {idx % 7}", "answer": idx + idx % 7 + idx % 3}
+        for idx in range(500 * scale)
+    ]
+    test_data[10]["test"] = {"q": "Stolica Polski?", "a": "???"}
+    return json.dumps(
+        {"apikey": "%PUT-YOUR-API-KEY-HERE%", "test-data": test_data}
+    ).encode("utf-8")
+
+
+def create_fixtures(scale: int) -> Fixtures:
+    """Fixtures served by fake services"""
+    article = "<html><body>" + "<p>Akapit artykułu.</p>" * 200 * scale
+    article += '<img src="i/figure.png"/><audio src="i/recording.mp3"/></body></html>'
+    return Fixtures(
+        files={
+            "article.html": article.encode("utf-8"),
+            "questions.txt": "\n".join(
+                f"{question_id}={question}"
+                for question_id, question in QUESTIONS.items()
+            ).encode("utf-8"),
+            "figure.png": _image((1600, 1200), 0),
+            "recording.mp3": os.urandom(256 * 1024),
+            "test-data.json": _test_data(scale),
+            "cenzura.txt": "Dane osoby podejrzanej: Jan Nowak. Adres: Wrocław.".encode(
+                "utf-8"
+            ),
+            "robot-dump.txt": ("Stolicą Polski jest Kraków.\n" * 100 * scale).encode(
+                "utf-8"
+            ),
+            "barbara.txt": ("Barbara widziana z Rafałem w Krakowie.\n" * 20).encode(
+                "utf-8"
+            ),
+        },
+        chat_rules=_chat_rules(),
+        search_index={
+            "RAFAL": "KRAKOW WARSZAWA",
+            "KRAKOW": "RAFAL",
+            "WARSZAWA": "RAFAL",
+            "ELBLAG": "BARBARA",
+        },
+        db_rows=[
+            {"user1": user1, "user2": user2, "dc_id": str(4000 + idx)}
+            for idx, (user1, user2) in enumerate(zip(USERS, USERS[1:]))
+        ],
+        verify_reply={"code": 0, "message": FLAG},
+        robot_reply={"msgID": "1", "text": FLAG},
+        captcha_page="<html><p id='human-question'>Rok lądowania?</p></html>",
+        hidden_page=f"<html><p>{FLAG}</p><a href='/files/firmware'>fw</a></html>",
+    )
+
+
+def _write(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(content)
+
+
+def write_resources(project_dir: str, scale: int) -> None:
+    """Create resource directories read by solutions"""
+    resources = os.fspath(f"{project_dir}/resources")
+    for idx in range(3 * scale):
+        _write(f"{resources}/S02E01/recording{idx}.m4a", os.urandom(256 * 1024))
+    for idx in range(4 * scale):
+        _write(f"{resources}/S02E04/report{idx}.mp3", os.urandom(128 * 1024))
+        _write(f"{resources}/S02E04/report{idx}.png", _image((1600, 1200), idx))
+        _write(
+            f"{resources}/S02E04/report{idx}.txt",
+            f"Raport {idx}: patrol zakończony bez incydentów.".encode("utf-8"),
+        )
+    for idx in range(5 * scale):
+        _write(
+            f"{resources}/S03E01/facts/f{idx:02d}.txt",
+            "Barbara Zawadzka jest programistką.".encode("utf-8"),
+        )
+    for idx in range(10 * scale):
+        _write(
+            f"{resources}/S03E01/report-{idx:02d}-sektor_C4.txt",
+            f"Raport {idx}: patrol w sektorze C4.".encode("utf-8"),
+        )
+    for idx in range(20 * scale):
+        _write(
+            f"{resources}/S03E02/2024_02_{idx % 28 + 1:02d}.txt",
+            f"Raport {idx}: w nocy skradziono prototyp broni.".encode("utf-8"),
+        )
+
+
+def environment(base_url: str, project_dir: str) -> dict[str, str]:
+    """Env variables pointing solutions to fake services"""
+    return {
+        "PROJECT_DIR": project_dir,
+        "API_KEY": "benchmark",
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"{base_url}/openai/v1",
+        "GROQ_API_KEY": "benchmark",
+        "GROQ_BASE_URL": f"{base_url}/groq",
+        "OLLAMA_URL": f"{base_url}/ollama/v1",
+        "VERIFY_URL": f"{base_url}/verify",
+        "TASK1_WEBSITE_URL": f"{base_url}/captcha",
+        "TASK1_USERNAME": "tester",
+        "TASK1_PASSWORD": "574e112a",
+        "TASK2_URL": f"{base_url}/robot-verify",
+        "TASK2_DUMP_URL": f"{base_url}/files/robot-dump.txt",
+        "TASK3_FILE_URL": f"{base_url}/files/test-data.json",
+        "TASK5_DATA_URL": f"{base_url}/files/cenzura.txt",
+        "TASK10_ARTICLE_URL": f"{base_url}/files/article.html",
+        "TASK10_QUESTIONS_URL": f"{base_url}/files/questions.txt",
+        "TASK13_DB_API_URL": f"{base_url}/apidb",
+        "TASK14_ENTRY_DATA": f"{base_url}/files/barbara.txt",
+        "TASK14_PLACES_URL": f"{base_url}/places",
+        "TASK14_PEOPLE_URL": f"{base_url}/people",
+        "QDRANT_URL": "http://qdrant.benchmark:6333",
+        "QDRANT_API_KEY": "benchmark",
+        "NEO4J_URI": "bolt://neo4j.benchmark:7687",
+        "NEO4J_USERNAME": "benchmark",
+        "NEO4J_PASSWORD": "benchmark",
+        "LLM_CACHE_ENABLED": "0",
+        "GROQ_TRANSCRIPTIONS_PER_MINUTE": "1000000",
+        "GROQ_AUDIO_SECONDS_PER_HOUR": "1000000000",
+        "SOLUTIONS_ENABLED": "",
+        "SOLUTIONS_WARMUP": "",
+    }
@@ -0,0 +1,94 @@
+"""In-memory stand-ins for Qdrant and Neo4j"""
+
+import asyncio
+from collections import defaultdict, deque
+from types import SimpleNamespace
+from qdrant_client import QdrantClient
+
+
+class AsyncQdrantStandIn:  # pylint: disable=too-few-public-methods
+    """Async facade sharing in-memory collection with sync client"""
+
+    def __init__(self, client: QdrantClient, latency: float):
+        self.client = client
+        self.latency = latency
+
+    async def search(self, **kwargs):
+        """Search in-memory collection"""
+        await asyncio.sleep(self.latency)
+        return self.client.search(**kwargs)
+
+
+def create_qdrant(latency: float) -> tuple[QdrantClient, AsyncQdrantStandIn]:
+    """Sync and async clients working on the same in-memory collections"""
+    client = QdrantClient(location=":memory:")
+    return client, AsyncQdrantStandIn(client, latency)
+
+
+class _Result:  # pylint: disable=too-few-public-methods
+    def __init__(self, paths: list):
+        self.paths = paths
+
+    async def value(self, _: str) -> list:
+        """Values of returned paths"""
+        return self.paths
+
+
+class GraphStandIn:
+    """In-memory graph replacing neo4j AsyncGraphDatabase"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.edges = defaultdict(set)
+
+    def connect(self, user1: str, user2: str) -> None:
+        """Add directed connection"""
+        self.edges[user1].add(user2)
+
+    def shortest_path(self, user1: str, user2: str) -> list[str]:
+        """Breadth first search between users"""
+        previous = {user1: None}
+        queue = deque([user1])
+        while queue:
+            user = queue.popleft()
+            if user == user2:
+                path = []
+                while user is not None:
+                    path.append(user)
+                    user = previous[user]
+                return path[::-1]
+            for neighbour in sorted(self.edges[user]):
+                if neighbour not in previous:
+                    previous[neighbour] = user
+                    queue.append(neighbour)
+        return None
+
+    def driver(self, *_, **__) -> "GraphStandIn":
+        """Same interface as AsyncGraphDatabase.driver"""
+        return self
+
+    def session(self, **_) -> "GraphStandIn":
+        """Sessions share the graph"""
+        return self
+
+    async def __aenter__(self) -> "GraphStandIn":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        return None
+
+    async def run(self, _: str, user1: str, user2: str) -> None:
+        """Merge connection, the only write query used by solutions"""
+        await asyncio.sleep(self.latency)
+        self.connect(user1, user2)
+
+    async def execute_query(self, _: str, user1: str, user2: str, **kwargs):
+        """Shortest path query, the only read query used by solutions"""
+        await asyncio.sleep(self.latency)
+        path = self.shortest_path(user1, user2)
+        paths = (
+            []
+            if path is None
+            else [SimpleNamespace(nodes=[{"name": name} for name in path])]
+        )
+        return await kwargs["result_transformer_"](_Result(paths))
@@ -0,0 +1,102 @@
+"""
+Microbenchmark of placeholder substitution: sequential str.replace against
+single pass templates.substitute, time per character should stay flat
+as documents grow.
+
+Usage: python -m tests.benchmarks.substitution [--sizes 100000 1000000] ...
+"""
+
+import sys
+import time
+import argparse
+from tests.benchmarks.__main__ import API_DIR
+
+PARAGRAPH = "Profesor Maj prowadził badania nad podróżami w czasie. "
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks.substitution")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="*",
+        default=[100_000, 1_000_000, 4_000_000],
+        help="document sizes in characters",
+    )
+    parser.add_argument(
+        "--placeholders",
+        type=int,
+        nargs="*",
+        default=[10, 100],
+        help="numbers of distinct placeholders",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case")
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=2.0,
+        help="allowed growth of time per character between smallest and largest",
+    )
+    return parser.parse_args()
+
+
+def _document(size: int, placeholders: int) -> tuple[str, dict[str, str]]:
+    names = [f"placeholder_figure{idx}_png" for idx in range(placeholders)]
+    parts, length, idx = [], 0, 0
+    while length < size:
+        part = PARAGRAPH * 20 + names[idx % placeholders] + "\n"
+        parts.append(part)
+        length += len(part)
+        idx += 1
+    replacements = {
+        name: f"<IMAGE_DESCRIPTION>{name}</IMAGE_DESCRIPTION>" for name in names
+    }
+    return "".join(parts), replacements
+
+
+def _sequential(text: str, replacements: dict[str, str]) -> str:
+    for name, value in replacements.items():
+        text = text.replace(name, value)
+    return text
+
+
+def _best(function, text: str, replacements: dict[str, str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text, replacements)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    """Run substitution benchmark, returns non zero exit code on non linear scaling"""
+    args = _parse_args()
+    sys.path.insert(0, API_DIR)
+    # pylint: disable-next=import-outside-toplevel
+    from common.templates import substitute
+
+    failed = False
+    for placeholders in args.placeholders:
+        per_char = []
+        for size in args.sizes:
+            text, replacements = _document(size, placeholders)
+            assert substitute(text, replacements) == _sequential(text, replacements)
+            sequential = _best(_sequential, text, replacements, args.repeat)
+            single_pass = _best(substitute, text, replacements, args.repeat)
+            per_char.append(single_pass / len(text))
+            print(
+                f"size={len(text):<9} placeholders={placeholders:<4} "
+                f"sequential={sequential * 1000:9.2f}ms "
+                f"single_pass={single_pass * 1000:9.2f}ms "
+                f"single_pass_per_char={per_char[-1] * 1e9:6.2f}ns"
+            )
+        growth = per_char[-1] / per_char[0]
+        if growth > args.max_growth:
+            print(f"NON LINEAR placeholders={placeholders} growth={growth:.2f}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Task 10 retrieval tests"""
+
+from common import artifact_store
+from solutions import article_reader
+
+# pylint: disable=protected-access
+
+FIGURE = "<IMAGE_DESCRIPTION>:\nZdjęcie rynku w Krakowie.\nKolejna linia.\n</IMAGE_DESCRIPTION>"
+
+
+def test_resource_blocks_stay_whole_chunks(mocker):
+    """
+    Given article with long text around an image description,
+    the description should be a single chunk and text chunks should fit budget
+    """
+    mocker.patch.object(article_reader, "CHUNK_TOKENS", 20)
+    model = article_reader.llm_gateway.primary_model("chat")
+    text = " ".join(f"słowo{idx}" for idx in range(100))
+    chunks = article_reader._chunk_article(f"{text}\n{FIGURE}\nKoniec.")
+    assert FIGURE in chunks
+    assert chunks[-1] == "Koniec."
+    assert all(
+        article_reader.tokens.count(chunk, model) <= 20
+        for chunk in chunks
+        if chunk != FIGURE
+    )
+    assert "".join(chunks[: chunks.index(FIGURE)]) == text
+
+
+def test_top_chunks_are_kept_in_article_order(mocker):
+    """
+    Given chunks scored against question,
+    the best chunks should be returned in article order
+    """
+    mocker.patch.object(article_reader, "TOP_K", 2)
+    chunks = ["pierwszy", "drugi", "trzeci", "czwarty"]
+    vectors = [[0.9, 0.1], [0.1, 0.9], [0.2, 0.8], [1.0, 0.0]]
+    assert article_reader._retrieve([1.0, 0.0], chunks, vectors) == (
+        "pierwszy\n\nczwarty"
+    )
+
+
+def test_answers_are_keyed_by_question_id(mocker):
+    """
+    Given long article and questions,
+    each question should be answered from its own context under its id
+    """
+    chunks = ["Maj pracował w Krakowie.", "Rafał uciekł do Grudziądza."]
+    mocker.patch.object(
+        article_reader,
+        "_index_article",
+        return_value=(chunks, [[1.0, 0.0], [0.0, 1.0]]),
+    )
+    mocker.patch.object(
+        article_reader,
+        "_embed_chunks",
+        return_value=[[0.0, 1.0], [1.0, 0.0]],
+    )
+    mocker.patch.object(article_reader, "TOP_K", 1)
+    answer = mocker.patch.object(
+        article_reader,
+        "_answer_question",
+        side_effect=lambda question, context: f"{question}: {context}",
+    )
+    questions = {"Dokąd uciekł Rafał?": "01", "Gdzie pracował Maj?": "02"}
+    assert article_reader._answer_with_retrieval("artykuł", questions) == {
+        "01": f"Dokąd uciekł Rafał?: {chunks[1]}",
+        "02": f"Gdzie pracował Maj?: {chunks[0]}",
+    }
+    assert answer.call_count == 2
+
+
+def test_article_with_failed_resource_is_not_stored(mocker, tmp_path):
+    """
+    Given figure which cannot be described,
+    the article should be returned without it but resolved again next time
+    """
+    mocker.patch.object(artifact_store, "STORE_DIR", str(tmp_path))
+    describe = mocker.patch.object(
+        article_reader, "_describe_image", side_effect=[None, "\nopis\n"]
+    )
+    placeholders = [
+        {"placeholder-name": "placeholder_rynek_png", "resource-url": "i/rynek.png"}
+    ]
+    text = "Wstęp placeholder_rynek_png koniec."
+    assert article_reader._get_replaced_text(text, placeholders) == "Wstęp  koniec."
+    assert article_reader._get_replaced_text(text, placeholders) == (
+        "Wstęp \nopis\n koniec."
+    )
+    assert article_reader._get_replaced_text(text, placeholders) == (
+        "Wstęp \nopis\n koniec."
+    )
+    assert describe.call_count == 2
@@ -0,0 +1,84 @@
+"""Artifact store tests"""
+
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from common import artifact_store
+
+
+@pytest.fixture(autouse=True)
+def fixture_store_dir(mocker, tmp_path):
+    """Isolated store directory"""
+    mocker.patch.object(artifact_store, "STORE_DIR", str(tmp_path))
+
+
+def test_artifact_is_created_once_per_input(mocker):
+    """
+    Given the same stage and inputs,
+    the artifact should be created once and recreated when inputs change
+    """
+    create = mocker.Mock(return_value="content")
+    for inputs in ["a", "a", "b"]:
+        assert artifact_store.get_or_create("stage", inputs, create) == "content"
+    assert create.call_count == 2
+    assert artifact_store.STATS["stage"]["hits"] == 1
+
+
+def test_failed_result_is_not_stored(mocker):
+    """
+    Given a stage that returns None,
+    the next call should try to create the artifact again
+    """
+    create = mocker.Mock(side_effect=[None, {"key": "value"}])
+    assert artifact_store.get_or_create("failing", "a", create, codec="json") is None
+    result = artifact_store.get_or_create("failing", "a", create, codec="json")
+    assert result == {"key": "value"}
+
+
+def test_concurrent_requests_create_artifact_once():
+    """
+    Given many concurrent requests for missing artifact,
+    only one of them should run the stage
+    """
+    calls = []
+
+    def create():
+        calls.append(1)
+        time.sleep(0.05)
+        return "content"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(
+                lambda _: artifact_store.get_or_create("concurrent", "a", create),
+                range(8),
+            )
+        )
+    assert results == ["content"] * 8
+    assert len(calls) == 1
+
+
+def test_locks_are_bounded(tmp_path):
+    """
+    Given many distinct artifacts,
+    no lock file should be left next to them and lock files should be shared
+    """
+    for idx in range(200):
+        artifact_store.get_or_create("locks", idx, lambda: "content")
+    assert not list((tmp_path / "locks").glob("*.lock"))
+    locks = list((tmp_path / artifact_store.LOCK_DIR).glob("*.lock"))
+    assert len(locks) <= artifact_store.LOCK_STRIPES
+
+
+def test_async_artifact_is_created_once(mocker):
+    """
+    Given the same async stage and inputs twice,
+    the artifact should be created once
+    """
+    create = mocker.AsyncMock(return_value={"value": 1})
+    for _ in range(2):
+        assert asyncio.run(
+            artifact_store.get_or_create_async("async", "a", create, codec="json")
+        ) == {"value": 1}
+    assert create.await_count == 1
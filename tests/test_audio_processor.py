@@ -0,0 +1,68 @@
+"""Audio preprocessing tests"""
+
+import subprocess
+import pytest
+from common import audio_processor
+from common.audio_processor import split_points
+
+
+def test_edge_silence_is_trimmed():
+    """
+    Given silence at the beginning and at the end,
+    the only segment should contain speech
+    """
+    assert split_points(30, [(0, 2), (27, 30)], 600) == [(2, 27)]
+
+
+def test_long_recording_is_cut_in_silence():
+    """
+    Given recording longer than chunk,
+    cuts should be placed in the middle of the last silence fitting the chunk
+    """
+    segments = split_points(100, [(20, 22), (38, 40), (70, 72)], 50)
+    assert segments == [(0, 39), (39, 71), (71, 100)]
+
+
+def test_hard_cut_without_silence():
+    """
+    Given recording without silence,
+    chunks should be cut at chunk length
+    """
+    assert split_points(25, [], 10) == [(0, 10), (10, 20), (20, 25)]
+
+
+def test_only_silence_gives_no_segments():
+    """
+    Given recording with silence only,
+    there should be nothing to transcribe
+    """
+    assert not split_points(10, [(0, 10)], 600)
+
+
+def test_whole_file_when_preprocessing_unavailable(mocker):
+    """
+    Given ffmpeg is missing,
+    the original file should be transcribed once
+    """
+    mocker.patch.object(audio_processor, "FFMPEG", None)
+    transcribe = mocker.Mock(return_value=" text ")
+    assert audio_processor.transcribe_in_chunks("input.mp3", transcribe) == "text"
+    transcribe.assert_called_once_with("input.mp3")
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        PermissionError("Permission denied"),
+        subprocess.TimeoutExpired("ffmpeg", 300),
+    ],
+)
+def test_whole_file_when_ffmpeg_fails_to_run(mocker, error):
+    """
+    Given ffmpeg which cannot be started or hangs,
+    the original file should be used
+    """
+    mocker.patch.object(audio_processor, "FFMPEG", "/usr/bin/ffmpeg")
+    run = mocker.patch.object(audio_processor.subprocess, "run", side_effect=error)
+    assert audio_processor.prepare_chunks("input.mp3", "chunks") == ["input.mp3"]
+    assert run.call_args.kwargs["timeout"] == audio_processor.TIMEOUT
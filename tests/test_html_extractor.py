@@ -0,0 +1,102 @@
+"""Local article extraction tests"""
+
+from common import html_extractor
+
+ARTICLE = """
+<html>
+<head><title>Tytuł</title><style>p { color: red; }</style></head>
+<body>
+<h1>Badania &amp; rozwój</h1>
+<p>Profesor   Maj
+prowadził badania.</p>
+<figure>
+<img src="i/rynek.png" alt="Rynek"/>
+<figcaption>Rynek w Krakowie</figcaption>
+</figure>
+<audio controls><source src="i/rafal.mp3" type="audio/mpeg"></audio>
+<script>console.log("ignored");</script>
+<p>Koniec.</p>
+</body>
+</html>
+"""
+
+
+def test_placeholder_name():
+    """
+    Given resource url with directory,
+    placeholder should be built from file name and extension
+    """
+    assert html_extractor.placeholder_name("i/rafal.mp3") == "placeholder_rafal_mp3"
+
+
+def test_text_is_extracted_with_placeholders():
+    """
+    Given article with figure and audio,
+    text should keep blocks and captions with resources replaced by placeholders
+    """
+    assert html_extractor.extract(ARTICLE) == {
+        "content": "\n".join(
+            [
+                "Badania & rozwój",
+                "Profesor Maj prowadził badania.",
+                "placeholder_rynek_png",
+                "Rynek w Krakowie",
+                "placeholder_rafal_mp3",
+                "Koniec.",
+            ]
+        ),
+        "placeholders": [
+            {
+                "placeholder-name": "placeholder_rynek_png",
+                "resource-url": "i/rynek.png",
+            },
+            {
+                "placeholder-name": "placeholder_rafal_mp3",
+                "resource-url": "i/rafal.mp3",
+            },
+        ],
+    }
+
+
+def test_repeated_resource_has_one_placeholder():
+    """
+    Given the same figure used twice,
+    it should be listed once
+    """
+    article = '<p><img src="a.png"></p><p><img src="a.png"></p>'
+    converted = html_extractor.extract(article)
+    assert converted["content"] == "placeholder_a_png\nplaceholder_a_png"
+    assert len(converted["placeholders"]) == 1
+
+
+def test_same_file_names_get_distinct_placeholders():
+    """
+    Given resources with the same file name in different directories,
+    each should get its own placeholder and repeated resource should reuse it
+    """
+    article = (
+        '<p><img src="a/rynek.png"/><img src="b/rynek.png"/>'
+        '<img src="a/rynek.png"/></p>'
+    )
+    assert html_extractor.extract(article) == {
+        "content": "placeholder_rynek_png placeholder_rynek_png_2 "
+        "placeholder_rynek_png",
+        "placeholders": [
+            {
+                "placeholder-name": "placeholder_rynek_png",
+                "resource-url": "a/rynek.png",
+            },
+            {
+                "placeholder-name": "placeholder_rynek_png_2",
+                "resource-url": "b/rynek.png",
+            },
+        ],
+    }
+
+
+def test_escaped_entities_are_decoded_once():
+    """
+    Given text with escaped character reference,
+    it should be decoded only once
+    """
+    assert html_extractor.extract("<p>a &amp;lt; b</p>")["content"] == "a &lt; b"
@@ -0,0 +1,79 @@
+"""Image preprocessing tests"""
+
+import io
+from PIL import Image, ImageDraw
+from common import image_processor
+from common.image_processor import DuplicateIndex, PreparedImage, prepare
+
+
+def _png(size: tuple[int, int], shift: int = 0) -> bytes:
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for line in range(0, size[1], 40):
+        draw.rectangle(
+            (20 + shift, line, size[0] // 2 + line % 300, line + 20), "black"
+        )
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _gradient(size: tuple[int, int]) -> bytes:
+    image = Image.linear_gradient("L").resize(size).rotate(90)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_large_photo_is_downsized_to_jpeg(mocker):
+    """
+    Given photo larger than vision model resolution,
+    it should be downsized and labelled as JPEG
+    """
+    mocker.patch.object(image_processor, "MAX_SIDE", 500)
+    image = prepare(_gradient((2000, 1000)))
+    assert image.mime_type == "image/jpeg"
+    assert image.data_url().startswith("data:image/jpeg;base64,")
+    with Image.open(io.BytesIO(image.content)) as decoded:
+        assert decoded.size == (500, 250)
+
+
+def test_large_document_is_downsized_to_png(mocker):
+    """
+    Given scanned text larger than vision model resolution,
+    it should be downsized and kept lossless
+    """
+    mocker.patch.object(image_processor, "MAX_SIDE", 500)
+    image = prepare(_png((2000, 1000)))
+    assert image.mime_type == "image/png"
+    with Image.open(io.BytesIO(image.content)) as decoded:
+        assert decoded.size == (500, 250)
+
+
+def test_undecodable_image_is_sent_unchanged():
+    """
+    Given bytes which are not an image,
+    original content should be kept without perceptual hash
+    """
+    content = b"\x89PNG\r\n\x1a\nbroken"
+    image = prepare(content)
+    assert image == PreparedImage(content, "image/png")
+
+
+def test_duplicates_are_skipped_only_when_enabled():
+    """
+    Given copy of an image, shifted image and a different image,
+    only the exact copy should get the key of the first image
+    and only when skipping duplicates is enabled
+    """
+    index = DuplicateIndex(enabled=True, size=10)
+    first = prepare(_png((800, 600)))
+    copy = prepare(_png((800, 600)))
+    shifted = prepare(_png((800, 600), shift=2))
+    other = prepare(_gradient((800, 600)))
+    assert index.canonical(first, "first") == "first"
+    assert index.canonical(copy, "copy") == "first"
+    assert index.canonical(shifted, "shifted") == "shifted"
+    assert index.canonical(other, "other") == "other"
+    assert index.canonical(PreparedImage(b"", "image/png"), "unknown") == "unknown"
+    assert DuplicateIndex(enabled=False, size=10).canonical(copy, "copy") == "copy"
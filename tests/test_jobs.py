@@ -0,0 +1,93 @@
+"""Background jobs tests"""
+
+import time
+import pytest
+from fastapi.testclient import TestClient
+from common import jobs
+from api.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def fixture_jobs_dir(mocker, tmp_path):
+    """Isolated jobs directory"""
+    mocker.patch.object(jobs, "JOBS_DIR", str(tmp_path))
+
+
+def _wait_for_result(job_id: str):
+    for _ in range(50):
+        result = client.get(f"/jobs/{job_id}/result")
+        if result.status_code != 409:
+            return result
+        time.sleep(0.05)
+    return result
+
+
+def test_job_result_is_available_after_completion(mocker):
+    """
+    Given long running task submitted as job,
+    the api should return job id and later its result
+    """
+    solution = mocker.Mock()
+    solution.report_analysis.return_value = {"code": 0, "text": "OK"}
+    mocker.patch("routers.jobs_router.get_solution", return_value=solution)
+    response = client.post("/jobs/task9")
+    assert response.status_code == 202
+    result = _wait_for_result(response.json()["job_id"])
+    assert result.json() == {"code": 0, "text": "OK"}
+
+
+def test_failed_job_reports_error(mocker):
+    """
+    Given task that raises an exception,
+    the job should be marked as failed with the error
+    """
+    solution = mocker.Mock()
+    solution.extract_keywords.side_effect = ValueError("Cannot read file.")
+    mocker.patch("routers.jobs_router.get_solution", return_value=solution)
+    job_id = client.post("/jobs/task11").json()["job_id"]
+    result = _wait_for_result(job_id)
+    assert result.status_code == 500
+    assert client.get(f"/jobs/{job_id}").json()["status"] == "failed"
+
+
+def test_unserializable_result_fails_job(mocker):
+    """
+    Given task returning result that cannot be saved,
+    the job should be marked as failed instead of staying running
+    """
+    solution = mocker.Mock()
+    solution.answer_questions.return_value = {"answer": object()}
+    mocker.patch("routers.jobs_router.get_solution", return_value=solution)
+    job_id = client.post("/jobs/task10").json()["job_id"]
+    assert _wait_for_result(job_id).status_code == 500
+    assert client.get(f"/jobs/{job_id}").json()["status"] == "failed"
+
+
+def test_events_of_missing_job():
+    """
+    Given unknown job id,
+    events endpoint should respond with not found
+    """
+    assert client.get("/jobs/missing/events").status_code == 404
+
+
+def test_finished_jobs_are_pruned(mocker, tmp_path):
+    """
+    Given more finished jobs than the limit,
+    the oldest ones should be removed
+    """
+    mocker.patch.object(jobs, "MAX_JOBS", 2)
+    job_ids = []
+    for _ in range(4):
+        job = jobs.submit("test", lambda: "done")
+        job_ids.append(job.job_id)
+        for _ in range(50):
+            if jobs.get_job(job.job_id).status in jobs.FINISHED:
+                break
+            time.sleep(0.01)
+        time.sleep(0.01)
+    assert jobs.get_job(job_ids[0]) is None
+    assert jobs.get_job(job_ids[-1]) is not None
+    assert len(list(tmp_path.iterdir())) <= 3
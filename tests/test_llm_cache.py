@@ -0,0 +1,123 @@
+"""LLM completion cache tests"""
+
+import time
+import asyncio
+import pytest
+from openai.types.chat import ChatCompletion
+from common import llm_cache
+
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "answer"},
+        }
+    ],
+}
+
+
+@pytest.fixture(name="client")
+def fixture_client(mocker, tmp_path):
+    """Fake OpenAI client with isolated cache directory"""
+    mocker.patch.object(llm_cache, "CACHE_DIR", str(tmp_path))
+    # pylint: disable-next=protected-access
+    mocker.patch.dict(llm_cache._SIZE, {"total": None})
+    client = mocker.Mock()
+    client.base_url = "https://api.openai.com/v1/"
+    client.chat.completions.create.return_value = ChatCompletion.model_validate(
+        COMPLETION
+    )
+    return client
+
+
+def test_identical_request_is_served_from_cache(client):
+    """
+    Given the same model and messages twice,
+    the provider should be called only once
+    """
+    messages = [{"role": "user", "content": "question"}]
+    first = llm_cache.create_completion(client, model="gpt-4o-mini", messages=messages)
+    second = llm_cache.create_completion(client, model="gpt-4o-mini", messages=messages)
+    assert client.chat.completions.create.call_count == 1
+    assert second.choices[0].message.content == first.choices[0].message.content
+
+
+def test_bypass_and_different_params_call_provider(client):
+    """
+    Given bypass flag or changed parameters,
+    the provider should be called again
+    """
+    messages = [{"role": "user", "content": "question"}]
+    llm_cache.create_completion(client, model="gpt-4o-mini", messages=messages)
+    llm_cache.create_completion(
+        client, cache=False, model="gpt-4o-mini", messages=messages
+    )
+    llm_cache.create_completion(
+        client, model="gpt-4o-mini", messages=messages, temperature=0.1
+    )
+    assert client.chat.completions.create.call_count == 3
+
+
+def _ask(client, question: str) -> None:
+    llm_cache.create_completion(
+        client,
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": question}],
+    )
+
+
+def test_cache_is_size_bounded(client, mocker, tmp_path):
+    """
+    Given cache limit holding two entries,
+    the least recently used entry should be evicted and the newest kept
+    """
+    _ask(client, "first")
+    entry_size = next(tmp_path.iterdir()).stat().st_size
+    mocker.patch.object(llm_cache, "MAX_BYTES", int(entry_size * 2.5))
+    for question in ["second", "third"]:
+        time.sleep(0.01)
+        _ask(client, question)
+    assert len(list(tmp_path.iterdir())) == 2
+    _ask(client, "first")
+    _ask(client, "third")
+    assert client.chat.completions.create.call_count == 4
+
+
+def test_entry_expires_after_ttl_despite_hits(client, mocker):
+    """
+    Given entry read repeatedly,
+    it should still expire TTL seconds after creation
+    """
+    mocker.patch.object(llm_cache, "TTL", 60)
+    now = time.time()
+    clock = mocker.patch("time.time", return_value=now)
+    for offset in (0, 30, 50, 70):
+        clock.return_value = now + offset
+        _ask(client, "question")
+    assert client.chat.completions.create.call_count == 2
+
+
+def test_async_request_is_served_from_cache(client, mocker):
+    """
+    Given the same async request twice,
+    the provider should be called once and the second call flagged as hit
+    """
+    client.chat.completions.create = mocker.AsyncMock(
+        return_value=ChatCompletion.model_validate(COMPLETION)
+    )
+    messages = [{"role": "user", "content": "question"}]
+
+    async def ask() -> bool:
+        await llm_cache.create_completion_async(
+            client, model="gpt-4o-mini", messages=messages
+        )
+        return llm_cache.HIT.get()
+
+    assert asyncio.run(ask()) is False
+    assert asyncio.run(ask()) is True
+    assert client.chat.completions.create.call_count == 1
@@ -0,0 +1,218 @@
+"""LLM gateway tests"""
+
+import time
+import asyncio
+import httpx
+import openai
+import pytest
+from common import llm_gateway, tokens
+from common.llm_gateway import Route
+
+PRIMARY = Route("openai", "gpt-4o-mini")
+SECONDARY = Route("groq", "llama-3.1-8b-instant")
+
+
+@pytest.fixture(autouse=True, name="routes")
+def fixture_routes(mocker):
+    """Two chat routes and empty latency history"""
+    mocker.patch.object(llm_gateway, "ROUTES", {"chat": [PRIMARY, SECONDARY]})
+    mocker.patch.object(llm_gateway, "_LATENCIES", {})
+    return [PRIMARY, SECONDARY]
+
+
+def _connection_error() -> openai.APIConnectionError:
+    return openai.APIConnectionError(request=httpx.Request("POST", "http://test"))
+
+
+def test_model_names_may_contain_colon():
+    """
+    Given ollama model with tag,
+    only provider should be split off
+    """
+    assert llm_gateway.parse_routes("ollama:llama3.2:3b, openai:gpt-4o-mini") == [
+        Route("ollama", "llama3.2:3b"),
+        Route("openai", "gpt-4o-mini"),
+    ]
+
+
+def test_failover_to_next_provider():
+    """
+    Given primary provider unavailable,
+    the call should be served by the next route
+    """
+
+    def operation(route: Route) -> str:
+        if route == PRIMARY:
+            raise _connection_error()
+        return route.model
+
+    assert llm_gateway.call("chat", operation) == SECONDARY.model
+
+
+def test_last_error_is_raised():
+    """
+    Given all providers unavailable,
+    the error of the last route should be raised
+    """
+
+    def operation(_: Route) -> str:
+        raise _connection_error()
+
+    with pytest.raises(openai.APIConnectionError):
+        llm_gateway.call("chat", operation)
+
+
+def test_slow_request_is_hedged(mocker):
+    """
+    Given primary slower than its latency percentile,
+    the answer of the hedged request should be returned
+    """
+    mocker.patch.object(llm_gateway, "HEDGE_PERCENTILE", 50)
+    mocker.patch.object(llm_gateway, "HEDGE_MIN_SAMPLES", 1)
+    llm_gateway._latency(PRIMARY).add(0.01)  # pylint: disable=protected-access
+
+    def operation(route: Route) -> str:
+        if route == PRIMARY:
+            time.sleep(0.5)
+        return route.model
+
+    assert llm_gateway.call("chat", operation) == SECONDARY.model
+
+
+def test_slow_async_request_is_hedged(mocker):
+    """
+    Given async primary slower than its latency percentile,
+    the answer of the hedged request should be returned
+    """
+    mocker.patch.object(llm_gateway, "HEDGE_PERCENTILE", 50)
+    mocker.patch.object(llm_gateway, "HEDGE_MIN_SAMPLES", 1)
+    llm_gateway._latency(PRIMARY).add(0.01)  # pylint: disable=protected-access
+
+    async def operation(route: Route) -> str:
+        if route == PRIMARY:
+            await asyncio.sleep(0.5)
+        return route.model
+
+    assert asyncio.run(llm_gateway.call_async("chat", operation)) == SECONDARY.model
+
+
+def test_prompt_above_budget_is_rejected(mocker):
+    """
+    Given prompt larger than model budget and reject policy,
+    it should not be sent
+    """
+    mocker.patch.object(llm_gateway, "PROMPT_OVERFLOW", "reject")
+    messages = [{"role": "user", "content": "słowo " * 3000}]
+    with pytest.raises(llm_gateway.PromptTooLargeError):
+        llm_gateway.guard(messages, "llama3.2:3b", "test")
+
+
+def test_prompt_above_budget_is_truncated(mocker):
+    """
+    Given prompt larger than model budget and truncate policy,
+    the largest message should be shrunk to fit the budget
+    """
+    mocker.patch.object(llm_gateway, "PROMPT_OVERFLOW", "truncate")
+    messages = [
+        {"role": "system", "content": "słowo " * 3000},
+        {"role": "user", "content": "Pytanie?"},
+    ]
+    guarded = llm_gateway.guard(messages, "llama3.2:3b", "test")
+    assert guarded[1] == messages[1]
+    assert tokens.count_messages(guarded, "llama3.2:3b") <= tokens.budget("llama3.2:3b")
+
+
+def _bad_request_error() -> openai.BadRequestError:
+    request = httpx.Request("POST", "http://test")
+    return openai.BadRequestError(
+        "Invalid file", response=httpx.Response(400, request=request), body=None
+    )
+
+
+def test_bad_request_does_not_fail_over():
+    """
+    Given request rejected as invalid by primary provider,
+    the error should be raised without trying the next route
+    """
+    called = []
+
+    def operation(route: Route) -> str:
+        called.append(route)
+        raise _bad_request_error()
+
+    with pytest.raises(openai.BadRequestError):
+        llm_gateway.call("chat", operation)
+    assert called == [PRIMARY]
+
+
+def test_async_bad_request_does_not_fail_over():
+    """
+    Given async request rejected as invalid by primary provider,
+    the error should be raised without trying the next route
+    """
+    called = []
+
+    async def operation(route: Route) -> str:
+        called.append(route)
+        raise _bad_request_error()
+
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(llm_gateway.call_async("chat", operation))
+    assert called == [PRIMARY]
+
+
+def test_cache_hits_are_not_timed():
+    """
+    Given completion served from cache,
+    its latency should not be recorded for hedging
+    """
+
+    def operation(route: Route) -> str:
+        llm_gateway.llm_cache.HIT.set(route == PRIMARY)
+        return route.model
+
+    llm_gateway.call("chat", operation)
+    # pylint: disable-next=protected-access
+    assert llm_gateway._latency(PRIMARY).percentile(0) is None
+
+
+def test_transcription_without_retries_is_not_hedged(mocker):
+    """
+    Given transcription with retries handled by caller,
+    slow primary should not be duplicated on the next route
+    """
+    mocker.patch.object(llm_gateway, "HEDGE_PERCENTILE", 50)
+    mocker.patch.object(llm_gateway, "HEDGE_MIN_SAMPLES", 1)
+    mocker.patch.object(llm_gateway, "ROUTES", {"transcribe": [PRIMARY, SECONDARY]})
+    llm_gateway._latency(PRIMARY).add(0.01)  # pylint: disable=protected-access
+    client = mocker.MagicMock()
+    client.with_options.return_value = client
+    client.audio.transcriptions.create.side_effect = lambda **_: time.sleep(0.2)
+    mocker.patch.object(llm_gateway, "_client", return_value=client)
+    mocker.patch("builtins.open", mocker.mock_open(read_data=b"audio"))
+    llm_gateway.transcribe("nagranie.m4a", max_retries=0)
+    assert client.audio.transcriptions.create.call_count == 1
+
+
+def test_prompt_without_room_for_content_is_rejected(mocker):
+    """
+    Given truncate policy and other messages above model budget,
+    the prompt should be rejected instead of emptying the largest message
+    """
+    mocker.patch.object(llm_gateway, "PROMPT_OVERFLOW", "truncate")
+    mocker.patch.dict(tokens.CONTEXT_WINDOWS, {"small": 400})
+    messages = [
+        {"role": "system", "content": "słowo " * 400},
+        {"role": "user", "content": "słowo " * 350},
+    ]
+    with pytest.raises(llm_gateway.PromptTooLargeError):
+        llm_gateway.guard(messages, "small", "test")
+
+
+def test_unknown_model_prompt_is_sent():
+    """
+    Given model without known context window,
+    the prompt should be sent unchanged
+    """
+    messages = [{"role": "user", "content": "słowo " * 3000}]
+    assert llm_gateway.guard(messages, "unknown-model", "test") == messages
@@ -0,0 +1,46 @@
+"""Logger tests"""
+
+import logging
+import pytest
+from conf import logger
+
+
+def _record(module: str, level: int, msg: str, *args) -> logging.LogRecord:
+    return logging.LogRecord(module, level, f"{module}.py", 1, msg, args, None)
+
+
+def test_unknown_level_is_rejected():
+    """
+    Given misspelled module level,
+    configuration should fail at startup
+    """
+    assert logger.parse_levels("article_reader=debug, ocr=WARNING") == {
+        "article_reader": logging.DEBUG,
+        "ocr": logging.WARNING,
+    }
+    with pytest.raises(ValueError):
+        logger.parse_levels("article_reader=VERBOSE")
+
+
+def test_module_level_can_be_below_global(mocker):
+    """
+    Given global INFO level and DEBUG for one module,
+    debug records should pass only for that module
+    """
+    mocker.patch.object(logger, "LOG_LEVEL", "INFO")
+    mocker.patch.object(logger, "LOG_MODULE_LEVELS", {"article_reader": 10})
+    assert logger.payload_filter(_record("article_reader", logging.DEBUG, "a"))
+    assert not logger.payload_filter(_record("ocr", logging.DEBUG, "a"))
+    assert logger.payload_filter(_record("ocr", logging.INFO, "a"))
+
+
+def test_large_payload_is_truncated(mocker):
+    """
+    Given message argument above the limit,
+    the formatted message should be cut and marked
+    """
+    mocker.patch.object(logger, "LOG_MAX_MESSAGE_LENGTH", 10)
+    record = _record("ocr", logging.INFO, "Text: %s", "x" * 100)
+    assert logger.payload_filter(record)
+    assert record.msg == "Text: xxxx... [truncated]"
+    assert record.args is None
@@ -25,7 +25,7 @@ def test_get_description(mocker, expected_description):
     """
     mock_response = mocker.Mock()
     mock_response.text = expected_description
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("requests.Session.get", return_value=mock_response)
     task_json = json.dumps({"task_url": "test-path"})
     result = client.post("/task", content=task_json, timeout=30)
     assert result.text == expected_description
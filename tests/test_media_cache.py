@@ -0,0 +1,37 @@
+"""Media derivation cache tests"""
+
+import pytest
+from common import artifact_store, media_cache
+
+
+@pytest.fixture(autouse=True)
+def fixture_store_dir(mocker, tmp_path):
+    """Isolated store directory"""
+    mocker.patch.object(artifact_store, "STORE_DIR", str(tmp_path))
+
+
+def test_transcription_is_shared_by_content(mocker):
+    """
+    Given identical audio bytes transcribed by different tasks,
+    the transcription should be created once per model and language
+    """
+    create = mocker.Mock(return_value="transcription")
+    audio_digest = artifact_store.digest(b"audio")
+    for language in ["pl", "pl", "en"]:
+        assert (
+            media_cache.transcription(audio_digest, "whisper", language, create)
+            == "transcription"
+        )
+    assert create.call_count == 2
+
+
+def test_description_depends_on_prompt(mocker):
+    """
+    Given the same image described with another prompt,
+    the description should be created again
+    """
+    create = mocker.Mock(return_value="description")
+    image_digest = artifact_store.digest(b"image")
+    for prompt in ["describe", "describe", "describe figure"]:
+        media_cache.description(image_digest, "vision", prompt, create)
+    assert create.call_count == 2
@@ -0,0 +1,70 @@
+"""Metrics tests"""
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from openai.types.chat import ChatCompletion
+from common import metrics
+from api.main import app
+
+client = TestClient(app)
+
+
+def _sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_track_failed_dependency():
+    """
+    Given dependency call raising exception, the metrics should record
+    error outcome and leave no call in flight
+    """
+    labels = {"dependency": "qdrant", "operation": "search", "outcome": "error"}
+    before = _sample("dependency_request_duration_seconds_count", labels)
+    with pytest.raises(ConnectionError):
+        with metrics.track("qdrant", "search"):
+            raise ConnectionError()
+    assert _sample("dependency_request_duration_seconds_count", labels) == before + 1
+    assert _sample("dependency_requests_in_flight", {"dependency": "qdrant"}) == 0
+
+
+def test_record_usage():
+    """
+    Given completion with usage, the metrics should count
+    prompt and completion tokens of its model
+    """
+    labels = {"model": "test-model", "kind": "prompt"}
+    before = _sample("llm_tokens_total", labels)
+    completion = ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test-model",
+            "choices": [],
+            "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10},
+        }
+    )
+    metrics.record_usage(completion)
+    assert _sample("llm_tokens_total", labels) == before + 7
+
+
+def test_metrics_endpoint_reports_route_latency():
+    """
+    Given served request, the metrics endpoint should expose
+    its latency labelled by route template
+    """
+    client.get("/jobs/missing-job")
+    result = client.get("/metrics")
+    assert result.status_code == 200
+    assert 'route="/jobs/{job_id}"' in result.text
+    assert 'status="404"' in result.text
+
+
+def test_unknown_host_is_not_a_label():
+    """
+    Given host outside of known dependencies,
+    it should be reported as other to keep label cardinality bounded
+    """
+    assert metrics.dependency_name("api.openai.com") == "openai"
+    assert metrics.dependency_name("attacker.example.com") == "other"
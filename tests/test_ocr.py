@@ -0,0 +1,74 @@
+"""Local OCR tests"""
+
+import subprocess
+from common import ocr
+
+HEADER = (
+    "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num"
+    "\tleft\ttop\twidth\theight\tconf\ttext"
+)
+
+
+def _tsv(words: list[tuple[int, float, str]]) -> str:
+    rows = [HEADER, "1\t1\t0\t0\t0\t0\t0\t0\t100\t100\t-1\t"]
+    rows += [
+        f"5\t1\t1\t1\t{line}\t{idx}\t0\t0\t10\t10\t{confidence}\t{word}"
+        for idx, (line, confidence, word) in enumerate(words)
+    ]
+    return "\n".join(rows)
+
+
+def test_words_are_grouped_in_lines():
+    """
+    Given Tesseract TSV with two lines,
+    text should keep lines and mean confidence of words
+    """
+    output = _tsv([(1, 90, "Raport"), (1, 80, "patrolu"), (2, 94, "sektor")])
+    assert ocr.parse_tsv(output) == ("Raport patrolu\nsektor", 88, 3)
+
+
+def test_low_confidence_falls_back(mocker):
+    """
+    Given text recognised with low confidence,
+    None should be returned so vision model is used
+    """
+    mocker.patch.object(ocr, "TESSERACT", "tesseract")
+    output = _tsv([(1, 30, word) for word in "a b c d e f".split()])
+    mocker.patch(
+        "subprocess.run",
+        return_value=subprocess.CompletedProcess([], 0, output.encode("utf-8")),
+    )
+    assert ocr.extract_text(b"image") is None
+
+
+def test_confident_text_is_returned(mocker):
+    """
+    Given text recognised with high confidence,
+    it should be returned
+    """
+    mocker.patch.object(ocr, "TESSERACT", "tesseract")
+    output = _tsv([(1, 95, word) for word in "schwytano dwie osoby w sektorze".split()])
+    mocker.patch(
+        "subprocess.run",
+        return_value=subprocess.CompletedProcess([], 0, output.encode("utf-8")),
+    )
+    assert ocr.extract_text(b"image") == "schwytano dwie osoby w sektorze"
+
+
+def test_missing_tesseract(mocker):
+    """
+    Given tesseract is not installed,
+    OCR should be skipped
+    """
+    mocker.patch.object(ocr, "TESSERACT", None)
+    assert ocr.extract_text(b"image") is None
+
+
+def test_tesseract_cannot_be_started(mocker):
+    """
+    Given tesseract binary removed after startup,
+    OCR should be skipped so vision model is used
+    """
+    mocker.patch.object(ocr, "TESSERACT", "/missing/tesseract")
+    mocker.patch("subprocess.run", side_effect=FileNotFoundError("tesseract"))
+    assert ocr.extract_text(b"image") is None
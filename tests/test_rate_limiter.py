@@ -0,0 +1,24 @@
+"""Rate limiter tests"""
+
+from common.rate_limiter import TokenBucket
+
+
+def test_bucket_waits_when_empty():
+    """
+    Given a bucket with capacity drained,
+    the next acquire should wait for refill
+    """
+    bucket = TokenBucket(capacity=2, period=0.1)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() > 0
+
+
+def test_amount_is_capped_at_capacity():
+    """
+    Given amount larger than capacity,
+    the bucket should not block forever
+    """
+    bucket = TokenBucket(capacity=1, period=0.01)
+    bucket.acquire(100)
+    assert bucket.acquire(100) > 0
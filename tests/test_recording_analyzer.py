@@ -0,0 +1,65 @@
+"""Task 6 transcription tests"""
+
+import httpx
+import groq
+from solutions import recording_analyzer
+
+# pylint: disable=protected-access
+
+
+def test_server_errors_are_retried(mocker, tmp_path):
+    """
+    Given provider failing with server and connection errors,
+    transcription should be retried with backoff within rate limit buckets
+    """
+    audio = tmp_path / "nagranie.m4a"
+    audio.write_bytes(b"audio")
+    request = httpx.Request("POST", "http://test")
+    transcribe = mocker.patch.object(
+        recording_analyzer.llm_gateway,
+        "transcribe",
+        side_effect=[
+            groq.InternalServerError(
+                "Błąd", response=httpx.Response(503, request=request), body=None
+            ),
+            groq.APIConnectionError(request=request),
+            "Transkrypcja",
+        ],
+    )
+    sleep = mocker.patch.object(recording_analyzer.time, "sleep")
+    requests = mocker.patch.object(
+        recording_analyzer, "GROQ_TRANSCRIPTION_REQUESTS", mocker.Mock()
+    )
+    mocker.patch.object(recording_analyzer, "GROQ_AUDIO_SECONDS", mocker.Mock())
+    mocker.patch.object(recording_analyzer, "BACKOFF", 1)
+    assert recording_analyzer._create_transcription(str(audio)) == "Transkrypcja"
+    assert transcribe.call_count == 3
+    assert requests.acquire.call_count == 3
+    assert [call.args[0] for call in sleep.call_args_list] == [1, 2]
+
+
+def test_empty_facts_response_is_skipped(mocker):
+    """
+    Given model response without content,
+    the fragment should yield no facts
+    """
+    completion = mocker.Mock()
+    completion.choices = [mocker.Mock()]
+    completion.choices[0].message.content = None
+    mocker.patch.object(recording_analyzer.llm_gateway, "chat", return_value=completion)
+    assert recording_analyzer._extract_facts("Fragment nagrania") is None
+
+
+def test_context_budget_uses_chat_model_tokens(mocker):
+    """
+    Given transcriptions above context budget in chat model tokens,
+    they should be reduced to facts
+    """
+    count = mocker.patch.object(recording_analyzer.tokens, "count", return_value=10_000)
+    reduce_context = mocker.patch.object(
+        recording_analyzer, "_reduce_context", return_value="fakty"
+    )
+    mocker.patch.object(recording_analyzer, "CONTEXT_TOKENS", 6000)
+    assert recording_analyzer._build_prompt_context(["krótki tekst"]) == "fakty"
+    count.assert_called_once_with("krótki tekst", recording_analyzer.CHAT_MODEL)
+    reduce_context.assert_called_once_with(["krótki tekst"])
@@ -0,0 +1,176 @@
+"""Remote file cache tests"""
+
+import os
+import time
+import asyncio
+import pytest
+from common import http_client, remote_cache
+
+# pylint: disable=protected-access
+
+URL = "http://test/files/article.html"
+
+
+@pytest.fixture(autouse=True)
+def fixture_cache_dir(mocker, tmp_path):
+    """Isolated cache directory"""
+    mocker.patch.object(remote_cache, "CACHE_DIR", str(tmp_path))
+    mocker.patch.object(remote_cache, "DEFAULT_MAX_AGE", 0)
+    mocker.patch.dict(remote_cache._SIZE, {"total": None})
+
+
+def _response(mocker, status_code: int, headers: dict, body: bytes = b""):
+    response = mocker.MagicMock()
+    response.status_code = status_code
+    response.headers = headers
+    response.content = body
+    response.iter_content.return_value = [body[:3], body[3:]]
+    response.__enter__.return_value = response
+    return response
+
+
+def test_unchanged_file_is_revalidated(mocker):
+    """
+    Given cached file with ETag,
+    the next request should be conditional and 304 should return cached body
+    """
+    get = mocker.patch.object(
+        http_client.session,
+        "get",
+        side_effect=[
+            _response(mocker, 200, {"etag": '"v1"'}, "Artykuł ó".encode("utf-8")),
+            _response(mocker, 304, {}),
+        ],
+    )
+    assert remote_cache.get(URL).text == "Artykuł ó"
+    assert remote_cache.get(URL).text == "Artykuł ó"
+    assert get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+
+def test_fresh_file_is_not_requested(mocker):
+    """
+    Given cached file within Cache-Control max-age,
+    it should be served without a request
+    """
+    get = mocker.patch.object(
+        http_client.session,
+        "get",
+        return_value=_response(mocker, 200, {"cache-control": "max-age=60"}, b"dane"),
+    )
+    assert remote_cache.get(URL).content == b"dane"
+    assert remote_cache.get(URL).content == b"dane"
+    assert get.call_count == 1
+
+
+def test_changed_file_is_replaced(mocker):
+    """
+    Given file modified since it was cached,
+    new body should be returned
+    """
+    mocker.patch.object(
+        http_client.session,
+        "get",
+        side_effect=[
+            _response(mocker, 200, {"last-modified": "Mon, 01 Jan 2024"}, b"stare"),
+            _response(mocker, 200, {"last-modified": "Tue, 02 Jan 2024"}, b"nowe"),
+        ],
+    )
+    assert remote_cache.get(URL).content == b"stare"
+    assert remote_cache.get(URL).content == b"nowe"
+
+
+def test_errors_and_no_store_are_not_cached(mocker):
+    """
+    Given error response or no-store,
+    nothing should be cached
+    """
+    get = mocker.patch.object(
+        http_client.session,
+        "get",
+        side_effect=[
+            _response(mocker, 404, {}, b"brak"),
+            _response(mocker, 200, {"cache-control": "no-store"}, b"dane"),
+            _response(mocker, 200, {"cache-control": "max-age=60"}, b"dane"),
+        ],
+    )
+    assert remote_cache.get(URL).status_code == 404
+    assert remote_cache.get(URL).content == b"dane"
+    assert remote_cache.get(URL).content == b"dane"
+    assert get.call_args.kwargs["headers"] == {}
+
+
+def test_cache_is_size_bounded(mocker, tmp_path):
+    """
+    Given cache above its size limit,
+    the least recently used file should be evicted
+    """
+    mocker.patch.object(
+        http_client.session,
+        "get",
+        side_effect=lambda *_, **__: _response(
+            mocker, 200, {"cache-control": "max-age=60"}, b"x" * 1000
+        ),
+    )
+    mocker.patch.object(remote_cache, "MAX_BYTES", 3000)
+    for idx in (1, 2, 1, 3):
+        time.sleep(0.01)
+        remote_cache.get(f"{URL}?{idx}")
+    kept = {
+        os.path.basename(remote_cache._entry_path(f"{URL}?{idx}")) for idx in (1, 3)
+    }
+    assert {path.stem for path in tmp_path.glob("*.body")} == kept
+
+
+class _Stream:
+    def __init__(self, response):
+        self.response = response
+
+    async def __aenter__(self):
+        return self.response
+
+    async def __aexit__(self, *_):
+        return False
+
+
+def test_async_file_is_cached(mocker):
+    """
+    Given file downloaded with async client,
+    the next request within max-age should be served from disk
+    """
+
+    async def aiter_bytes(_):
+        yield b"da"
+        yield b"ne"
+
+    response = mocker.Mock()
+    response.status_code = 200
+    response.headers = {"cache-control": "max-age=60"}
+    response.aiter_bytes = aiter_bytes
+    stream = mocker.patch.object(
+        http_client.async_client, "stream", return_value=_Stream(response)
+    )
+    assert asyncio.run(remote_cache.get_async(URL)).content == b"dane"
+    assert asyncio.run(remote_cache.get_async(URL)).content == b"dane"
+    assert stream.call_count == 1
+
+
+def test_entry_evicted_while_read_is_downloaded_again(mocker, tmp_path):
+    """
+    Given fresh entry whose body is evicted after its metadata was read,
+    the file should be downloaded again instead of failing
+    """
+    get = mocker.patch.object(
+        http_client.session,
+        "get",
+        side_effect=lambda *_, **__: _response(
+            mocker, 200, {"cache-control": "max-age=60"}, b"dane"
+        ),
+    )
+    remote_cache.get(URL)
+    meta = remote_cache._read_meta(remote_cache._entry_path(URL))
+    mocker.patch.object(remote_cache, "_read_meta", return_value=meta)
+    for body in tmp_path.glob("*.body"):
+        body.unlink()
+    assert remote_cache.get(URL).content == b"dane"
+    assert get.call_count == 2
+    assert get.call_args.kwargs["headers"] == {}
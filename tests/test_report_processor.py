@@ -0,0 +1,112 @@
+"""Task 9 report classification tests"""
+
+import io
+import json
+import re
+import pytest
+from PIL import Image, ImageDraw
+from solutions import report_processor
+from common.artifact_store import digest
+from common.prompts import ANALYSE_REPORTS
+
+# pylint: disable=protected-access
+
+
+def _completion(mocker, content: str):
+    completion = mocker.Mock()
+    completion.choices = [mocker.Mock()]
+    completion.choices[0].message.content = content
+    return completion
+
+
+@pytest.fixture(name="chat")
+def fixture_chat(mocker):
+    """Model labelling reports by file name, hardware for names with hw"""
+
+    def reply(messages, **_):
+        prompt = messages[0]["content"]
+        if prompt.startswith(ANALYSE_REPORTS[:80]):
+            filenames = re.findall(r'<report filename="([^"]+)">', prompt)
+            labels = {name: "people" for name in filenames if "batch" in name}
+            return _completion(mocker, json.dumps({"labels": labels}))
+        label = "hardware" if "hw" in prompt else "robots"
+        return _completion(mocker, json.dumps({"label": label}))
+
+    return mocker.patch.object(report_processor.llm_gateway, "chat", side_effect=reply)
+
+
+def test_reports_are_packed_in_order(mocker):
+    """
+    Given reports above batch budget,
+    they should be packed into consecutive batches within budget
+    """
+    mocker.patch.object(report_processor, "BATCH_TOKENS", 20)
+    texts = {"a.txt": "a" * 36, "b.txt": "b" * 36, "c.txt": "c" * 36}
+    assert report_processor._pack_batches(texts) == [
+        {"a.txt": "a" * 36, "b.txt": "b" * 36},
+        {"c.txt": "c" * 36},
+    ]
+
+
+def test_batch_labels_are_validated(mocker):
+    """
+    Given batch response with unknown file and label,
+    only known files with allowed labels should be returned
+    """
+    labels = {"a.txt": "people", "b.txt": "robots", "x.txt": "hardware"}
+    mocker.patch.object(
+        report_processor.llm_gateway,
+        "chat",
+        return_value=_completion(mocker, json.dumps({"labels": labels})),
+    )
+    reports = {"a.txt": "raport a", "b.txt": "raport b"}
+    assert report_processor._request_labels(reports) == {"a.txt": "people"}
+
+
+def test_missing_labels_fall_back_to_single_reports(chat):
+    """
+    Given batch response without some labels,
+    the batch should be split down to single report requests
+    and unknown single labels should be dropped
+    """
+    reports = {
+        "batch.txt": "raport",
+        "hw.txt": "raport hw",
+        "other.txt": "raport",
+    }
+    assert report_processor._classify_batch(reports) == {
+        "batch.txt": "people",
+        "hw.txt": "hardware",
+    }
+    assert chat.call_count > 1
+
+
+def _scan(text: str) -> bytes:
+    image = Image.new("RGB", (600, 400), "white")
+    draw = ImageDraw.Draw(image)
+    for line in range(40, 360, 30):
+        draw.text((40, line), f"{text} {line}", fill="black")
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_different_scans_are_not_merged(mocker, tmp_path):
+    """
+    Given two document scans with the same layout and different text,
+    each should be described under its own content key
+    """
+    mocker.patch.object(report_processor, "FILE_DIR", str(tmp_path))
+    mocker.patch.object(report_processor.ocr, "extract_text", return_value=None)
+    description = mocker.patch.object(
+        report_processor.media_cache, "description", return_value="opis"
+    )
+    (tmp_path / "first.png").write_bytes(_scan("Schwytano jednostke"))
+    (tmp_path / "second.png").write_bytes(_scan("Awaria czujnikow"))
+    report_processor._describe_image("first.png")
+    report_processor._describe_image("second.png")
+    keys = [call.args[0] for call in description.call_args_list]
+    assert keys == [
+        digest((tmp_path / "first.png").read_bytes()),
+        digest((tmp_path / "second.png").read_bytes()),
+    ]
@@ -0,0 +1,29 @@
+"""Serialization tests"""
+
+from common.serialization import dumps, loads, redact, yaml_dump, yaml_load
+from common.utils import pretty_json
+
+
+def test_redact_does_not_modify_answer():
+    """
+    Given answer with api key,
+    the redacted copy should hide the key and leave the answer intact
+    """
+    payload = {"answer": ["a", "b"]}
+    answer = {"task": "JSON", "apikey": "secret", "answer": payload}
+    redacted = redact(answer)
+    assert redacted["apikey"] == "<hidden>"
+    assert answer["apikey"] == "secret"
+    assert redacted["answer"] is payload
+    assert '"apikey": "<hidden>"' in pretty_json(answer)
+
+
+def test_round_trip_keeps_polish_characters():
+    """
+    Given data with polish characters,
+    encoded json and yaml should decode to the same data
+    """
+    data = {"cities": ["Kraków", "Łódź"], "people": ["Rafał"]}
+    assert "Kraków".encode("utf8") in dumps(data)
+    assert loads(dumps(data)) == data
+    assert yaml_load(yaml_dump(data)) == data
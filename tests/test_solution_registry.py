@@ -0,0 +1,32 @@
+"""Solution registry tests"""
+
+import pytest
+from fastapi.testclient import TestClient
+from common import solution_registry
+from api.main import app
+
+client = TestClient(app)
+
+
+def test_disabled_solution_is_not_found(mocker):
+    """
+    Given solution not enabled in current deployment,
+    the endpoint should respond with 404 without importing it
+    """
+    mocker.patch.object(solution_registry, "ENABLED", ["grapher"])
+    import_module = mocker.patch("importlib.import_module")
+    result = client.get("/task9/report-processor")
+    assert result.status_code == 404
+    import_module.assert_not_called()
+
+
+def test_solution_without_configuration_is_unavailable(mocker):
+    """
+    Given solution that cannot read its configuration,
+    the registry should report it as unavailable
+    """
+    mocker.patch.dict(solution_registry.SOLUTIONS, {"broken": "broken_module"})
+    mocker.patch.object(solution_registry, "ENABLED", ["broken"])
+    mocker.patch("importlib.import_module", side_effect=KeyError("NEO4J_URI"))
+    with pytest.raises(solution_registry.SolutionUnavailableError):
+        solution_registry.get_solution("broken")
@@ -0,0 +1,43 @@
+"""Single pass template filling tests"""
+
+from common import templates
+
+
+def test_all_placeholders_are_replaced():
+    """
+    Given text with repeated placeholders,
+    every occurrence should be replaced
+    """
+    text = "placeholder_a_png, placeholder_b_mp3 i znowu placeholder_a_png"
+    assert templates.substitute(
+        text, {"placeholder_a_png": "rynek", "placeholder_b_mp3": "nagranie"}
+    ) == ("rynek, nagranie i znowu rynek")
+
+
+def test_longest_placeholder_wins():
+    """
+    Given placeholder being a prefix of another one,
+    the longer placeholder should be replaced as a whole
+    """
+    assert templates.substitute("ab abc a", {"ab": "1", "abc": "2", "a": "3"}) == (
+        "1 2 3"
+    )
+
+
+def test_inserted_values_are_not_replaced_again():
+    """
+    Given value containing another placeholder,
+    it should be inserted unchanged
+    """
+    assert templates.substitute(
+        "task_report task_sector",
+        {"task_report": "raport z task_sector", "task_sector": "C4"},
+    ) == ("raport z task_sector C4")
+
+
+def test_special_characters_are_escaped():
+    """
+    Given placeholders with regex characters,
+    they should be matched literally
+    """
+    assert templates.substitute("[x] (y).", {"[x]": "1", "(y).": "2"}) == "1 2"
@@ -0,0 +1,122 @@
+"""Prompt size estimation and fitting tests"""
+
+from common import tokens
+
+
+def test_short_text_is_not_split():
+    """
+    Given text within budget,
+    it should be returned as a single part
+    """
+    assert tokens.split("Andrzej Maj", 10) == ["Andrzej Maj"]
+
+
+def test_long_text_is_split_on_words():
+    """
+    Given text above budget,
+    every part should fit the budget and no word should be lost
+    """
+    text = " ".join(f"słowo{idx}" for idx in range(200))
+    parts = tokens.split(text, 20)
+    assert len(parts) > 1
+    assert all(tokens.estimate(part) <= 20 for part in parts)
+    assert "".join(parts) == text
+
+
+def test_split_keeps_lines_and_whitespace():
+    """
+    Given multiline text above budget,
+    parts should break on lines and keep original whitespace
+    """
+    lines = [f"Linia {idx}:\tsłowo  słowo" for idx in range(20)]
+    text = "\n".join(lines) + "\n"
+    parts = tokens.split(text, 20)
+    assert len(parts) > 1
+    assert all(part.endswith("\n") for part in parts)
+    assert all(tokens.estimate(part) <= 20 for part in parts)
+    assert "".join(parts) == text
+
+
+def test_texts_are_packed_in_order():
+    """
+    Given short texts,
+    they should be joined into groups within budget keeping order
+    """
+    texts = ["a" * 36, "b" * 36, "c" * 36]
+    assert tokens.pack(texts, 20) == [f"{'a' * 36}\n{'b' * 36}", "c" * 36]
+
+
+MODEL = "gpt-4o-mini"
+TEXT = " ".join(f"zdanie{idx}" for idx in range(400))
+
+
+def test_text_within_budget_is_kept():
+    """
+    Given text within budget,
+    it should be returned unchanged
+    """
+    assert tokens.fit("Andrzej Maj", 100, MODEL) == "Andrzej Maj"
+
+
+def test_fit_strategies_keep_their_side():
+    """
+    Given text above budget,
+    each strategy should fit the budget and keep its part of the text
+    """
+    head = tokens.fit(TEXT, 50, MODEL, "head")
+    tail = tokens.fit(TEXT, 50, MODEL, "tail")
+    middle = tokens.fit(TEXT, 50, MODEL, "middle")
+    assert all(tokens.count(text, MODEL) <= 50 for text in (head, tail, middle))
+    assert head.startswith("zdanie0 ") and tail.endswith("zdanie399")
+    assert middle.startswith("zdanie0 ") and middle.endswith("zdanie399")
+    assert tokens.TRUNCATION_MARKER in middle
+
+
+def test_compact_removes_whitespace_first():
+    """
+    Given indented JSON above budget only because of whitespace,
+    it should be compacted without dropping content
+    """
+    content = '{\n    "sektor":    "C4",\n    "osoby":    ["Barbara", "Aleksander"]\n}'
+    assert tokens.fit(content, tokens.count(content, MODEL) - 5, MODEL, "compact") == (
+        '{"sektor":"C4","osoby":["Barbara","Aleksander"]}'
+    )
+
+
+def test_budget_reserves_output_tokens():
+    """
+    Given model with known context window,
+    budget should leave room for the answer
+    """
+    assert tokens.budget("llama3.2:3b") == 2048 - 512
+    assert tokens.budget("gpt-4o-mini", max_tokens=1000) == 128000 - 1000
+
+
+def test_fill_fits_content_into_budget(mocker):
+    """
+    Given content larger than model context,
+    the whole prompt with reserved tokens should fit the budget
+    """
+    mocker.patch.dict(tokens.CONTEXT_WINDOWS, {"small": 400})
+    prompt = tokens.fill("Artykuł:\nARTICLE\nOdpowiedz.", "ARTICLE", TEXT, "small", 50)
+    assert prompt.startswith("Artykuł:\nzdanie0 ")
+    assert prompt.endswith("zdanie399\nOdpowiedz.")
+    assert tokens.count_messages([{"content": prompt}], "small") + 50 <= 300
+
+
+def test_unknown_model_budget_is_not_enforced():
+    """
+    Given model without known context window,
+    budget should not be enforced and content should be kept whole
+    """
+    assert tokens.budget("unknown-model") is None
+    assert tokens.fill("Tekst: X", "X", TEXT, "unknown-model") == f"Tekst: {TEXT}"
+
+
+def test_texts_are_grouped_without_separator():
+    """
+    Given no separator,
+    groups should be returned as lists of texts
+    """
+    texts = ["a" * 36, "b" * 36, "c" * 36]
+    assert tokens.pack(texts, 20, separator=None) == [texts[:2], texts[2:]]